@@ -1,21 +1,21 @@
-from rest_framework.pagination import PageNumberPagination
+from core.utils.pagination import CursorPageNumberPagination
 
 
-class SmallSetPagination(PageNumberPagination):
+class SmallSetPagination(CursorPageNumberPagination):
     page_query_param = 'p'
     page_size = 10
     page_size_query_param = 'page_size'
     max_page_size = 10
 
 
-class MediumSetPagination(PageNumberPagination):
+class MediumSetPagination(CursorPageNumberPagination):
     page_query_param = 'p'
     page_size = 9
     page_size_query_param = 'page_size'
     max_page_size = 9
 
 
-class LargeSetPagination(PageNumberPagination):
+class LargeSetPagination(CursorPageNumberPagination):
     page_query_param = 'p'
     page_size = 18
     page_size_query_param = 'page_size'
@@ -3,9 +3,15 @@ from django.conf import settings
 User = settings.AUTH_USER_MODEL
 import uuid
 from ckeditor.fields import RichTextField
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from apps.user.utils.employee_dashboard import invalidate_employee_dashboard
+from apps.user.utils.suggestions import schedule_suggestion_refresh
+from core.utils.search import SearchDocumentMixin, build_search_document, register_search_index
+from core.utils.pagination import track_cached_counts
 
 
-class JobBoard(models.Model):
+class JobBoard(SearchDocumentMixin, models.Model):
     options_status = (
         ('draft', 'Draft'),
         ('published', 'Published'),
@@ -26,14 +32,38 @@ class JobBoard(models.Model):
     priority =      models.CharField(max_length=10, choices=options_priority, default='Baja')
     start_date = models.DateTimeField(null=True, blank=True)
     end_date = models.DateTimeField(null=True, blank=True)
+    search_document = models.TextField(blank=True, default='', editable=False)
 
     class Meta:
         verbose_name_plural = 'Bolsa de empleo'
         verbose_name = 'Bolsa de empleo'
         ordering = ['-created']
+        indexes = [
+            # Ventana de publicacion de active_jobs_queryset.
+            models.Index(fields=["status", "start_date", "end_date"], name="jobboard_active_window_idx"),
+        ]
+
+    def build_search_document_for(self):
+        owner = self.user if self.user_id else None
+        return build_search_document(
+            self.title,
+            self.description,
+            getattr(owner, "enterprise", None),
+            getattr(owner, "username", None),
+        )
+
     def __str__(self):
         return self.title
 
+
+job_search_index = register_search_index(
+    JobBoard,
+    "job_jobboard_fts",
+    # El nombre de la empresa hace parte del documento de sus ofertas.
+    related={"user": ("enterprise", "username")},
+    gin_index_name="jobboard_search_gin",
+)
+
 class JobApplication(models.Model):
     ORIGIN_CHOICES = (
         ("interno", "Interno"),
@@ -62,3 +92,18 @@ class JobApplication(models.Model):
         return f"{self.full_name} - {self.job.title}"
       
     
+
+
+track_cached_counts(JobApplication)
+
+
+@receiver(post_save, sender=JobBoard)
+@receiver(post_delete, sender=JobBoard)
+def invalidate_employee_dashboard_on_jobboard_change(sender, instance, **kwargs):
+    invalidate_employee_dashboard()
+
+
+@receiver(post_save, sender=JobBoard)
+@receiver(post_delete, sender=JobBoard)
+def refresh_suggestions_on_jobboard_change(sender, instance, **kwargs):
+    schedule_suggestion_refresh(instance.user_id)
@@ -1,3 +1,81 @@
+import json
+from unittest import mock
+
 from django.test import TestCase
+from rest_framework.test import APIClient
+
+from apps.user.models import UserAccount
+from .models import JobApplication, JobBoard
+from .serializers import JobBoardSerializer
+
+
+class JobBoardListPaginationTests(TestCase):
+    def setUp(self):
+        self.enterprise = UserAccount.objects.create(
+            email="empresa@example.com",
+            username="empresa",
+            role="enterprise",
+            enterprise="Empresa",
+        )
+        JobBoard.objects.bulk_create(
+            [JobBoard(user=self.enterprise, title=f"Oferta {index}", image="jobBoard/oferta.png") for index in range(23)]
+        )
+        self.client = APIClient()
+
+    def _get_page(self, user, params):
+        self.client.force_authenticate(user)
+        original = JobBoardSerializer.to_representation
+        with mock.patch.object(
+            JobBoardSerializer, "to_representation", autospec=True, side_effect=original
+        ) as to_representation:
+            response = self.client.get("/api/job/list/", params)
+        return response, to_representation.call_count
+
+    def test_enterprise_list_serializes_only_the_requested_page(self):
+        response, serialized = self._get_page(self.enterprise, {"p": 1})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["count"], 23)
+        self.assertEqual(len(response.data["results"]["jobs"]), 10)
+        self.assertEqual(serialized, 10)
+
+        response, serialized = self._get_page(self.enterprise, {"p": 3})
+        self.assertEqual(len(response.data["results"]["jobs"]), 3)
+        self.assertEqual(serialized, 3)
+
+    def test_employee_list_of_an_enterprise_is_paginated(self):
+        employee = UserAccount.objects.create(email="empleado@example.com", username="empleado", role="employees")
+
+        response, serialized = self._get_page(employee, {"enterprise_id": str(self.enterprise.id)})
+
+        self.assertEqual(response.data["count"], 23)
+        self.assertEqual(serialized, 10)
+        self.assertIn("applications_count", response.data["results"]["jobs"][0])
+
+
+class EmployeeApplicationsTests(TestCase):
+    def setUp(self):
+        enterprise = UserAccount.objects.create(email="empresa@example.com", username="empresa", role="enterprise")
+        self.employee = UserAccount.objects.create(email="empleado@example.com", username="empleado", role="employees")
+        job = JobBoard.objects.create(user=enterprise, title="Oferta", image="jobBoard/oferta.png")
+        JobApplication.objects.bulk_create(
+            [
+                JobApplication(job=job, applicant=self.employee, full_name=f"Empleado {index}", email="empleado@example.com")
+                for index in range(12)
+            ]
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.employee)
+
+    def test_paginated_list(self):
+        response = self.client.get("/api/employee/applications/")
+        self.assertEqual(response.data["count"], 12)
+        self.assertEqual(len(response.data["results"]), 10)
+        self.assertIsNotNone(response.data["next"])
 
-# Create your tests here.
+    def test_ndjson_stream_writes_one_object_per_line(self):
+        response = self.client.get("/api/employee/applications/", {"stream": "ndjson"})
+        self.assertEqual(response["Content-Type"], "application/x-ndjson")
+        lines = b"".join(response.streaming_content).decode("utf-8").splitlines()
+        self.assertEqual(len(lines), 12)
+        self.assertEqual({json.loads(line)["full_name"] for line in lines}, {f"Empleado {index}" for index in range(12)})
@@ -1,32 +1,32 @@
-from rest_framework.pagination import PageNumberPagination
+from core.utils.pagination import CursorPageNumberPagination
 
 
-class JobSetPagination(PageNumberPagination):
+class JobSetPagination(CursorPageNumberPagination):
     page_query_param = 'p'
     page_size = 10
     page_size_query_param = 'page_size'
     max_page_size = 10
 
-class JobMainSetPagination(PageNumberPagination):
+class JobMainSetPagination(CursorPageNumberPagination):
     page_query_param = 'p'
     page_size = 9
     page_size_query_param = 'page_size'
     max_page_size = 9
 
-class SmallSetPagination(PageNumberPagination):
+class SmallSetPagination(CursorPageNumberPagination):
     page_query_param = 'p'
     page_size = 10
     page_size_query_param = 'page_size'
     max_page_size = 10
     
-class MediumSetPagination(PageNumberPagination):
+class MediumSetPagination(CursorPageNumberPagination):
     page_query_param = 'p'
     page_size = 9
     page_size_query_param = 'page_size'
     max_page_size = 9
 
 
-class LargeSetPagination(PageNumberPagination):
+class LargeSetPagination(CursorPageNumberPagination):
     page_query_param = 'p'
     page_size = 18
     page_size_query_param = 'page_size'
@@ -6,7 +6,7 @@ from .serializers import (
     EmployeeJobListSerializer,
     JobApplicationSerializer,
 )
-from .models import JobBoard, JobApplication
+from .models import JobBoard, JobApplication, job_search_index
 from rest_framework.response import Response
 from rest_framework import status
 from .utils.pagination import SmallSetPagination, JobSetPagination
@@ -24,6 +24,8 @@ import threading
 import tempfile
 import os
 import logging
+from core.utils.search import ranked
+from core.utils.streaming import ndjson_response, wants_ndjson
 
 logger = logging.getLogger(__name__)
 
@@ -160,9 +162,7 @@ class JobBoardView(APIView):
             if user.role == 'Admin':
                 jobboards = JobBoard.objects.all()
             elif user.role == 'enterprise':
-                jobboards = JobBoard.objects.filter(user=user).annotate(
-                    applications_count=Count("applications")
-                )
+                jobboards = JobBoard.objects.filter(user=user)
                 if enterprise_id and enterprise_id != str(user.id):
                     return Response({'error': 'Not authorized to view other enterprise job boards'}, status=status.HTTP_403_FORBIDDEN)
             elif user.role == "employees":
@@ -170,14 +170,15 @@ class JobBoardView(APIView):
             else:
                 return Response({'error': 'Not authorized'}, status=status.HTTP_403_FORBIDDEN)
 
-            jobboards = jobboards.order_by('-created')
-            serializer = self.serializer_class(
-                jobboards, many=True, context={'request': request})
-            serialized_data = serializer.data
-
+            jobboards = jobboards.annotate(
+                applications_count=Count("applications")
+            ).order_by('-created')
+            # Se pagina el queryset: solo las filas de la pagina se leen y serializan.
             paginator = SmallSetPagination()
-            result_page = paginator.paginate_queryset(serialized_data, request)
-            return paginator.get_paginated_response({'jobs': result_page})
+            result_page = paginator.paginate_queryset(jobboards, request)
+            serializer = self.serializer_class(
+                result_page, many=True, context={'request': request})
+            return paginator.get_paginated_response({'jobs': serializer.data})
 
     def post(self, request):
         data = request.data.copy()  # Create a mutable copy of the QueryDict
@@ -264,22 +265,16 @@ class EmployeeJobsListView(APIView):
             )
 
         search = (request.query_params.get("search") or "").strip()
-        jobs = (
-            active_jobs_queryset(JobBoard.objects.filter(
-                user__role="enterprise",
-                user__is_active=True,
-            ))
-            .select_related("user")
-            .annotate(applications_count=Count('applications'))
-            .order_by("-created")
-        )
+        jobs = active_jobs_queryset(JobBoard.objects.filter(
+            user__role="enterprise",
+            user__is_active=True,
+        ))
         if search:
-            jobs = jobs.filter(
-                Q(title__icontains=search)
-                | Q(description__icontains=search)
-                | Q(user__enterprise__icontains=search)
-                | Q(user__username__icontains=search)
-            )
+            # Ventana de publicacion y texto completo en la misma consulta, ordenada por relevancia.
+            jobs = ranked(job_search_index.search(jobs, search), "-created")
+        else:
+            jobs = jobs.order_by("-created")
+        jobs = jobs.select_related("user").annotate(applications_count=Count('applications'))
         paginator = SmallSetPagination()
         paginated = paginator.paginate_queryset(jobs, request)
         serializer = self.serializer_class(paginated, many=True, context={"request": request})
@@ -372,7 +367,7 @@ class EnterpriseApplicationsView(APIView):
             applications = applications.filter(origin=origin)
 
         applications = applications.order_by('-created_at')
-        paginator = SmallSetPagination()
+        paginator = SmallSetPagination(cache_count=True)
         paginated = paginator.paginate_queryset(applications, request)
         serializer = JobApplicationSerializer(paginated, many=True, context={"request": request})
         return paginator.get_paginated_response(serializer.data)
@@ -394,8 +389,13 @@ class EmployeeApplicationsView(APIView):
             applications = applications.filter(origin=origin)
 
         applications = applications.order_by('-created_at')
-        serializer = JobApplicationSerializer(applications, many=True, context={"request": request})
-        return Response(serializer.data, status=status.HTTP_200_OK)
+        if wants_ndjson(request):
+            return ndjson_response(applications, JobApplicationSerializer, context={"request": request})
+
+        paginator = SmallSetPagination(cache_count=True)
+        paginated = paginator.paginate_queryset(applications, request)
+        serializer = JobApplicationSerializer(paginated, many=True, context={"request": request})
+        return paginator.get_paginated_response(serializer.data)
 
 
 @permission_classes([AllowAny])
@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import Product, ProductRedemption, ProductViewLog
+from .models import Product, ProductRedemption, ProductRedemptionDaily, ProductViewLog
 from unfold.admin import ModelAdmin
 
 
@@ -65,3 +65,11 @@ class ProductViewLogAdmin(ModelAdmin):
     list_filter = ('viewed_at', 'product')
     search_fields = ('product__name', 'viewer__email', 'viewer__first_name', 'viewer__last_name')
     readonly_fields = ('viewed_at',)
+
+
+@admin.register(ProductRedemptionDaily)
+class ProductRedemptionDailyAdmin(ModelAdmin):
+    list_display = ('date', 'enterprise', 'product_key', 'total')
+    list_filter = ('date', 'enterprise')
+    search_fields = ('enterprise__email', 'enterprise__enterprise')
+    readonly_fields = ('date', 'enterprise', 'product_key', 'total')
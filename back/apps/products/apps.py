@@ -4,3 +4,9 @@ from django.apps import AppConfig
 class ProductsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'apps.products'
+
+    def ready(self):
+        from django.db.models.signals import post_migrate
+        from core.utils.search import ensure_search_backends
+
+        post_migrate.connect(ensure_search_backends, sender=self)
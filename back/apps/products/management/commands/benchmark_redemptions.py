@@ -0,0 +1,94 @@
+import statistics
+import time
+import uuid
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from apps.products.models import Product, ProductRedemption
+from apps.products.views import ProductRedeemView
+from apps.user.models import UserAccount
+
+
+class Command(BaseCommand):
+    help = (
+        "Dispara canjes concurrentes contra ProductRedeemView con datos temporales (una empresa, "
+        "sus beneficios y empleados) y reporta rendimiento, latencias y canjes duplicados. "
+        "Usar en una base de datos de pruebas: crea y luego borra sus propios registros."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--employees", type=int, default=50)
+        parser.add_argument("--products", type=int, default=5)
+        parser.add_argument("--taps", type=int, default=3, help="Toques repetidos por empleado y beneficio.")
+        parser.add_argument("--workers", type=int, default=16)
+        parser.add_argument("--keep", action="store_true", help="No borra los datos temporales.")
+
+    def handle(self, *args, **options):
+        marker = uuid.uuid4().hex[:8]
+        enterprise = UserAccount.objects.create(
+            email=f"bench-{marker}@example.com",
+            username=f"bench-{marker}",
+            enterprise=f"Benchmark {marker}",
+            role="enterprise",
+        )
+        employees = UserAccount.objects.bulk_create(
+            [
+                UserAccount(email=f"bench-{marker}-{index}@example.com", username=f"bench-{marker}-{index}", role="employees")
+                for index in range(options["employees"])
+            ]
+        )
+        products = Product.objects.bulk_create(
+            [Product(user=enterprise, name=f"Benchmark {marker} {index}") for index in range(options["products"])]
+        )
+        # Todos los toques de un mismo par quedan seguidos para forzar la carrera.
+        jobs = [
+            (employee, product)
+            for employee in employees
+            for product in products
+            for _ in range(options["taps"])
+        ]
+
+        factory = APIRequestFactory()
+        view = ProductRedeemView.as_view()
+
+        def redeem(job):
+            employee, product = job
+            request = factory.post(f"/api/product/{product.pk}/redeem/")
+            force_authenticate(request, user=employee)
+            started = time.perf_counter()
+            try:
+                status_code = view(request, pk=product.pk).status_code
+            except Exception as error:  # noqa: BLE001 - se reporta el tipo de error
+                status_code = type(error).__name__
+            finally:
+                connection.close()
+            return status_code, time.perf_counter() - started
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=options["workers"]) as executor:
+            results = list(executor.map(redeem, jobs))
+        elapsed = time.perf_counter() - started
+
+        latencies = sorted(latency * 1000 for _, latency in results)
+        outcomes = Counter(status_code for status_code, _ in results)
+        rows = ProductRedemption.objects.filter(enterprise=enterprise).count()
+        expected = len(employees) * len(products)
+        p95 = latencies[max(int(len(latencies) * 0.95) - 1, 0)] if latencies else 0
+
+        self.stdout.write(
+            f"Canjes: {len(results)} en {elapsed:.2f}s ({len(results) / elapsed:.0f}/s) con {options['workers']} hilos."
+        )
+        self.stdout.write(
+            f"Latencia ms: p50 {statistics.median(latencies):.1f}, p95 {p95:.1f}, max {latencies[-1]:.1f}."
+        )
+        self.stdout.write(f"Respuestas: {dict(outcomes)}.")
+        style = self.style.SUCCESS if rows == expected else self.style.ERROR
+        self.stdout.write(style(f"Filas de canje: {rows} (esperadas {expected})."))
+
+        if not options["keep"]:
+            UserAccount.objects.filter(pk__in=[employee.pk for employee in employees]).delete()
+            enterprise.delete()
@@ -0,0 +1,30 @@
+from django.core.management.base import BaseCommand
+
+from apps.products.utils.view_buffer import VIEW_FLUSH_BATCH_SIZE, flush_product_views, pending_product_views
+
+
+class Command(BaseCommand):
+    help = (
+        "Vuelca el buffer de visualizaciones de beneficios a ProductViewLog y Product.views. "
+        "Programar en cron (ej. cada minuto)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=VIEW_FLUSH_BATCH_SIZE,
+            help="Eventos leidos del cache por lote.",
+        )
+
+    def handle(self, *args, **options):
+        result = flush_product_views(batch_size=options["batch_size"])
+        if result is None:
+            self.stdout.write(self.style.WARNING("Otro proceso esta volcando el buffer; se omite esta ejecucion."))
+            return
+        read, created = result
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Eventos leidos: {read}. Visualizaciones nuevas: {created}. Pendientes: {pending_product_views()}."
+            )
+        )
@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.utils.dateparse import parse_date
+
+from apps.products.utils.rollup import rebuild_redemption_rollup
+
+
+class Command(BaseCommand):
+    help = (
+        "Recalcula la tabla de canjes por dia (ProductRedemptionDaily) desde ProductRedemption. "
+        "Ejecutar tras desplegar la tabla o si se corrigen canjes a mano."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--since", help="Fecha YYYY-MM-DD desde la que se recalcula (por defecto todo).")
+        parser.add_argument("--chunk-size", type=int, default=1000)
+
+    def handle(self, *args, **options):
+        since = None
+        if options.get("since"):
+            since = parse_date(options["since"])
+            if since is None:
+                raise CommandError("--since debe tener formato YYYY-MM-DD.")
+        written = rebuild_redemption_rollup(since=since, chunk_size=max(1, options["chunk_size"]))
+        self.stdout.write(self.style.SUCCESS(f"Filas de canjes por dia escritas: {written}."))
@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand
+
+from core.utils.search import registered_search_indexes
+
+
+class Command(BaseCommand):
+    help = (
+        "Recalcula los documentos de busqueda de texto completo de todos los modelos "
+        "indexados y reconstruye sus tablas FTS5 (en SQLite)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--chunk-size", type=int, default=500)
+
+    def handle(self, *args, **options):
+        chunk_size = max(1, options["chunk_size"])
+        for index in registered_search_indexes():
+            index.ensure_backend()
+            # La tabla sombra se reconstruye completa al final (tambien limpia filas huerfanas).
+            total = index.refresh_documents(chunk_size=chunk_size, index_rows=False)
+            index.rebuild(chunk_size=chunk_size)
+            self.stdout.write(
+                self.style.SUCCESS(f"{index.model._meta.label}: {total} documentos indexados.")
+            )
@@ -3,8 +3,15 @@ from django.conf import settings
 User = settings.AUTH_USER_MODEL
 import uuid
 from django.utils import timezone
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from apps.user.utils.employee_dashboard import invalidate_employee_dashboard
+from apps.user.utils.suggestions import schedule_suggestion_refresh
+from .utils.rollup import add_to_redemption_rollup, redemption_product_key
+from core.utils.search import SearchDocumentMixin, build_search_document, register_search_index
+from core.utils.pagination import track_cached_counts
 
-class Product(models.Model):
+class Product(SearchDocumentMixin, models.Model):
     id =                models.UUIDField(default=uuid.uuid4, unique=True, primary_key=True)
     name = models.CharField(max_length=200)
     description = models.TextField(null=True, blank=True)
@@ -21,11 +28,33 @@ class Product(models.Model):
     extracategory = models.CharField(max_length=20, null=True, blank=True)
     created = models.DateTimeField(auto_now_add=True, null=True, blank=True)
     updated = models.DateTimeField(auto_now=True, null=True, blank=True)
-    
+    search_document = models.TextField(blank=True, default='', editable=False)
+
+    def build_search_document_for(self):
+        owner = self.user if self.user_id else None
+        return build_search_document(
+            self.name,
+            self.description,
+            self.category,
+            self.subcategory,
+            self.extracategory,
+            getattr(owner, "enterprise", None),
+            getattr(owner, "username", None),
+        )
+
     def __str__(self):
         return self.name
 
 
+product_search_index = register_search_index(
+    Product,
+    "products_product_fts",
+    # El nombre de la empresa hace parte del documento de sus beneficios.
+    related={"user": ("enterprise", "username")},
+    gin_index_name="product_search_gin",
+)
+
+
 class ProductRedemption(models.Model):
     id = models.UUIDField(default=uuid.uuid4, unique=True, primary_key=True)
     product = models.ForeignKey(
@@ -48,12 +77,24 @@ class ProductRedemption(models.Model):
         verbose_name_plural = 'Canjes de Beneficios'
         ordering = ['-redeemed_at']
         unique_together = ('product', 'employee', 'redeemed_date')
+        indexes = [
+            models.Index(fields=['enterprise', 'redeemed_date'], name='redemption_ent_date_idx'),
+        ]
+
+    def save(self, *args, **kwargs):
+        # El snapshot identifica el beneficio en los reportes aunque luego se borre.
+        if self.product_id and not self.product_id_snapshot:
+            self.product_id_snapshot = self.product_id
+        super().save(*args, **kwargs)
 
     def __str__(self):
         product_name = self.product.name if self.product else self.product_name_snapshot
         return f"{self.employee} -> {product_name}"
 
 
+track_cached_counts(ProductRedemption)
+
+
 class ProductViewLog(models.Model):
     id = models.UUIDField(default=uuid.uuid4, unique=True, primary_key=True)
     product = models.ForeignKey(Product, related_name='view_logs', on_delete=models.CASCADE)
@@ -68,3 +109,52 @@ class ProductViewLog(models.Model):
 
     def __str__(self):
         return f"{self.viewer} vio {self.product.name}"
+
+
+class ProductRedemptionDaily(models.Model):
+    """
+    Canjes por dia, empresa y beneficio para los reportes. Se mantiene en cada canje
+    (y al borrar uno); rebuild_redemption_rollup lo recalcula desde ProductRedemption.
+    product_key es el id del beneficio al canjear: sobrevive al borrado del beneficio.
+    """
+    id = models.UUIDField(default=uuid.uuid4, unique=True, primary_key=True)
+    date = models.DateField()
+    enterprise = models.ForeignKey(User, related_name='benefit_redemption_days', on_delete=models.CASCADE)
+    product_key = models.UUIDField()
+    total = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        verbose_name = 'Canjes por Día'
+        verbose_name_plural = 'Canjes por Día'
+        ordering = ['-date']
+        unique_together = ('date', 'enterprise', 'product_key')
+        indexes = [
+            models.Index(fields=['enterprise', 'date'], name='redemption_daily_ent_date_idx'),
+            models.Index(fields=['date'], name='redemption_daily_date_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.date} {self.enterprise}: {self.total}"
+
+
+@receiver(post_save, sender=Product)
+@receiver(post_delete, sender=Product)
+def invalidate_employee_dashboard_on_product_change(sender, instance, **kwargs):
+    invalidate_employee_dashboard()
+
+
+@receiver(post_save, sender=Product)
+@receiver(post_delete, sender=Product)
+def refresh_suggestions_on_product_change(sender, instance, **kwargs):
+    schedule_suggestion_refresh(instance.user_id)
+
+
+@receiver(post_save, sender=ProductRedemption)
+def add_redemption_to_rollup(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        add_to_redemption_rollup(instance.redeemed_date, instance.enterprise_id, redemption_product_key(instance), 1)
+
+
+@receiver(post_delete, sender=ProductRedemption)
+def remove_redemption_from_rollup(sender, instance, **kwargs):
+    add_to_redemption_rollup(instance.redeemed_date, instance.enterprise_id, redemption_product_key(instance), -1)
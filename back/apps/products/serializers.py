@@ -184,6 +184,9 @@ class ProductRedemptionSerializer(serializers.ModelSerializer):
     def get_employee_enterprise_name(self, obj):
         if not obj.employee:
             return None
+        employer = obj.employee.employer if obj.employee.employer_id else None
+        if employer:
+            return employer.enterprise or employer.username
         return obj.employee.enterprise or obj.employee.username
 
     def get_enterprise_name(self, obj):
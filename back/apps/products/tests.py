@@ -1,3 +1,486 @@
-from django.test import TestCase
+import csv
+import datetime
+import io
+import json
+import zipfile
+from unittest import mock
+from urllib.parse import parse_qs, urlparse
 
-# Create your tests here.
+from django.core.cache import cache
+from django.db import connection
+from django.db.models import Count
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.exceptions import NotFound
+from rest_framework.request import Request
+from rest_framework.test import APIClient, APIRequestFactory
+
+from apps.user.models import UserAccount
+from core.utils.cache import get_cache_version
+from core.utils.pagination import _count_namespace
+from core.utils.search import ranked
+from .models import Product, ProductRedemption, ProductRedemptionDaily, ProductViewLog, product_search_index
+from .serializers import ProductRedemptionSerializer, ProductSerializer
+from .utils.pagination import SmallSetPagination
+from .utils.rollup import rebuild_redemption_rollup
+from .utils.view_buffer import flush_product_views, pending_product_views, record_product_view
+
+
+class ProductListPaginationTests(TestCase):
+    def setUp(self):
+        # Los conteos de paginacion se cachean entre peticiones.
+        cache.clear()
+        self.enterprise = UserAccount.objects.create(
+            email="empresa@example.com",
+            username="empresa",
+            role="enterprise",
+            enterprise="Empresa",
+        )
+        Product.objects.bulk_create(
+            [Product(user=self.enterprise, name=f"Beneficio {index}") for index in range(25)]
+        )
+        self.client = APIClient()
+
+    def _get_page(self, user, page):
+        self.client.force_authenticate(user)
+        original = ProductSerializer.to_representation
+        with mock.patch.object(
+            ProductSerializer, "to_representation", autospec=True, side_effect=original
+        ) as to_representation:
+            response = self.client.get("/api/product/list/", {"p": page})
+        return response, to_representation.call_count
+
+    def test_enterprise_list_serializes_only_the_requested_page(self):
+        response, serialized = self._get_page(self.enterprise, 1)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["count"], 25)
+        self.assertEqual(len(response.data["results"]["products"]), 10)
+        self.assertEqual(serialized, 10)
+
+        response, serialized = self._get_page(self.enterprise, 3)
+        self.assertEqual(len(response.data["results"]["products"]), 5)
+        self.assertEqual(serialized, 5)
+
+    def test_admin_list_uses_annotated_redemptions_count(self):
+        admin = UserAccount.objects.create(email="admin@example.com", username="admin", role="Admin")
+        self.client.force_authenticate(admin)
+
+        # Conteo + pagina, sin una consulta de canjes por fila.
+        with self.assertNumQueries(2):
+            response = self.client.get("/api/product/list/")
+
+        self.assertEqual(len(response.data["results"]["products"]), 10)
+        self.assertEqual(response.data["results"]["products"][0]["redemptions_count"], 0)
+
+
+class CountModeTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.enterprise = UserAccount.objects.create(
+            email="empresa@example.com",
+            username="empresa",
+            role="enterprise",
+            enterprise="Empresa",
+        )
+        self.product = Product.objects.create(user=self.enterprise, name="Beneficio")
+        Product.objects.bulk_create(
+            [Product(user=self.enterprise, name=f"Beneficio {index}") for index in range(24)]
+        )
+        self.employee = UserAccount.objects.create(email="empleado@example.com", username="empleado", role="employees")
+        self.client = APIClient()
+
+    def test_count_false_reports_has_next_and_404_past_the_end(self):
+        self.client.force_authenticate(self.enterprise)
+        with self.assertNumQueries(1):
+            response = self.client.get("/api/product/list/", {"count": "false"})
+        self.assertIsNone(response.data["count"])
+        self.assertTrue(response.data["has_next"])
+        self.assertIsNone(response.data["previous"])
+
+        response = self.client.get("/api/product/list/", {"count": "false", "p": 3})
+        self.assertFalse(response.data["has_next"])
+        self.assertIsNone(response.data["next"])
+        self.assertEqual(len(response.data["results"]["products"]), 5)
+
+        response = self.client.get("/api/product/list/", {"count": "false", "p": 4})
+        self.assertEqual(response.status_code, 404)
+
+    def test_lists_without_count_cache_are_exact(self):
+        self.client.force_authenticate(self.enterprise)
+        self.assertEqual(self.client.get("/api/product/list/").data["count"], 25)
+        Product.objects.create(user=self.enterprise, name="Nuevo")
+        self.assertEqual(self.client.get("/api/product/list/").data["count"], 26)
+
+    def test_cached_count_is_reused_and_invalidated_by_writes(self):
+        self.client.force_authenticate(self.employee)
+        url = "/api/employee/benefits/redemptions/"
+        self.client.post(f"/api/product/{self.product.pk}/redeem/")
+        self.assertEqual(self.client.get(url).data["count"], 1)
+        with self.assertNumQueries(1):
+            # Solo la pagina: el conteo sale del cache.
+            self.assertEqual(self.client.get(url).data["count"], 1)
+
+        other = Product.objects.exclude(pk=self.product.pk).first()
+        self.client.post(f"/api/product/{other.pk}/redeem/")
+        self.assertEqual(self.client.get(url).data["count"], 2)
+
+        ProductRedemption.objects.filter(product=other).delete()
+        self.assertEqual(self.client.get(url).data["count"], 1)
+
+    def test_count_versions_only_move_for_tracked_writes(self):
+        redemptions = _count_namespace(ProductRedemption)
+        accounts = _count_namespace(UserAccount)
+        before = get_cache_version(redemptions), get_cache_version(accounts)
+
+        # Modelos sin conteo cacheado y logins no tocan ninguna version.
+        Product.objects.create(user=self.enterprise, name="Otro")
+        self.employee.last_login = timezone.now()
+        self.employee.save(update_fields=["last_login"])
+        self.assertEqual((get_cache_version(redemptions), get_cache_version(accounts)), before)
+
+        self.employee.username = "empleado-2"
+        self.employee.save(update_fields=["username"])
+        self.assertNotEqual(get_cache_version(accounts), before[1])
+
+        ProductRedemption.objects.create(product=self.product, employee=self.employee, enterprise=self.enterprise)
+        self.assertNotEqual(get_cache_version(redemptions), before[0])
+
+
+class CursorPaginationTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.enterprise = UserAccount.objects.create(
+            email="empresa@example.com",
+            username="empresa",
+            role="enterprise",
+            enterprise="Empresa",
+        )
+        Product.objects.bulk_create(
+            [Product(user=self.enterprise, name=f"Beneficio {index}") for index in range(23)]
+        )
+        # Grupos de tres con la misma fecha (empates que cruzan el limite de pagina) y
+        # cinco sin fecha (columna nula) repartidos entre las dos ultimas paginas.
+        base = datetime.datetime(2025, 1, 1, tzinfo=datetime.timezone.utc)
+        for index, pk in enumerate(Product.objects.order_by("name").values_list("pk", flat=True)):
+            created = None if index >= 18 else base + datetime.timedelta(days=index // 3)
+            Product.objects.filter(pk=pk).update(created=created)
+        self.factory = APIRequestFactory()
+
+    def _page(self, queryset, params):
+        request = Request(self.factory.get("/api/product/list/", params))
+        paginator = SmallSetPagination()
+        rows = paginator.paginate_queryset(queryset, request)
+        return [row.pk for row in rows], paginator.get_paginated_response([]).data
+
+    def _cursor(self, link):
+        return parse_qs(urlparse(link).query)["cursor"][0]
+
+    def _walk(self, queryset):
+        pages = []
+        ids, data = self._page(queryset, {"cursor": ""})
+        pages.append(ids)
+        self.assertIsNone(data["count"])
+        self.assertIsNone(data["previous"])
+        while data["next"]:
+            ids, data = self._page(queryset, {"cursor": self._cursor(data["next"])})
+            pages.append(ids)
+        backward = [ids]
+        while data["previous"]:
+            ids, data = self._page(queryset, {"cursor": self._cursor(data["previous"])})
+            backward.append(ids)
+        return pages, backward[::-1]
+
+    def test_cursor_walks_ties_and_nulls_without_gaps(self):
+        for ordering in ("-created", "created"):
+            queryset = Product.objects.order_by(ordering)
+            pages, backward = self._walk(queryset)
+            forward = [pk for ids in pages for pk in ids]
+            self.assertEqual(len(forward), 23)
+            self.assertEqual(len(set(forward)), 23)
+            self.assertEqual(backward, pages)
+            created = [Product.objects.get(pk=pk).created for pk in forward]
+            # Nulos al final en ambos sentidos.
+            self.assertTrue(all(value is None for value in created[18:]))
+            dated = created[:18]
+            self.assertEqual(dated, sorted(dated, reverse=ordering.startswith("-")))
+
+    def test_invalid_cursor_is_not_found(self):
+        queryset = Product.objects.order_by("-created")
+        for cursor in ("no-es-un-cursor", "eyJ2IjpbMV0sInIiOjB9"):
+            with self.assertRaises(NotFound):
+                self._page(queryset, {"cursor": cursor})
+
+    def test_cursor_falls_back_to_pages_for_computed_orderings(self):
+        # bulk_create no pasa por save(): se indexan los documentos a mano.
+        product_search_index.refresh_documents()
+        annotated = Product.objects.annotate(redemptions_count=Count("redemptions")).order_by("-redemptions_count")
+        searched = ranked(product_search_index.search(Product.objects.all(), "beneficio"), "-created")
+        for queryset in (annotated, searched):
+            ids, data = self._page(queryset, {"cursor": ""})
+            self.assertEqual(data["count"], 23)
+            self.assertEqual(len(ids), 10)
+
+
+class ProductSearchTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        enterprise = UserAccount.objects.create(email="empresa@example.com", username="empresa", role="enterprise")
+        Product.objects.create(user=enterprise, name="Cafe", description="Cafe y pan de cafe")
+        Product.objects.create(user=enterprise, name="Desayuno", description="Incluye cafe")
+        Product.objects.create(user=enterprise, name="Gimnasio")
+        self.employee = UserAccount.objects.create(email="empleado@example.com", username="empleado", role="employees")
+        self.client = APIClient()
+
+    def test_search_ranks_matches_with_grouped_queryset(self):
+        self.client.force_authenticate(self.employee)
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get("/api/employee/benefits/", {"search": "cafes"})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([item["name"] for item in response.data["results"]], ["Cafe", "Desayuno"])
+        if connection.vendor == "sqlite":
+            # MATCH una vez por consulta (JOIN), no una subconsulta por fila candidata.
+            page_sql = queries.captured_queries[-1]["sql"]
+            self.assertEqual(page_sql.count("MATCH"), 1)
+
+    def test_index_follows_enterprise_rename_and_delete(self):
+        enterprise = UserAccount.objects.get(username="empresa")
+        enterprise.enterprise = "Panaderia Central"
+        enterprise.save()
+        self.client.force_authenticate(self.employee)
+        response = self.client.get("/api/employee/benefits/", {"search": "panaderia"})
+        self.assertEqual(len(response.data["results"]), 3)
+
+        Product.objects.filter(name="Gimnasio").delete()
+        response = self.client.get("/api/employee/benefits/", {"search": "panaderia"})
+        self.assertEqual(len(response.data["results"]), 2)
+
+
+class ProductViewBufferTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        enterprise = UserAccount.objects.create(email="empresa@example.com", username="empresa", role="enterprise")
+        self.products = [Product.objects.create(user=enterprise, name=f"Beneficio {index}") for index in range(2)]
+        self.employees = [
+            UserAccount.objects.create(email=f"empleado{index}@example.com", username=f"empleado{index}", role="employees")
+            for index in range(3)
+        ]
+
+    def _views(self):
+        return sorted(Product.objects.filter(pk__in=[product.pk for product in self.products]).values_list("name", "views"))
+
+    def test_without_redis_views_are_written_directly(self):
+        product, employee = self.products[0], self.employees[0]
+        # get_or_create (SELECT + INSERT en savepoint) y el UPDATE de views, como antes del buffer.
+        with self.assertNumQueries(5):
+            self.assertTrue(record_product_view(product.pk, employee.pk))
+        self.assertFalse(record_product_view(product.pk, employee.pk))
+        self.assertEqual(ProductViewLog.objects.count(), 1)
+        self.assertEqual(self._views(), [("Beneficio 0", 1), ("Beneficio 1", 0)])
+
+    @override_settings(REDIS_URL="redis://buffer-de-prueba")
+    def test_buffered_views_flush_in_batches(self):
+        with self.assertNumQueries(0):
+            for employee in self.employees:
+                for product in self.products:
+                    record_product_view(product.pk, employee.pk)
+                # Un segundo toque del mismo par no se encola.
+                self.assertFalse(record_product_view(self.products[0].pk, employee.pk))
+        self.assertEqual(pending_product_views(), 6)
+
+        # Ya registrado antes de volcar: no se cuenta dos veces.
+        ProductViewLog.objects.create(product=self.products[1], viewer=self.employees[0])
+        self.assertEqual(flush_product_views(batch_size=4), (6, 5))
+        self.assertEqual(pending_product_views(), 0)
+        self.assertEqual(ProductViewLog.objects.count(), 6)
+        self.assertEqual(self._views(), [("Beneficio 0", 3), ("Beneficio 1", 2)])
+        self.assertEqual(flush_product_views(), (0, 0))
+
+
+class ProductRedeemTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.enterprise = UserAccount.objects.create(
+            email="empresa@example.com",
+            username="empresa",
+            role="enterprise",
+            enterprise="Empresa",
+        )
+        self.employee = UserAccount.objects.create(email="empleado@example.com", username="empleado", role="employees")
+        self.product = Product.objects.create(user=self.enterprise, name="Beneficio")
+        self.client = APIClient()
+        self.client.force_authenticate(self.employee)
+        self.url = f"/api/product/{self.product.pk}/redeem/"
+
+    def test_redemptions_list_streams_ndjson(self):
+        self.client.post(self.url)
+        response = self.client.get("/api/employee/benefits/redemptions/", {"stream": "ndjson"})
+        self.assertEqual(response["Content-Type"], "application/x-ndjson")
+        lines = b"".join(response.streaming_content).decode("utf-8").splitlines()
+        self.assertEqual([json.loads(line)["product_name"] for line in lines], ["Beneficio"])
+
+        response = self.client.get("/api/employee/benefits/redemptions/")
+        self.assertEqual(response.data["count"], 1)
+        self.assertEqual(len(response.data["results"]), 1)
+
+    def test_redeem_once_per_day_with_snapshots(self):
+        # Canje y conteo diario en una transaccion (savepoint dentro del test).
+        with self.assertNumQueries(4):
+            response = self.client.post(self.url)
+        self.assertEqual(response.status_code, 201)
+
+        redemption = ProductRedemption.objects.get()
+        self.assertEqual(redemption.enterprise_id, self.enterprise.pk)
+        self.assertEqual(redemption.product_id_snapshot, self.product.pk)
+        self.assertEqual(redemption.product_name_snapshot, "Beneficio")
+        self.assertEqual(redemption.enterprise_name_snapshot, "Empresa")
+
+        # El toque repetido se responde desde el cache.
+        with self.assertNumQueries(0):
+            response = self.client.post(self.url)
+        self.assertEqual(response.status_code, 200)
+
+        # Sin cache, la restriccion unica evita el duplicado.
+        cache.clear()
+        response = self.client.post(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(ProductRedemption.objects.count(), 1)
+
+    def test_inactive_enterprise_benefit_is_not_found(self):
+        UserAccount.objects.filter(pk=self.enterprise.pk).update(is_active=False)
+        response = self.client.post(self.url)
+        self.assertEqual(response.status_code, 404)
+        self.assertFalse(ProductRedemption.objects.exists())
+
+
+class RedemptionRollupTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.enterprise = UserAccount.objects.create(
+            email="empresa@example.com",
+            username="empresa",
+            role="enterprise",
+            enterprise="Empresa",
+        )
+        self.admin = UserAccount.objects.create(email="admin@example.com", username="admin", role="Admin")
+        self.employees = [
+            UserAccount.objects.create(email=f"empleado{index}@example.com", username=f"empleado{index}", role="employees")
+            for index in range(3)
+        ]
+        self.product = Product.objects.create(user=self.enterprise, name="Beneficio")
+        self.client = APIClient()
+
+    def _rollup(self):
+        return sorted(ProductRedemptionDaily.objects.filter(total__gt=0).values_list("date", "product_key", "total"))
+
+    def test_rollup_matches_rebuild_and_feeds_report(self):
+        for employee in self.employees:
+            self.client.force_authenticate(employee)
+            self.client.post(f"/api/product/{self.product.pk}/redeem/")
+        for day in (1, 2):
+            ProductRedemption.objects.create(
+                product=self.product,
+                employee=self.employees[0],
+                enterprise=self.enterprise,
+                redeemed_date=datetime.date(2025, 3, day),
+            )
+        ProductRedemption.objects.filter(redeemed_date=datetime.date(2025, 3, 2)).delete()
+
+        incremental = self._rollup()
+        rebuild_redemption_rollup()
+        self.assertEqual(incremental, self._rollup())
+
+        self.client.force_authenticate(self.admin)
+        response = self.client.get("/api/admin/benefits/redemptions/", {"month": "2025-03"})
+        report = response.data["results"]
+        self.assertEqual(report["meta"]["total_redemptions"], 1)
+        self.assertEqual(report["by_month"], [{"month": "2025-03", "total": 1}])
+        self.assertEqual(report["by_enterprise"][0]["total"], 1)
+
+    def test_report_pages_redemptions_and_lists_enterprises_with_redemptions(self):
+        other = UserAccount.objects.create(email="otra@example.com", username="otra", role="enterprise")
+        removed = ProductRedemption.objects.create(
+            product=Product.objects.create(user=other, name="Otro"),
+            employee=self.employees[0],
+            enterprise=other,
+        )
+        removed.delete()
+        ProductRedemption.objects.bulk_create(
+            [
+                ProductRedemption(
+                    product=self.product,
+                    employee=self.employees[0],
+                    enterprise=self.enterprise,
+                    redeemed_date=datetime.date(2025, 1, 1) + datetime.timedelta(days=index),
+                )
+                for index in range(30)
+            ]
+        )
+        rebuild_redemption_rollup()
+        # La fila en cero de la otra empresa sigue en la tabla por dia.
+        ProductRedemptionDaily.objects.create(date=datetime.date(2025, 1, 1), enterprise=other, product_key=removed.product_id)
+
+        self.client.force_authenticate(self.admin)
+        original = ProductRedemptionSerializer.to_representation
+        with mock.patch.object(
+            ProductRedemptionSerializer, "to_representation", autospec=True, side_effect=original
+        ) as to_representation:
+            response = self.client.get("/api/admin/benefits/redemptions/", {"p": 2})
+        self.assertEqual(response.data["count"], 30)
+        self.assertEqual(len(response.data["results"]["redemptions"]), 5)
+        self.assertEqual(to_representation.call_count, 5)
+        self.assertEqual(response.data["results"]["meta"]["total_redemptions"], 30)
+        self.assertEqual(
+            [item["enterprise"] for item in response.data["results"]["enterprises"]], [self.enterprise.pk]
+        )
+
+        self.client.force_authenticate(self.enterprise)
+        response = self.client.get("/api/enterprise/benefits/redemptions/", {"page_size": 500})
+        self.assertEqual(len(response.data["results"]["redemptions"]), 30)
+        self.assertIsNone(response.data["next"])
+        self.assertEqual(
+            [(row["product_name"], row["total"]) for row in response.data["results"]["by_product"]],
+            [(self.product.name, 30)],
+        )
+
+    def test_report_exports_stream_csv_and_xlsx(self):
+        for employee in self.employees:
+            self.client.force_authenticate(employee)
+            self.client.post(f"/api/product/{self.product.pk}/redeem/")
+
+        self.client.force_authenticate(self.admin)
+        response = self.client.get("/api/admin/benefits/redemptions/", {"format": "csv"})
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        rows = list(csv.reader(io.StringIO(b"".join(response.streaming_content).decode("utf-8-sig"))))
+        self.assertEqual(len(rows), len(self.employees) + 1)
+        self.assertEqual(rows[1][2], "Beneficio")
+
+        self.client.force_authenticate(self.enterprise)
+        response = self.client.get("/api/enterprise/benefits/redemptions/", {"format": "xlsx"})
+        self.assertEqual(response.status_code, 200)
+        with zipfile.ZipFile(io.BytesIO(b"".join(response.streaming_content))) as workbook:
+            self.assertIsNone(workbook.testzip())
+            self.assertEqual(workbook.read("xl/worksheets/sheet1.xml").count(b"<row>"), len(self.employees) + 1)
+
+        self.client.force_authenticate(self.employees[0])
+        response = self.client.get("/api/admin/benefits/redemptions/", {"format": "csv"})
+        self.assertEqual(response.status_code, 403)
+
+    def test_report_exports_neutralize_formulas(self):
+        self.product.name = '=HYPERLINK("http://example.com","x")'
+        self.product.save()
+        self.client.force_authenticate(self.employees[0])
+        self.client.post(f"/api/product/{self.product.pk}/redeem/")
+
+        self.client.force_authenticate(self.admin)
+        response = self.client.get("/api/admin/benefits/redemptions/", {"format": "csv"})
+        rows = list(csv.reader(io.StringIO(b"".join(response.streaming_content).decode("utf-8-sig"))))
+        self.assertEqual(rows[1][2], "'" + self.product.name)
+
+        response = self.client.get("/api/admin/benefits/redemptions/", {"format": "xlsx"})
+        with zipfile.ZipFile(io.BytesIO(b"".join(response.streaming_content))) as workbook:
+            sheet = workbook.read("xl/worksheets/sheet1.xml").decode("utf-8")
+        self.assertIn("<t xml:space=\"preserve\">'=HYPERLINK(", sheet)
+        self.assertNotIn("<t xml:space=\"preserve\">=", sheet)
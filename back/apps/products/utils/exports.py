@@ -0,0 +1,44 @@
+from django.db.models import Value
+from django.db.models.functions import Coalesce, NullIf
+
+from core.utils.exports import export_response
+
+EXPORT_CHUNK_SIZE = 2000
+REDEMPTION_EXPORT_HEADER = [
+    "Fecha y hora",
+    "Fecha",
+    "Beneficio",
+    "Empresa",
+    "Nombre",
+    "Apellido",
+    "Correo",
+    "Empresa del empleado",
+]
+
+
+def _name(*fields):
+    # Primer nombre no vacio, como "enterprise or username" en los serializers.
+    return Coalesce(*(NullIf(field, Value("")) for field in fields), Value(""))
+
+
+def redemptions_export_response(fmt, redemptions, filename):
+    """
+    Exporta el queryset de canjes ya filtrado y ordenado: solo columnas planas con
+    values_list().iterator(), sin instanciar modelos ni serializers.
+    """
+    rows = redemptions.values_list(
+        "redeemed_at",
+        "redeemed_date",
+        _name("product__name", "product_name_snapshot"),
+        _name("enterprise__enterprise", "enterprise__username", "enterprise_name_snapshot"),
+        "employee__first_name",
+        "employee__last_name",
+        "employee__email",
+        _name(
+            "employee__employer__enterprise",
+            "employee__employer__username",
+            "employee__enterprise",
+            "employee__username",
+        ),
+    ).iterator(chunk_size=EXPORT_CHUNK_SIZE)
+    return export_response(fmt, filename, REDEMPTION_EXPORT_HEADER, rows, sheet_name="Canjes")
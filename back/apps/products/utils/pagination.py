@@ -1,28 +1,35 @@
-from rest_framework.pagination import PageNumberPagination
+from core.utils.pagination import CursorPageNumberPagination
 
 
-class ProductSetPagination(PageNumberPagination):
+class ProductSetPagination(CursorPageNumberPagination):
     page_query_param = 'p'
     page_size = 10
     page_size_query_param = 'page_size'
     max_page_size = 10
 
-class SmallSetPagination(PageNumberPagination):
+class SmallSetPagination(CursorPageNumberPagination):
     page_query_param = 'p'
     page_size = 10
     page_size_query_param = 'page_size'
     max_page_size = 10
 
 
-class MediumSetPagination(PageNumberPagination):
+class MediumSetPagination(CursorPageNumberPagination):
     page_query_param = 'p'
     page_size = 9
     page_size_query_param = 'page_size'
     max_page_size = 9
 
 
-class LargeSetPagination(PageNumberPagination):
+class LargeSetPagination(CursorPageNumberPagination):
     page_query_param = 'p'
     page_size = 18
     page_size_query_param = 'page_size'
-    max_page_size = 18
\ No newline at end of file
+    max_page_size = 18
+
+class ReportSetPagination(CursorPageNumberPagination):
+    # Detalle de los reportes de canjes; la exportacion PDF pide paginas de hasta 500.
+    page_query_param = 'p'
+    page_size = 25
+    page_size_query_param = 'page_size'
+    max_page_size = 500
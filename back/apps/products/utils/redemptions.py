@@ -0,0 +1,114 @@
+from datetime import datetime, time, timedelta
+
+from django.core.cache import cache
+from django.db import connection, transaction
+from django.utils import timezone
+
+from core.utils.pagination import invalidate_cached_counts
+
+from .rollup import add_product_redemption_to_rollup
+
+REDEEMED_CACHE_PREFIX = "benefit-redeemed"
+REDEEM_CREATED = "created"
+REDEEM_DUPLICATE = "duplicate"
+REDEEM_NOT_FOUND = "not_found"
+
+
+def _redeemed_key(day, employee_id, product_id):
+    return f"{REDEEMED_CACHE_PREFIX}:{day.isoformat()}:{employee_id}:{product_id}"
+
+
+def _seconds_until_tomorrow(day):
+    tomorrow = timezone.make_aware(datetime.combine(day + timedelta(days=1), time.min))
+    return max(int((tomorrow - timezone.now()).total_seconds()) + 60, 60)
+
+
+def mark_redeemed(day, employee_id, product_id):
+    cache.set(_redeemed_key(day, employee_id, product_id), 1, timeout=_seconds_until_tomorrow(day))
+
+
+def _insert_redemption_sql():
+    """
+    INSERT ... SELECT que toma los snapshots del beneficio y su empresa en la misma
+    sentencia; la restriccion unica (product, employee, redeemed_date) resuelve los
+    canjes repetidos con ON CONFLICT DO NOTHING (SQLite >= 3.24 y Postgres).
+    """
+    from apps.user.models import UserAccount
+    from ..models import Product, ProductRedemption
+
+    quote = connection.ops.quote_name
+    redemption = ProductRedemption._meta
+    product = Product._meta
+    account = UserAccount._meta
+
+    def column(meta, name):
+        return quote(meta.get_field(name).column)
+
+    insert_columns = ", ".join(
+        column(redemption, name)
+        for name in (
+            "id",
+            "product",
+            "employee",
+            "enterprise",
+            "product_id_snapshot",
+            "product_name_snapshot",
+            "enterprise_name_snapshot",
+            "redeemed_date",
+            "redeemed_at",
+        )
+    )
+    conflict_columns = ", ".join(column(redemption, name) for name in ("product", "employee", "redeemed_date"))
+    return (
+        f"INSERT INTO {quote(redemption.db_table)} ({insert_columns}) "
+        f"SELECT %s, p.{column(product, 'id')}, %s, p.{column(product, 'user')}, p.{column(product, 'id')}, "
+        f"p.{column(product, 'name')}, "
+        f"COALESCE(NULLIF(u.{column(account, 'enterprise')}, ''), u.{column(account, 'username')}, ''), %s, %s "
+        f"FROM {quote(product.db_table)} p "
+        f"INNER JOIN {quote(account.db_table)} u ON u.{column(account, 'id')} = p.{column(product, 'user')} "
+        f"WHERE p.{column(product, 'id')} = %s AND u.{column(account, 'role')} = %s "
+        f"AND u.{column(account, 'is_active')} = %s "
+        f"ON CONFLICT ({conflict_columns}) DO NOTHING"
+    )
+
+
+def redeem_product(product_id, employee, today=None):
+    """
+    Canjea el beneficio para el empleado en el dia. Un toque repetido se responde desde
+    el cache sin consultar la base de datos; el canje nuevo es un solo INSERT.
+    Retorna REDEEM_CREATED, REDEEM_DUPLICATE o REDEEM_NOT_FOUND.
+    """
+    from apps.user.models import UserAccount
+    from ..models import ProductRedemption
+
+    today = today or timezone.localdate()
+    if cache.get(_redeemed_key(today, employee.pk, product_id)) is not None:
+        return REDEEM_DUPLICATE
+
+    fields = ProductRedemption._meta
+    params = [
+        fields.pk.get_db_prep_value(fields.pk.get_default(), connection),
+        UserAccount._meta.pk.get_db_prep_value(employee.pk, connection),
+        fields.get_field("redeemed_date").get_db_prep_value(today, connection),
+        fields.get_field("redeemed_at").get_db_prep_value(timezone.now(), connection),
+        fields.get_field("product_id_snapshot").get_db_prep_value(product_id, connection),
+        "enterprise",
+        True,
+    ]
+    with transaction.atomic():
+        with connection.cursor() as cursor:
+            cursor.execute(_insert_redemption_sql(), params)
+            created = cursor.rowcount == 1
+        if created:
+            # El INSERT directo no emite post_save: el conteo diario se suma aqui.
+            add_product_redemption_to_rollup(today, product_id)
+
+    if created:
+        mark_redeemed(today, employee.pk, product_id)
+        invalidate_cached_counts(ProductRedemption)
+        return REDEEM_CREATED
+    # Sin fila insertada: ya existia el canje del dia o el beneficio no esta disponible.
+    if ProductRedemption.objects.filter(product_id=product_id, employee=employee, redeemed_date=today).exists():
+        mark_redeemed(today, employee.pk, product_id)
+        return REDEEM_DUPLICATE
+    return REDEEM_NOT_FOUND
@@ -0,0 +1,161 @@
+import uuid
+from datetime import date
+
+from django.db import connection, transaction
+from django.db.models import Count, F, Sum
+from django.db.models.functions import Coalesce, TruncMonth
+
+# Canjes historicos sin beneficio ni snapshot se agrupan bajo esta llave.
+UNKNOWN_PRODUCT_KEY = uuid.UUID(int=0)
+REPORT_ENTERPRISE_FIELDS = ("enterprise", "enterprise__enterprise", "enterprise__username")
+
+
+def redemption_product_key(redemption):
+    return redemption.product_id_snapshot or redemption.product_id or UNKNOWN_PRODUCT_KEY
+
+
+def month_bounds(value):
+    """
+    "YYYY-MM" -> (primer dia, primer dia del mes siguiente), o None si no es valido.
+    Como rango sobre la fecha usa el indice, a diferencia de __year/__month.
+    """
+    try:
+        year, month = (int(part) for part in (value or "").split("-"))
+        start = date(year, month, 1)
+    except (TypeError, ValueError):
+        return None
+    end = date(year + 1, 1, 1) if month == 12 else date(year, month + 1, 1)
+    return start, end
+
+
+def _upsert_sql(source):
+    from ..models import ProductRedemptionDaily
+
+    quote = connection.ops.quote_name
+    meta = ProductRedemptionDaily._meta
+    table = quote(meta.db_table)
+    columns = [quote(meta.get_field(name).column) for name in ("id", "date", "enterprise", "product_key", "total")]
+    total = columns[-1]
+    return (
+        f"INSERT INTO {table} ({', '.join(columns)}) {source} "
+        f"ON CONFLICT ({', '.join(columns[1:4])}) DO UPDATE SET {total} = {table}.{total} + excluded.{total}"
+    )
+
+
+def _prep(field_name, value):
+    from ..models import ProductRedemptionDaily
+
+    field = ProductRedemptionDaily._meta.get_field(field_name)
+    return field.get_db_prep_value(value, connection)
+
+
+def add_to_redemption_rollup(day, enterprise_id, product_key, delta):
+    """
+    Suma delta al contador del dia en una sola sentencia (INSERT ... ON CONFLICT DO UPDATE).
+    """
+    from ..models import ProductRedemptionDaily
+
+    if delta < 0:
+        ProductRedemptionDaily.objects.filter(
+            date=day, enterprise_id=enterprise_id, product_key=product_key, total__gte=-delta
+        ).update(total=F("total") + delta)
+        return
+    params = [
+        _prep("id", uuid.uuid4()),
+        _prep("date", day),
+        _prep("enterprise", enterprise_id),
+        _prep("product_key", product_key),
+        delta,
+    ]
+    with connection.cursor() as cursor:
+        cursor.execute(_upsert_sql("VALUES (%s, %s, %s, %s, %s)"), params)
+
+
+def add_product_redemption_to_rollup(day, product_id):
+    """
+    Variante para el canje rapido: la empresa se toma del beneficio en la misma sentencia.
+    """
+    from ..models import Product
+
+    quote = connection.ops.quote_name
+    meta = Product._meta
+    source = (
+        f"SELECT %s, %s, {quote(meta.get_field('user').column)}, {quote(meta.pk.column)}, 1 "
+        f"FROM {quote(meta.db_table)} WHERE {quote(meta.pk.column)} = %s"
+    )
+    params = [_prep("id", uuid.uuid4()), _prep("date", day), _prep("product_key", product_id)]
+    with connection.cursor() as cursor:
+        cursor.execute(_upsert_sql(source), params)
+
+
+def rebuild_redemption_rollup(since=None, chunk_size=1000):
+    """
+    Recalcula la tabla de canjes por dia desde ProductRedemption (desde la fecha dada o
+    completa). Retorna las filas escritas.
+    """
+    from ..models import ProductRedemption, ProductRedemptionDaily
+
+    redemptions = ProductRedemption.objects.all()
+    rollup = ProductRedemptionDaily.objects.all()
+    if since:
+        redemptions = redemptions.filter(redeemed_date__gte=since)
+        rollup = rollup.filter(date__gte=since)
+    rows = (
+        redemptions.order_by()
+        .values("redeemed_date", "enterprise_id", key=Coalesce("product_id_snapshot", "product"))
+        .annotate(total=Count("id"))
+    )
+    with transaction.atomic():
+        rollup.delete()
+        written = 0
+        batch = []
+        for row in rows.iterator(chunk_size=chunk_size):
+            batch.append(
+                ProductRedemptionDaily(
+                    date=row["redeemed_date"],
+                    enterprise_id=row["enterprise_id"],
+                    product_key=row["key"] or UNKNOWN_PRODUCT_KEY,
+                    total=row["total"],
+                )
+            )
+            if len(batch) >= chunk_size:
+                ProductRedemptionDaily.objects.bulk_create(batch)
+                written += len(batch)
+                batch = []
+        if batch:
+            ProductRedemptionDaily.objects.bulk_create(batch)
+            written += len(batch)
+    return written
+
+
+def redemption_summary(enterprise_id=None, period=None, searched=None):
+    """
+    Totales del reporte: {"total", "by_enterprise", "by_month"}. Sin busqueda de texto se
+    leen de la tabla por dia; con busqueda (nombres de empleados, etc.) se agregan sobre
+    el queryset de canjes ya filtrado que se recibe en searched.
+    """
+    from ..models import ProductRedemptionDaily
+
+    if searched is not None:
+        source, date_field, total = searched.order_by(), "redeemed_date", Count("id")
+    else:
+        source = ProductRedemptionDaily.objects.filter(total__gt=0)
+        if enterprise_id:
+            source = source.filter(enterprise_id=enterprise_id)
+        if period:
+            source = source.filter(date__gte=period[0], date__lt=period[1])
+        date_field, total = "date", Sum("total")
+
+    by_enterprise = list(
+        source.values(*REPORT_ENTERPRISE_FIELDS).annotate(total=total).order_by("-total")
+    )
+    by_month = [
+        {"month": row["month"].strftime("%Y-%m"), "total": row["total"]}
+        for row in source.annotate(month=TruncMonth(date_field)).values("month").annotate(total=total).order_by("month")
+        if row["month"] is not None
+    ]
+    return {
+        "total": sum(row["total"] for row in by_enterprise),
+        "by_enterprise": by_enterprise,
+        "by_month": by_month,
+    }
@@ -0,0 +1,151 @@
+from collections import Counter
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Case, F, IntegerField, Value, When
+from django.utils import timezone
+
+# Buffer de visualizaciones en el cache: cada evento ocupa una ranura numerada
+# (product-view:event:<n>) y "tail" es la ultima ranura asignada; "head" la ultima
+# volcada a la base de datos. Solo usa add/incr/get_many, asi funciona igual con Redis
+# que con LocMemCache.
+VIEW_BUFFER_PREFIX = "product-view"
+VIEW_EVENT_TIMEOUT = 60 * 60 * 24 * 7
+# Un empleado que ya vio el beneficio no vuelve a encolar eventos en este plazo.
+VIEW_SEEN_TIMEOUT = 60 * 60 * 24
+VIEW_FLUSH_BATCH_SIZE = 1000
+VIEW_FLUSH_LOCK_TIMEOUT = 60 * 5
+# Ranuras recien asignadas cuyo evento puede no haberse escrito aun.
+VIEW_IN_FLIGHT_SLOTS = 100
+
+
+def _key(*parts):
+    return ":".join([VIEW_BUFFER_PREFIX, *map(str, parts)])
+
+
+def _counter(name):
+    value = cache.get(_key(name))
+    return int(value) if value is not None else 0
+
+
+def record_product_view(product_id, viewer_id, viewed_at=None):
+    """
+    Con Redis encola la visualizacion sin escribir en la base de datos; sin Redis la
+    registra directo. Retorna False si el par (beneficio, empleado) ya estaba en el
+    buffer, se vio recientemente o ya estaba registrado.
+    """
+    if not cache.add(_key("seen", product_id, viewer_id), 1, timeout=VIEW_SEEN_TIMEOUT):
+        return False
+    if not getattr(settings, "REDIS_URL", None):
+        # Sin Redis el cache es local al proceso y el comando de volcado no lo veria: se
+        # escribe directo, con el mismo get_or_create + F() de siempre.
+        return _persist_one(product_id, viewer_id, viewed_at)
+    event = (str(product_id), str(viewer_id), viewed_at or timezone.now())
+    cache.add(_key("tail"), 0, timeout=None)
+    slot = cache.incr(_key("tail"))
+    cache.set(_key("event", slot), event, timeout=VIEW_EVENT_TIMEOUT)
+    return True
+
+
+def _persist_one(product_id, viewer_id, viewed_at=None):
+    from ..models import Product, ProductViewLog
+
+    defaults = {"viewed_at": viewed_at} if viewed_at else {}
+    _, created = ProductViewLog.objects.get_or_create(product_id=product_id, viewer_id=viewer_id, defaults=defaults)
+    if created:
+        Product.objects.filter(pk=product_id).update(views=F("views") + 1)
+    return created
+
+
+def pending_product_views():
+    return max(_counter("tail") - _counter("head"), 0)
+
+
+def _persist(events):
+    from ..models import Product, ProductViewLog
+    from apps.user.models import UserAccount
+
+    # Un beneficio o empleado pudo borrarse mientras el evento esperaba en el buffer.
+    product_ids = {
+        str(pk)
+        for pk in Product.objects.filter(pk__in={product_id for product_id, _, _ in events}).values_list("pk", flat=True)
+    }
+    viewer_ids = {
+        str(pk)
+        for pk in UserAccount.objects.filter(pk__in={viewer_id for _, viewer_id, _ in events}).values_list("pk", flat=True)
+    }
+    candidates = {}
+    for product_id, viewer_id, viewed_at in events:
+        pair = (product_id, viewer_id)
+        if pair not in candidates and product_id in product_ids and viewer_id in viewer_ids:
+            candidates[pair] = viewed_at
+    if not candidates:
+        return 0
+
+    existing = {
+        (str(product_id), str(viewer_id))
+        for product_id, viewer_id in ProductViewLog.objects.filter(
+            product_id__in={product_id for product_id, _ in candidates},
+            viewer_id__in={viewer_id for _, viewer_id in candidates},
+        ).values_list("product_id", "viewer_id")
+    }
+    new_pairs = [pair for pair in candidates if pair not in existing]
+    if not new_pairs:
+        return 0
+
+    per_product = Counter(product_id for product_id, _ in new_pairs)
+    with transaction.atomic():
+        ProductViewLog.objects.bulk_create(
+            [
+                ProductViewLog(product_id=product_id, viewer_id=viewer_id, viewed_at=candidates[(product_id, viewer_id)])
+                for product_id, viewer_id in new_pairs
+            ],
+            batch_size=VIEW_FLUSH_BATCH_SIZE,
+            ignore_conflicts=True,
+        )
+        # Un solo UPDATE con CASE para todos los beneficios del lote.
+        Product.objects.filter(pk__in=list(per_product)).update(
+            views=F("views") + Case(
+                *[When(pk=product_id, then=Value(total)) for product_id, total in per_product.items()],
+                default=Value(0),
+                output_field=IntegerField(),
+            )
+        )
+    return len(new_pairs)
+
+
+def flush_product_views(batch_size=VIEW_FLUSH_BATCH_SIZE):
+    """
+    Vuelca el buffer a ProductViewLog y Product.views. Retorna (eventos leidos,
+    visualizaciones nuevas) o None si otro proceso ya esta volcando.
+    """
+    lock_key = _key("flush-lock")
+    if not cache.add(lock_key, 1, timeout=VIEW_FLUSH_LOCK_TIMEOUT):
+        return None
+    try:
+        head = _counter("head")
+        tail = _counter("tail")
+        read = created = 0
+        while head < tail:
+            slots = range(head + 1, min(head + batch_size, tail) + 1)
+            stored = cache.get_many([_key("event", slot) for slot in slots])
+            events = []
+            for slot in slots:
+                event = stored.get(_key("event", slot))
+                if event is None and slot > tail - VIEW_IN_FLIGHT_SLOTS:
+                    # Ranura reciente aun sin escribir: se reintenta en el proximo volcado.
+                    break
+                if event is not None:
+                    events.append(event)
+                head = slot
+            if events:
+                created += _persist(events)
+                read += len(events)
+            cache.set(_key("head"), head, timeout=None)
+            cache.delete_many([_key("event", slot) for slot in slots if slot <= head])
+            if head < slots[-1]:
+                break
+        return read, created
+    finally:
+        cache.delete(lock_key)
@@ -6,18 +6,26 @@ from .serializers import (
     EmployeeBenefitListSerializer,
     ProductRedemptionSerializer,
 )
-from .models import Product, ProductRedemption, ProductViewLog
+from .models import Product, ProductRedemption, ProductRedemptionDaily, product_search_index
 from rest_framework.response import Response
 from rest_framework import status
-from .utils.pagination import SmallSetPagination, ProductSetPagination
+from .utils.pagination import SmallSetPagination, ProductSetPagination, ReportSetPagination
+from .utils.exports import redemptions_export_response
+from .utils.redemptions import REDEEM_DUPLICATE, REDEEM_NOT_FOUND, redeem_product
+from .utils.rollup import month_bounds, redemption_summary
+from .utils.view_buffer import record_product_view
 import datetime
 from rest_framework.exceptions import NotFound
 from django.db.models import Q, Count, Exists, OuterRef
+from django.db.models.functions import Coalesce
 from rest_framework.permissions import IsAuthenticated
-from django.db.models import F
+from rest_framework.settings import api_settings
 from urllib.parse import quote
 from django.utils import timezone
 from apps.user.models import UserAccount
+from core.utils.exports import EXPORT_RENDERER_CLASSES, export_format
+from core.utils.search import ranked
+from core.utils.streaming import ndjson_response, wants_ndjson
 
 
 def _enterprise_category(user: UserAccount) -> str:
@@ -61,19 +69,17 @@ class ProductView(APIView):
                 #     return Response({'error': 'Not authorized'}, status=status.HTTP_403_FORBIDDEN)
                 serializer = ProductEmployeesSerializer(product)
             elif user_role == "employees":
-                _, created = ProductViewLog.objects.get_or_create(
-                    product=product,
-                    viewer=user,
-                )
-                if created:
-                    Product.objects.filter(pk=product.pk).update(views=F('views') + 1)
+                # Sin escrituras en la lectura: flush_product_views vuelca el buffer.
+                record_product_view(product.pk, user.pk)
                 serializer = ProductEmployeesSerializer(product)
             else:
                 return Response({'error': 'Not authorized'}, status=status.HTTP_403_FORBIDDEN)
             return Response({'product': serializer.data})
         else:
             if user_role == 'Admin':
-                products = Product.objects.all()
+                products = Product.objects.annotate(
+                    redemptions_count=Count("redemptions", distinct=True),
+                )
             elif user_role == 'enterprise':
                 products = Product.objects.filter(user=user).annotate(
                     redemptions_count=Count("redemptions", distinct=True),
@@ -93,24 +99,16 @@ class ProductView(APIView):
             else:
                 return Response({'error': 'Not authorized'}, status=status.HTTP_403_FORBIDDEN)
 
+            products = products.filter(Q(finished=False) | Q(finished__isnull=True))
             if search:
-                products = products.filter(
-                    Q(name__icontains=search)
-                    | Q(description__icontains=search)
-                    | Q(category__icontains=search)
-                    | Q(subcategory__icontains=search)
-                    | Q(extracategory__icontains=search)
-                    | Q(user__enterprise__icontains=search)
-                    | Q(user__username__icontains=search)
-                )
-
-            products = products.filter(Q(finished=False) | Q(finished__isnull=True)).order_by('-created')
-            serializer = self.serializer_class(products, many=True, context={'request': request})
-            serialized_data = serializer.data
-
+                products = ranked(product_search_index.search(products, search), '-created')
+            else:
+                products = products.order_by('-created')
+            # Se pagina el queryset: solo las filas de la pagina se leen y serializan.
             paginator = SmallSetPagination()
-            result_page = paginator.paginate_queryset(serialized_data, request)
-            return paginator.get_paginated_response({'products': result_page})
+            result_page = paginator.paginate_queryset(products, request)
+            serializer = self.serializer_class(result_page, many=True, context={'request': request})
+            return paginator.get_paginated_response({'products': serializer.data})
         
     def post(self, request):
         role = getattr(request.user, "role", None)
@@ -226,15 +224,7 @@ class EmployeeBenefitsListView(APIView):
         if enterprise_id:
             benefits = benefits.filter(user_id=enterprise_id)
         if search:
-            benefits = benefits.filter(
-                Q(name__icontains=search)
-                | Q(description__icontains=search)
-                | Q(category__icontains=search)
-                | Q(subcategory__icontains=search)
-                | Q(extracategory__icontains=search)
-                | Q(user__enterprise__icontains=search)
-                | Q(user__username__icontains=search)
-            )
+            benefits = ranked(product_search_index.search(benefits, search), "-created")
         paginator = SmallSetPagination()
         paginated = paginator.paginate_queryset(benefits, request)
         serializer = self.serializer_class(paginated, many=True, context={"request": request})
@@ -247,29 +237,10 @@ class ProductRedeemView(APIView):
         if request.user.role != "employees":
             return Response({"error": "Solo empleados pueden canjear beneficios."}, status=status.HTTP_403_FORBIDDEN)
 
-        product = Product.objects.filter(
-            pk=pk,
-            user__role="enterprise",
-            user__is_active=True,
-        ).first()
-        if not product:
+        outcome = redeem_product(pk, request.user)
+        if outcome == REDEEM_NOT_FOUND:
             return Response({"error": "Beneficio no encontrado."}, status=status.HTTP_404_NOT_FOUND)
-
-        today = timezone.localdate()
-        enterprise_name = product.user.enterprise or product.user.username if product.user else ""
-        redemption, created = ProductRedemption.objects.get_or_create(
-            product=product,
-            employee=request.user,
-            redeemed_date=today,
-            defaults={
-                "enterprise": product.user,
-                "product_id_snapshot": product.id,
-                "product_name_snapshot": product.name,
-                "enterprise_name_snapshot": enterprise_name,
-            },
-        )
-
-        if not created:
+        if outcome == REDEEM_DUPLICATE:
             return Response({"detail": "Ya canjeaste este beneficio."}, status=status.HTTP_200_OK)
 
         return Response({"detail": "Beneficio canjeado correctamente."}, status=status.HTTP_201_CREATED)
@@ -306,6 +277,8 @@ class EnterpriseBenefitsQrView(APIView):
 
 class EnterpriseBenefitRedemptionsReportView(APIView):
     permission_classes = [IsAuthenticated]
+    # ?format=csv|xlsx exporta los canjes filtrados en streaming.
+    renderer_classes = [*api_settings.DEFAULT_RENDERER_CLASSES, *EXPORT_RENDERER_CLASSES]
 
     def get(self, request, *args, **kwargs):
         if request.user.role != "enterprise":
@@ -314,24 +287,13 @@ class EnterpriseBenefitRedemptionsReportView(APIView):
         month = request.query_params.get("month", "").strip()  # formato: YYYY-MM
         search = request.query_params.get("search", "").strip()
 
-        products = Product.objects.filter(user=request.user).annotate(
-            redemptions_count=Count("redemptions", distinct=True),
-        ).order_by("-created")
-        product_serializer = ProductSerializer(products, many=True, context={"request": request})
-
         redemptions = ProductRedemption.objects.filter(
             enterprise=request.user,
-        ).select_related("product", "employee", "enterprise")
+        ).select_related("product", "employee", "employee__employer", "enterprise")
 
-        if month:
-            try:
-                year, month_num = month.split("-")
-                redemptions = redemptions.filter(
-                    redeemed_date__year=int(year),
-                    redeemed_date__month=int(month_num),
-                )
-            except (ValueError, AttributeError):
-                pass
+        period = month_bounds(month)
+        if period:
+            redemptions = redemptions.filter(redeemed_date__gte=period[0], redeemed_date__lt=period[1])
 
         if search:
             redemptions = redemptions.filter(
@@ -340,21 +302,31 @@ class EnterpriseBenefitRedemptionsReportView(APIView):
                 | Q(employee__first_name__icontains=search)
                 | Q(employee__last_name__icontains=search)
                 | Q(employee__email__icontains=search)
-                | Q(employee__enterprise__icontains=search)
+                | Q(employee__employer__enterprise__icontains=search)
                 | Q(enterprise__enterprise__icontains=search)
                 | Q(enterprise__username__icontains=search)
                 | Q(enterprise_name_snapshot__icontains=search)
             )
 
         redemptions = redemptions.order_by("-redeemed_at")
-        redemptions_serializer = ProductRedemptionSerializer(redemptions, many=True, context={"request": request})
+        fmt = export_format(request)
+        if fmt:
+            return redemptions_export_response(fmt, redemptions, "canjes-beneficios")
 
-        by_enterprise = (
-            redemptions.values(
-                "enterprise",
-                "enterprise__enterprise",
-                "enterprise__username",
-            )
+        products = Product.objects.filter(user=request.user).annotate(
+            redemptions_count=Count("redemptions", distinct=True),
+        ).order_by("-created")
+        product_serializer = ProductSerializer(products, many=True, context={"request": request})
+        # Solo la pagina pedida se serializa; los totales vienen de redemption_summary.
+        paginator = ReportSetPagination(cache_count=True)
+        page = paginator.paginate_queryset(redemptions, request)
+        redemptions_serializer = ProductRedemptionSerializer(page, many=True, context={"request": request})
+        # Totales desde la tabla por dia; la busqueda de texto necesita los canjes filtrados.
+        summary = redemption_summary(request.user.pk, period, searched=redemptions if search else None)
+        # Canjes por beneficio con los mismos filtros (el detalle ya no trae todas las filas)
+        by_product = list(
+            redemptions.order_by()
+            .values("product_id_snapshot", product_name=Coalesce("product__name", "product_name_snapshot"))
             .annotate(total=Count("id"))
             .order_by("-total")
         )
@@ -367,18 +339,19 @@ class EnterpriseBenefitRedemptionsReportView(APIView):
             }
         ]
 
-        return Response(
+        return paginator.get_paginated_response(
             {
                 "products": product_serializer.data,
                 "redemptions": redemptions_serializer.data,
-                "by_enterprise": list(by_enterprise),
+                "by_product": by_product,
+                "by_enterprise": summary["by_enterprise"],
+                "by_month": summary["by_month"],
                 "enterprises": enterprises,
                 "meta": {
-                    "total_redemptions": redemptions.count(),
+                    "total_redemptions": summary["total"],
                     "filtered": bool(month or search),
                 },
-            },
-            status=status.HTTP_200_OK,
+            }
         )
 
 class EmployeeBenefitRedemptionsView(APIView):
@@ -388,16 +361,34 @@ class EmployeeBenefitRedemptionsView(APIView):
         if request.user.role != "employees":
             return Response({"error": "Solo empleados."}, status=status.HTTP_403_FORBIDDEN)
 
+        search = request.query_params.get("search", "").strip()
         redemptions = ProductRedemption.objects.filter(employee=request.user).select_related(
             "product",
             "enterprise",
             "employee",
+            "employee__employer",
         )
-        serializer = ProductRedemptionSerializer(redemptions, many=True, context={"request": request})
-        return Response(serializer.data, status=status.HTTP_200_OK)
+        if search:
+            redemptions = redemptions.filter(
+                Q(product__name__icontains=search)
+                | Q(product_name_snapshot__icontains=search)
+                | Q(enterprise__enterprise__icontains=search)
+                | Q(enterprise_name_snapshot__icontains=search)
+            )
+        redemptions = redemptions.order_by("-redeemed_at")
+
+        if wants_ndjson(request):
+            return ndjson_response(redemptions, ProductRedemptionSerializer, context={"request": request})
+
+        paginator = SmallSetPagination(cache_count=True)
+        page = paginator.paginate_queryset(redemptions, request)
+        serializer = ProductRedemptionSerializer(page, many=True, context={"request": request})
+        return paginator.get_paginated_response(serializer.data)
 
 class AdminBenefitRedemptionsReportView(APIView):
     permission_classes = [IsAuthenticated]
+    # ?format=csv|xlsx exporta los canjes filtrados en streaming.
+    renderer_classes = [*api_settings.DEFAULT_RENDERER_CLASSES, *EXPORT_RENDERER_CLASSES]
 
     def get(self, request, *args, **kwargs):
         if request.user.role != "Admin":
@@ -412,21 +403,16 @@ class AdminBenefitRedemptionsReportView(APIView):
             "product",
             "enterprise",
             "employee",
+            "employee__employer",
         )
 
         # Aplicar filtros
         if enterprise_id:
             redemptions = redemptions.filter(enterprise_id=enterprise_id)
         
-        if month:
-            try:
-                year, month_num = month.split("-")
-                redemptions = redemptions.filter(
-                    redeemed_date__year=int(year),
-                    redeemed_date__month=int(month_num),
-                )
-            except (ValueError, AttributeError):
-                pass
+        period = month_bounds(month)
+        if period:
+            redemptions = redemptions.filter(redeemed_date__gte=period[0], redeemed_date__lt=period[1])
 
         if search:
             redemptions = redemptions.filter(
@@ -441,46 +427,23 @@ class AdminBenefitRedemptionsReportView(APIView):
             )
 
         redemptions = redemptions.order_by("-redeemed_at")
-        serializer = ProductRedemptionSerializer(redemptions, many=True, context={"request": request})
+        fmt = export_format(request)
+        if fmt:
+            return redemptions_export_response(fmt, redemptions, "canjes-beneficios-admin")
 
-        # Resumen por empresa con los mismos filtros
-        by_enterprise_qs = ProductRedemption.objects.all()
-        if enterprise_id:
-            by_enterprise_qs = by_enterprise_qs.filter(enterprise_id=enterprise_id)
-        if month:
-            try:
-                year, month_num = month.split("-")
-                by_enterprise_qs = by_enterprise_qs.filter(
-                    redeemed_date__year=int(year),
-                    redeemed_date__month=int(month_num),
-                )
-            except (ValueError, AttributeError):
-                pass
-        if search:
-            by_enterprise_qs = by_enterprise_qs.filter(
-                Q(product_name_snapshot__icontains=search)
-                | Q(product__name__icontains=search)
-                | Q(employee__first_name__icontains=search)
-                | Q(employee__last_name__icontains=search)
-                | Q(employee__email__icontains=search)
-                | Q(enterprise__enterprise__icontains=search)
-                | Q(enterprise__username__icontains=search)
-                | Q(enterprise_name_snapshot__icontains=search)
-            )
+        # Solo la pagina pedida se serializa; los totales vienen de redemption_summary.
+        paginator = ReportSetPagination(cache_count=True)
+        page = paginator.paginate_queryset(redemptions, request)
+        serializer = ProductRedemptionSerializer(page, many=True, context={"request": request})
 
-        by_enterprise = (
-            by_enterprise_qs.values(
-                "enterprise",
-                "enterprise__enterprise",
-                "enterprise__username",
-            )
-            .annotate(total=Count("id"))
-            .order_by("-total")
-        )
+        # Resumen por empresa y por mes con los mismos filtros, desde la tabla por dia
+        # salvo cuando hay busqueda de texto.
+        summary = redemption_summary(enterprise_id or None, period, searched=redemptions if search else None)
 
-        # Obtener lista de empresas únicas para el filtro
+        # Obtener lista de empresas únicas para el filtro (las filas en cero quedan al
+        # borrar canjes y no cuentan)
         all_enterprises = (
-            ProductRedemption.objects.values(
+            ProductRedemptionDaily.objects.filter(total__gt=0).values(
                 "enterprise",
                 "enterprise__enterprise",
                 "enterprise__username",
@@ -489,15 +452,15 @@ class AdminBenefitRedemptionsReportView(APIView):
             .order_by("enterprise__enterprise")
         )
 
-        return Response(
+        return paginator.get_paginated_response(
             {
                 "redemptions": serializer.data,
-                "by_enterprise": list(by_enterprise),
+                "by_enterprise": summary["by_enterprise"],
+                "by_month": summary["by_month"],
                 "enterprises": list(all_enterprises),
                 "meta": {
-                    "total_redemptions": redemptions.count(),
+                    "total_redemptions": summary["total"],
                     "filtered": bool(enterprise_id or month or search),
                 },
-            },
-            status=status.HTTP_200_OK,
+            }
         )
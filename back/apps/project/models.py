@@ -3,8 +3,13 @@ from django.conf import settings
 User = settings.AUTH_USER_MODEL
 import uuid
 from ckeditor.fields import RichTextField
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from core.utils.search import SearchDocumentMixin, build_search_document, register_search_index
+from core.utils.pagination import track_cached_counts
+from .utils.facets import invalidate_licitation_facets, invalidate_project_facets
 
-class Project(models.Model):
+class Project(SearchDocumentMixin, models.Model):
     options_status = (
         ('draft', 'Draft'),
         ('published', 'Published'),
@@ -28,15 +33,32 @@ class Project(models.Model):
     priority = models.CharField(max_length=10, choices=options_priority, default='Baja')
     start_date = models.DateTimeField(null=True, blank=True)
     end_date = models.DateTimeField(null=True, blank=True)
+    search_document = models.TextField(blank=True, default='', editable=False)
 
     class Meta:
         verbose_name_plural = 'Proyectos'
         verbose_name = 'Proyecto'
         ordering = ['-created']
+        indexes = [
+            # Filtros y conteos de facetas sobre los proyectos publicados.
+            models.Index(fields=["status", "department"], name="project_status_dept_idx"),
+            models.Index(fields=["status", "municipality"], name="project_status_muni_idx"),
+            models.Index(fields=["status", "priority"], name="project_status_priority_idx"),
+        ]
+
+    def build_search_document_for(self):
+        return build_search_document(self.title, self.description, self.department, self.municipality)
 
     def __str__(self):
         return self.title
 
+
+project_search_index = register_search_index(
+    Project,
+    "project_project_fts",
+    gin_index_name="project_search_gin",
+)
+
 class ProjectApplication(models.Model):
     id = models.UUIDField(default=uuid.uuid4, unique=True, primary_key=True)
     project = models.ForeignKey(Project, related_name='applications', on_delete=models.CASCADE)
@@ -59,7 +81,10 @@ class ProjectApplication(models.Model):
         return f"{self.full_name} - {self.project.title}"
 
 
-class LicitationOpportunity(models.Model):
+track_cached_counts(ProjectApplication)
+
+
+class LicitationOpportunity(SearchDocumentMixin, models.Model):
     options_status = (
         ('draft', 'Draft'),
         ('published', 'Published'),
@@ -100,16 +125,44 @@ class LicitationOpportunity(models.Model):
     priority = models.CharField(max_length=10, choices=options_priority, default='Baja')
     start_date = models.DateTimeField(null=True, blank=True)
     end_date = models.DateTimeField(null=True, blank=True)
+    search_document = models.TextField(blank=True, default='', editable=False)
 
     class Meta:
         verbose_name_plural = 'Licitaciones'
         verbose_name = 'Licitación'
         ordering = ['-created']
+        indexes = [
+            # Filtros y conteos de facetas sobre las licitaciones publicadas.
+            models.Index(fields=["status", "department"], name="licit_status_dept_idx"),
+            models.Index(fields=["status", "municipality"], name="licit_status_muni_idx"),
+            models.Index(fields=["status", "opportunity_type"], name="licit_status_type_idx"),
+            models.Index(fields=["status", "economic_sector"], name="licit_status_sector_idx"),
+            models.Index(fields=["status", "priority"], name="licit_status_priority_idx"),
+        ]
+
+    def build_search_document_for(self):
+        return build_search_document(
+            self.title,
+            self.description,
+            self.general_scope,
+            self.economic_sector,
+            self.contracting_entity,
+            self.required_company_type,
+            self.department,
+            self.municipality,
+        )
 
     def __str__(self):
         return self.title
 
 
+licitation_search_index = register_search_index(
+    LicitationOpportunity,
+    "project_licitationopportunity_fts",
+    gin_index_name="licit_search_gin",
+)
+
+
 class LicitationApplication(models.Model):
     options_interest_type = (
         ("liderar", "Liderar"),
@@ -143,3 +196,18 @@ class LicitationApplication(models.Model):
 
     def __str__(self):
         return f"{self.full_name} - {self.licitation.title}"
+
+
+track_cached_counts(LicitationApplication)
+
+
+@receiver(post_save, sender=Project)
+@receiver(post_delete, sender=Project)
+def invalidate_project_facets_on_change(sender, instance, **kwargs):
+    invalidate_project_facets()
+
+
+@receiver(post_save, sender=LicitationOpportunity)
+@receiver(post_delete, sender=LicitationOpportunity)
+def invalidate_licitation_facets_on_change(sender, instance, **kwargs):
+    invalidate_licitation_facets()
@@ -0,0 +1,37 @@
+import json
+
+from django.test import TestCase
+from rest_framework.test import APIClient
+
+from apps.user.models import UserAccount
+from .models import LicitationApplication, LicitationOpportunity, Project, ProjectApplication
+
+
+class EnterpriseApplicationListTests(TestCase):
+    def setUp(self):
+        owner = UserAccount.objects.create(email="duena@example.com", username="duena", role="enterprise")
+        self.enterprise = UserAccount.objects.create(email="empresa@example.com", username="empresa", role="enterprise")
+        project = Project.objects.create(user=owner, title="Planta", department="Caldas", municipality="Manizales")
+        licitation = LicitationOpportunity.objects.create(user=owner, title="Suministro")
+        for index in range(12):
+            ProjectApplication.objects.create(
+                project=project, applicant=self.enterprise, full_name=f"Empresa {index}", email="empresa@example.com"
+            )
+            LicitationApplication.objects.create(
+                licitation=licitation, applicant=self.enterprise, full_name=f"Empresa {index}", email="empresa@example.com"
+            )
+        self.client = APIClient()
+        self.client.force_authenticate(self.enterprise)
+
+    def test_paginated_and_ndjson_streams(self):
+        for url in ("/api/projects-applications/enterprise/", "/api/licitations-applications/enterprise/"):
+            response = self.client.get(url)
+            self.assertEqual(response.data["count"], 12)
+            self.assertEqual(len(response.data["results"]), 5)
+            self.assertIsNotNone(response.data["next"])
+
+            response = self.client.get(url, {"stream": "ndjson"})
+            self.assertEqual(response["Content-Type"], "application/x-ndjson")
+            lines = b"".join(response.streaming_content).decode("utf-8").splitlines()
+            self.assertEqual(len(lines), 12)
+            self.assertTrue(all(isinstance(json.loads(line), dict) for line in lines))
@@ -0,0 +1,91 @@
+import hashlib
+import json
+
+from django.core.cache import cache
+from django.db.models import Count
+
+from core.utils.cache import bump_cache_version, versioned_key
+
+PROJECT_FACETS_NAMESPACE = "project-facets"
+LICITATION_FACETS_NAMESPACE = "licitation-facets"
+FACETS_TIMEOUT = 60 * 10
+# Valores por faceta: departamento y municipio pueden tener cientos.
+FACET_VALUES_LIMIT = 50
+
+PROJECT_FACET_FIELDS = ("department", "municipality", "priority")
+LICITATION_FACET_FIELDS = ("department", "municipality", "opportunity_type", "economic_sector", "priority")
+
+
+def parse_facet_filters(query_params, fields):
+    """
+    {campo: [valores]} desde ?department=Antioquia&department=Caldas&priority=Alta.
+    """
+    filters = {}
+    for field in fields:
+        values = []
+        for raw_value in query_params.getlist(field):
+            value = (raw_value or "").strip()
+            if value and value != "undefined" and value not in values:
+                values.append(value)
+        if values:
+            filters[field] = sorted(values)
+    return filters
+
+
+def apply_facet_filters(queryset, filters, exclude_field=None):
+    for field, values in filters.items():
+        if field != exclude_field:
+            queryset = queryset.filter(**{f"{field}__in": values})
+    return queryset
+
+
+def _facet_cache_key(namespace, parts):
+    digest = hashlib.sha1(json.dumps(parts, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+    return versioned_key(namespace, digest)
+
+
+def facet_counts(queryset, fields, filters, namespace, cache_parts):
+    """
+    Conteos por valor de cada faceta. Cada faceta se cuenta con los filtros de las demas
+    (no con el suyo), asi el usuario ve cuantos resultados tendria al cambiar esa seleccion.
+    El queryset base (estado y texto ya aplicados) se identifica con cache_parts.
+    """
+    cache_key = _facet_cache_key(namespace, {"base": cache_parts, "filters": filters})
+    facets = cache.get(cache_key)
+    if facets is not None:
+        return facets
+
+    model = queryset.model
+    # Subconsulta por pk: el GROUP BY no debe arrastrar las anotaciones del queryset (rank).
+    base = model._default_manager.filter(pk__in=queryset.values("pk"))
+    facets = {}
+    for field in fields:
+        labels = dict(model._meta.get_field(field).flatchoices)
+        selected = set(filters.get(field, []))
+        rows = (
+            apply_facet_filters(base, filters, exclude_field=field)
+            .exclude(**{f"{field}__isnull": True})
+            .exclude(**{field: ""})
+            .values_list(field)
+            .annotate(count=Count("pk"))
+            .order_by("-count", field)[:FACET_VALUES_LIMIT]
+        )
+        facets[field] = [
+            {
+                "value": value,
+                "label": labels.get(value, value),
+                "count": count,
+                "selected": value in selected,
+            }
+            for value, count in rows
+        ]
+    cache.set(cache_key, facets, timeout=FACETS_TIMEOUT)
+    return facets
+
+
+def invalidate_project_facets():
+    bump_cache_version(PROJECT_FACETS_NAMESPACE)
+
+
+def invalidate_licitation_facets():
+    bump_cache_version(LICITATION_FACETS_NAMESPACE)
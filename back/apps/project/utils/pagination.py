@@ -1,11 +1,13 @@
-from rest_framework import pagination
+from core.utils.pagination import CursorPageNumberPagination
 
-class SmallSetPagination(pagination.PageNumberPagination):
+class SmallSetPagination(CursorPageNumberPagination):
+    page_query_param = 'page'
     page_size = 5
     page_size_query_param = 'page_size'
     max_page_size = 100
 
-class ProjectSetPagination(pagination.PageNumberPagination):
+class ProjectSetPagination(CursorPageNumberPagination):
+    page_query_param = 'page'
     page_size = 12
     page_size_query_param = 'page_size'
     max_page_size = 100
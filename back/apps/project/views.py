@@ -6,11 +6,15 @@ from rest_framework.permissions import IsAuthenticated, AllowAny
 from django.db.models import Count, Q
 from django.utils import timezone
 from django.utils.dateparse import parse_date, parse_datetime
+from core.utils.search import ranked, search_tokens
+from core.utils.streaming import ndjson_response, wants_ndjson
 from .models import (
     Project,
     ProjectApplication,
     LicitationOpportunity,
     LicitationApplication,
+    licitation_search_index,
+    project_search_index,
 )
 from .serializers import (
     ProjectSerializer,
@@ -19,6 +23,15 @@ from .serializers import (
     LicitationOpportunitySerializer,
     LicitationApplicationSerializer,
 )
+from .utils.facets import (
+    LICITATION_FACET_FIELDS,
+    LICITATION_FACETS_NAMESPACE,
+    PROJECT_FACET_FIELDS,
+    PROJECT_FACETS_NAMESPACE,
+    apply_facet_filters,
+    facet_counts,
+    parse_facet_filters,
+)
 from .utils.pagination import SmallSetPagination, ProjectSetPagination
 
 
@@ -52,6 +65,38 @@ def _validate_dates_window(start_raw, end_raw):
         return "La fecha de cierre debe ser posterior a la fecha de inicio."
     return None
 
+def _search_cache_part(search):
+    # Textos con los mismos terminos normalizados comparten los conteos en cache.
+    return " ".join(dict.fromkeys(search_tokens(search)))
+
+
+def _mark_projects_applied(payload, user):
+    if user.role != "enterprise":
+        return payload
+    # El serializador entrega los UUID como texto.
+    applied_ids = {
+        str(applied_id)
+        for applied_id in ProjectApplication.objects.filter(
+            applicant=user,
+            project_id__in=[item["id"] for item in payload],
+        ).values_list("project_id", flat=True)
+    }
+    return [{**item, "already_applied": item["id"] in applied_ids} for item in payload]
+
+
+def _mark_licitations_applied(payload, user):
+    if user.role != "enterprise":
+        return payload
+    # El serializador entrega los UUID como texto.
+    applied_ids = {
+        str(applied_id)
+        for applied_id in LicitationApplication.objects.filter(
+            applicant=user,
+            licitation_id__in=[item["id"] for item in payload],
+        ).values_list("licitation_id", flat=True)
+    }
+    return [{**item, "already_applied": item["id"] in applied_ids} for item in payload]
+
 class ProjectView(APIView):
     permission_classes = [IsAuthenticated]
     serializer_class = ProjectSerializer
@@ -77,18 +122,15 @@ class ProjectView(APIView):
             return Response({'project': payload})
         else:
             if user.role == 'Admin':
-                projects = Project.objects.annotate(
-                    applications_count=Count('applications', distinct=True),
-                ).order_by('-created')
+                projects = Project.objects.all()
                 search = (request.query_params.get("search") or "").strip()
                 if search:
-                    projects = projects.filter(
-                        Q(title__icontains=search)
-                        | Q(description__icontains=search)
-                        | Q(department__icontains=search)
-                        | Q(municipality__icontains=search)
-                    )
-                serializer = self.serializer_class(projects, many=True, context={'request': request})
+                    projects = ranked(project_search_index.search(projects, search), '-created')
+                else:
+                    projects = projects.order_by('-created')
+                projects = projects.annotate(
+                    applications_count=Count('applications', distinct=True),
+                )
                 paginator = SmallSetPagination()
                 page = paginator.paginate_queryset(projects, request)
 
@@ -170,37 +212,60 @@ class ProjectMainView(APIView):
     permission_classes = [IsAuthenticated]
     
     def get(self, request, *args, **kwargs):
-        projects = Project.objects.filter(status="published").annotate(
-            applications_count=Count('applications', distinct=True),
-        ).order_by('-created')
-        
+        projects = Project.objects.filter(status="published")
+
         search = (request.query_params.get("search") or "").strip()
         if search:
-            projects = projects.filter(
-                Q(title__icontains=search) | Q(description__icontains=search)
-            )
+            projects = ranked(project_search_index.search(projects, search), '-created')
+        else:
+            projects = projects.order_by('-created')
+        projects = projects.annotate(
+            applications_count=Count('applications', distinct=True),
+        )
 
         paginator = ProjectSetPagination()
         results = paginator.paginate_queryset(projects, request)
         serializer = ProjectSerializer(results, many=True, context={'request': request})
-        payload = serializer.data
-        if request.user.role == "enterprise":
-            project_ids = [item["id"] for item in payload]
-            applied_ids = set(
-                ProjectApplication.objects.filter(
-                    applicant=request.user,
-                    project_id__in=project_ids,
-                ).values_list("project_id", flat=True)
-            )
-            payload = [
-                {
-                    **item,
-                    "already_applied": item["id"] in applied_ids,
-                }
-                for item in payload
-            ]
+        payload = _mark_projects_applied(serializer.data, request.user)
         return paginator.get_paginated_response({'projects': payload})
 
+
+class ProjectSearchView(APIView):
+    """
+    Busqueda por facetas: resultados ordenados por relevancia y conteos por departamento,
+    municipio y prioridad en una sola respuesta. Filtros: ?department=&municipality=&priority=
+    (repetibles) y ?search=.
+    """
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request, *args, **kwargs):
+        is_admin = request.user.role == 'Admin'
+        projects = Project.objects.all() if is_admin else Project.objects.filter(status="published")
+        search = (request.query_params.get("search") or "").strip()
+        filters = parse_facet_filters(request.query_params, PROJECT_FACET_FIELDS)
+        if search:
+            projects = project_search_index.search(projects, search)
+
+        facets = facet_counts(
+            projects,
+            PROJECT_FACET_FIELDS,
+            filters,
+            PROJECT_FACETS_NAMESPACE,
+            {"scope": "all" if is_admin else "published", "search": _search_cache_part(search)},
+        )
+
+        projects = apply_facet_filters(projects, filters)
+        projects = ranked(projects, '-created') if search else projects.order_by('-created')
+        projects = projects.annotate(
+            applications_count=Count('applications', distinct=True),
+        )
+
+        paginator = ProjectSetPagination()
+        results = paginator.paginate_queryset(projects, request)
+        serializer = ProjectSerializer(results, many=True, context={'request': request})
+        payload = _mark_projects_applied(serializer.data, request.user)
+        return paginator.get_paginated_response({'projects': payload, 'facets': facets})
+
 class ApplyProjectView(APIView):
     permission_classes = [IsAuthenticated]
 
@@ -275,7 +340,7 @@ class AdminApplicationsView(APIView):
             applications = applications.filter(created_at__date__lte=end_date)
 
         applications = applications.order_by('-created_at')
-        paginator = SmallSetPagination()
+        paginator = SmallSetPagination(cache_count=True)
         page = paginator.paginate_queryset(applications, request)
         serializer = ProjectApplicationSerializer(page, many=True, context={"request": request})
         return paginator.get_paginated_response(serializer.data)
@@ -289,8 +354,13 @@ class EnterpriseApplicationsView(APIView):
 
         applications = ProjectApplication.objects.filter(applicant=request.user).select_related("project")
         applications = applications.order_by('-created_at')
-        serializer = ProjectApplicationSerializer(applications, many=True, context={"request": request})
-        return Response(serializer.data, status=status.HTTP_200_OK)
+        if wants_ndjson(request):
+            return ndjson_response(applications, ProjectApplicationSerializer, context={"request": request})
+
+        paginator = SmallSetPagination(cache_count=True)
+        page = paginator.paginate_queryset(applications, request)
+        serializer = ProjectApplicationSerializer(page, many=True, context={"request": request})
+        return paginator.get_paginated_response(serializer.data)
 
 
 class LicitationView(APIView):
@@ -318,20 +388,15 @@ class LicitationView(APIView):
             return Response({'licitation': payload})
         else:
             if user.role == 'Admin':
-                licitations = LicitationOpportunity.objects.annotate(
-                    applications_count=Count('applications', distinct=True),
-                ).order_by('-created')
+                licitations = LicitationOpportunity.objects.all()
                 search = (request.query_params.get("search") or "").strip()
                 if search:
-                    licitations = licitations.filter(
-                        Q(title__icontains=search)
-                        | Q(description__icontains=search)
-                        | Q(economic_sector__icontains=search)
-                        | Q(contracting_entity__icontains=search)
-                        | Q(required_company_type__icontains=search)
-                        | Q(department__icontains=search)
-                        | Q(municipality__icontains=search)
-                    )
+                    licitations = ranked(licitation_search_index.search(licitations, search), '-created')
+                else:
+                    licitations = licitations.order_by('-created')
+                licitations = licitations.annotate(
+                    applications_count=Count('applications', distinct=True),
+                )
                 paginator = SmallSetPagination()
                 page = paginator.paginate_queryset(licitations, request)
                 serializer = self.serializer_class(page, many=True, context={'request': request})
@@ -424,42 +489,64 @@ class LicitationMainView(APIView):
     permission_classes = [IsAuthenticated]
 
     def get(self, request, *args, **kwargs):
-        licitations = LicitationOpportunity.objects.filter(status="published").annotate(
-            applications_count=Count('applications', distinct=True),
-        ).order_by('-created')
+        licitations = LicitationOpportunity.objects.filter(status="published")
 
         search = (request.query_params.get("search") or "").strip()
         if search:
-            licitations = licitations.filter(
-                Q(title__icontains=search)
-                | Q(description__icontains=search)
-                | Q(economic_sector__icontains=search)
-                | Q(contracting_entity__icontains=search)
-                | Q(required_company_type__icontains=search)
-            )
+            licitations = ranked(licitation_search_index.search(licitations, search), '-created')
+        else:
+            licitations = licitations.order_by('-created')
+        licitations = licitations.annotate(
+            applications_count=Count('applications', distinct=True),
+        )
 
         paginator = ProjectSetPagination()
         results = paginator.paginate_queryset(licitations, request)
         serializer = LicitationOpportunitySerializer(results, many=True, context={'request': request})
-        payload = serializer.data
-        if request.user.role == "enterprise":
-            licitation_ids = [item["id"] for item in payload]
-            applied_ids = set(
-                LicitationApplication.objects.filter(
-                    applicant=request.user,
-                    licitation_id__in=licitation_ids,
-                ).values_list("licitation_id", flat=True)
-            )
-            payload = [
-                {
-                    **item,
-                    "already_applied": item["id"] in applied_ids,
-                }
-                for item in payload
-            ]
+        payload = _mark_licitations_applied(serializer.data, request.user)
         return paginator.get_paginated_response({'licitations': payload})
 
 
+class LicitationSearchView(APIView):
+    """
+    Busqueda por facetas de licitaciones: departamento, municipio, tipo de oportunidad,
+    sector economico y prioridad, con sus conteos, en una sola respuesta.
+    """
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request, *args, **kwargs):
+        is_admin = request.user.role == 'Admin'
+        licitations = (
+            LicitationOpportunity.objects.all()
+            if is_admin
+            else LicitationOpportunity.objects.filter(status="published")
+        )
+        search = (request.query_params.get("search") or "").strip()
+        filters = parse_facet_filters(request.query_params, LICITATION_FACET_FIELDS)
+        if search:
+            licitations = licitation_search_index.search(licitations, search)
+
+        facets = facet_counts(
+            licitations,
+            LICITATION_FACET_FIELDS,
+            filters,
+            LICITATION_FACETS_NAMESPACE,
+            {"scope": "all" if is_admin else "published", "search": _search_cache_part(search)},
+        )
+
+        licitations = apply_facet_filters(licitations, filters)
+        licitations = ranked(licitations, '-created') if search else licitations.order_by('-created')
+        licitations = licitations.annotate(
+            applications_count=Count('applications', distinct=True),
+        )
+
+        paginator = ProjectSetPagination()
+        results = paginator.paginate_queryset(licitations, request)
+        serializer = LicitationOpportunitySerializer(results, many=True, context={'request': request})
+        payload = _mark_licitations_applied(serializer.data, request.user)
+        return paginator.get_paginated_response({'licitations': payload, 'facets': facets})
+
+
 class ApplyLicitationView(APIView):
     permission_classes = [IsAuthenticated]
 
@@ -543,7 +630,7 @@ class AdminLicitationApplicationsView(APIView):
             applications = applications.filter(created_at__date__lte=end_date)
 
         applications = applications.order_by('-created_at')
-        paginator = SmallSetPagination()
+        paginator = SmallSetPagination(cache_count=True)
         page = paginator.paginate_queryset(applications, request)
         serializer = LicitationApplicationSerializer(page, many=True, context={"request": request})
         return paginator.get_paginated_response(serializer.data)
@@ -558,5 +645,10 @@ class EnterpriseLicitationApplicationsView(APIView):
 
         applications = LicitationApplication.objects.filter(applicant=request.user).select_related("licitation")
         applications = applications.order_by('-created_at')
-        serializer = LicitationApplicationSerializer(applications, many=True, context={"request": request})
-        return Response(serializer.data, status=status.HTTP_200_OK)
+        if wants_ndjson(request):
+            return ndjson_response(applications, LicitationApplicationSerializer, context={"request": request})
+
+        paginator = SmallSetPagination(cache_count=True)
+        page = paginator.paginate_queryset(applications, request)
+        serializer = LicitationApplicationSerializer(page, many=True, context={"request": request})
+        return paginator.get_paginated_response(serializer.data)
@@ -0,0 +1,11 @@
+from django.contrib import admin
+from unfold.admin import ModelAdmin
+from .models import SearchEntry
+
+
+@admin.register(SearchEntry)
+class SearchEntryAdmin(ModelAdmin):
+    list_display = ("title", "kind", "status", "owner", "updated")
+    list_filter = ("kind", "status")
+    search_fields = ("title", "subtitle")
+    readonly_fields = ("id", "kind", "object_id", "owner", "document", "updated")
@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+
+from apps.search.utils.entries import rebuild_search_entries
+
+
+class Command(BaseCommand):
+    help = (
+        "Reconstruye el indice de busqueda global (beneficios, empleos, proyectos, "
+        "licitaciones y empresas) desde los modelos origen. Ejecutar despues de rebuild_search_index."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--chunk-size", type=int, default=1000)
+
+    def handle(self, *args, **options):
+        totals = rebuild_search_entries(chunk_size=max(1, options["chunk_size"]))
+        for kind, total in totals.items():
+            self.stdout.write(f"{kind}: {total}")
+        self.stdout.write(self.style.SUCCESS(f"{sum(totals.values())} entradas indexadas."))
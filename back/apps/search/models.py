@@ -0,0 +1,107 @@
+from django.conf import settings
+from django.db import models
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from apps.job.models import JobBoard
+from apps.products.models import Product
+from apps.project.models import LicitationOpportunity, Project
+from apps.user.models import UserProfile
+from .utils.entries import remove_search_entries, sync_enterprise_entries, sync_search_entries
+
+User = settings.AUTH_USER_MODEL
+
+
+class SearchEntry(models.Model):
+    """
+    Fila del indice global: una por beneficio, empleo, proyecto, licitacion o empresa.
+    El documento (ya normalizado) se copia del modelo origen; la visibilidad se resuelve
+    al consultar con owner, status y la ventana de fechas.
+    """
+    KIND_PRODUCT = "product"
+    KIND_JOB = "job"
+    KIND_PROJECT = "project"
+    KIND_LICITATION = "licitation"
+    KIND_ENTERPRISE = "enterprise"
+    options_kind = (
+        (KIND_PRODUCT, "Beneficio"),
+        (KIND_JOB, "Empleo"),
+        (KIND_PROJECT, "Proyecto"),
+        (KIND_LICITATION, "Licitación"),
+        (KIND_ENTERPRISE, "Empresa"),
+    )
+
+    # uuid5 de (tipo, id origen): la sincronizacion es un upsert por llave primaria.
+    id = models.UUIDField(primary_key=True, editable=False)
+    kind = models.CharField(max_length=20, choices=options_kind)
+    object_id = models.UUIDField()
+    owner = models.ForeignKey(User, related_name="search_entries", on_delete=models.CASCADE, null=True, blank=True)
+    title = models.CharField(max_length=255)
+    subtitle = models.CharField(max_length=255, blank=True, default="")
+    document = models.TextField(blank=True, default="")
+    status = models.CharField(max_length=20)
+    start_date = models.DateTimeField(null=True, blank=True)
+    end_date = models.DateTimeField(null=True, blank=True)
+    updated = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = "Entrada de búsqueda"
+        verbose_name_plural = "Índice de búsqueda"
+        indexes = [
+            # Cambios posteriores al indice en memoria (delta por consulta).
+            models.Index(fields=["updated"], name="searchentry_updated_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.get_kind_display()}: {self.title}"
+
+
+# Las apps origen se cargan antes: sus receptores ya recalcularon search_document.
+@receiver(post_save, sender=Product)
+def sync_product_search_entry(sender, instance, **kwargs):
+    sync_search_entries(SearchEntry.KIND_PRODUCT, [instance.pk])
+
+
+@receiver(post_save, sender=JobBoard)
+def sync_job_search_entry(sender, instance, **kwargs):
+    sync_search_entries(SearchEntry.KIND_JOB, [instance.pk])
+
+
+@receiver(post_save, sender=Project)
+def sync_project_search_entry(sender, instance, **kwargs):
+    sync_search_entries(SearchEntry.KIND_PROJECT, [instance.pk])
+
+
+@receiver(post_save, sender=LicitationOpportunity)
+def sync_licitation_search_entry(sender, instance, **kwargs):
+    sync_search_entries(SearchEntry.KIND_LICITATION, [instance.pk])
+
+
+@receiver(post_delete, sender=Product)
+@receiver(post_delete, sender=JobBoard)
+@receiver(post_delete, sender=Project)
+@receiver(post_delete, sender=LicitationOpportunity)
+def remove_search_entry(sender, instance, **kwargs):
+    kind = {
+        Product: SearchEntry.KIND_PRODUCT,
+        JobBoard: SearchEntry.KIND_JOB,
+        Project: SearchEntry.KIND_PROJECT,
+        LicitationOpportunity: SearchEntry.KIND_LICITATION,
+    }[sender]
+    remove_search_entries(kind, [instance.pk])
+
+
+@receiver(post_save, sender=settings.AUTH_USER_MODEL)
+def sync_enterprise_search_entries(sender, instance, created, **kwargs):
+    # Empleados y Admin no tienen entradas: sin consultas en cada login o guardado.
+    if instance.role != "enterprise":
+        return
+    update_fields = kwargs.get("update_fields")
+    if update_fields and not {"enterprise", "username", "role", "is_active", "verified"} & set(update_fields):
+        return
+    sync_enterprise_entries(instance, include_content=not created)
+
+
+@receiver(post_save, sender=UserProfile)
+def sync_enterprise_search_entry_on_profile(sender, instance, **kwargs):
+    sync_search_entries(SearchEntry.KIND_ENTERPRISE, [instance.user_id])
@@ -0,0 +1,180 @@
+import datetime
+from unittest import mock
+
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from apps.job.models import JobBoard
+from apps.products.models import Product
+from apps.project.models import Project
+from apps.user.models import UserAccount, UserProfile
+from .models import SearchEntry
+from .utils import inverted_index
+from .utils.entries import entry_id, global_search, rebuild_search_entries
+
+
+class EnterpriseEntrySyncTests(TestCase):
+    def setUp(self):
+        self.enterprise = UserAccount.objects.create(
+            email="empresa@example.com", username="empresa", enterprise="Cafe Andino", role="enterprise"
+        )
+        self.product = Product.objects.create(user=self.enterprise, name="Descuento")
+        self.product_entry_id = entry_id(SearchEntry.KIND_PRODUCT, self.product.pk)
+
+    def test_non_enterprise_saves_skip_the_index(self):
+        employee = UserAccount.objects.create(email="empleado@example.com", username="empleado", role="employees")
+        with CaptureQueriesContext(connection) as queries:
+            employee.save()
+        table = SearchEntry._meta.db_table
+        self.assertFalse([query for query in queries if table in query["sql"]])
+
+    def test_content_is_rewritten_only_when_the_name_changes(self):
+        before = SearchEntry.objects.get(pk=self.product_entry_id).updated
+        self.enterprise.save()
+        self.assertEqual(SearchEntry.objects.get(pk=self.product_entry_id).updated, before)
+
+        self.enterprise.enterprise = "Cafe del Sur"
+        self.enterprise.save()
+        entry = SearchEntry.objects.get(pk=self.product_entry_id)
+        self.assertEqual(entry.subtitle, "Cafe del Sur")
+        self.assertIn("sur", entry.document.split())
+
+
+class _SyncThread:
+    # Corre el hilo de reconstruccion en linea, para las pruebas.
+    def __init__(self, target, **kwargs):
+        self.target = target
+
+    def start(self):
+        self.target()
+
+
+class GlobalSearchTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        inverted_index._state = None
+        self.enterprise = self._enterprise("andino", "Cafe Andino")
+        self.other = self._enterprise("sur", "Te del Sur")
+        self.employee = UserAccount.objects.create(
+            email="empleado@example.com", username="empleado", role="employees", employer=self.enterprise
+        )
+        self.admin = UserAccount.objects.create(email="admin@example.com", username="admin", role="Admin")
+        self.product = Product.objects.create(user=self.enterprise, name="Cafe gratis")
+        self.finished = Product.objects.create(user=self.enterprise, name="Cafe agotado", finished=True)
+        self.job = JobBoard.objects.create(user=self.enterprise, title="Barista de cafe")
+        self.project = Project.objects.create(
+            user=self.other, title="Cafe para eventos", department="Huila", municipality="Pitalito"
+        )
+        # Los hilos de fondo no ven la transaccion de la prueba: se construye en linea.
+        patcher = mock.patch.object(inverted_index.threading, "Thread", _SyncThread)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        patcher = mock.patch.object(inverted_index, "connections")
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def _enterprise(self, username, name):
+        enterprise = UserAccount.objects.create(
+            email=f"{username}@example.com",
+            username=username,
+            first_name="Ana",
+            last_name="Diaz",
+            enterprise=name,
+            phone=f"30012345{len(username)}{len(name)}",
+            role="enterprise",
+            verified=True,
+        )
+        UserProfile.objects.filter(user=enterprise).update(
+            nuip_enterprise="900123456", description="Cafe de origen", niche="Cafe", address="Calle 1"
+        )
+        UserProfile.objects.get(user=enterprise).save()
+        return enterprise
+
+    def _found(self, user, text="cafe"):
+        return {(entry.kind, entry.object_id) for entry in global_search(user, text)}
+
+    def test_results_follow_role_visibility(self):
+        inverted_index.build_global_search_index()
+        product = (SearchEntry.KIND_PRODUCT, self.product.pk)
+        finished = (SearchEntry.KIND_PRODUCT, self.finished.pk)
+        job = (SearchEntry.KIND_JOB, self.job.pk)
+        project = (SearchEntry.KIND_PROJECT, self.project.pk)
+        enterprises = {(SearchEntry.KIND_ENTERPRISE, self.enterprise.pk), (SearchEntry.KIND_ENTERPRISE, self.other.pk)}
+
+        self.assertEqual(self._found(self.employee), {product, job} | enterprises)
+        self.assertEqual(self._found(self.other), {project} | enterprises)
+        self.assertEqual(self._found(self.enterprise), {product, job, project} | enterprises)
+        self.assertEqual(self._found(self.admin), {product, job, project} | enterprises)
+        self.assertNotIn(finished, self._found(self.admin))
+
+        UserAccount.objects.filter(pk=self.enterprise.pk).update(billing_blocked=True)
+        cache.clear()
+        inverted_index._state = None
+        self.assertEqual(self._found(self.employee), {(SearchEntry.KIND_ENTERPRISE, self.other.pk)})
+
+    def test_changes_after_the_build_are_scored_from_the_delta(self):
+        index = inverted_index.build_global_search_index()
+        added = Product.objects.create(user=self.enterprise, name="Cafe nuevo")
+        self.product.name = "Descuento"
+        self.product.save()
+        self.job.delete()
+
+        found = self._found(self.admin)
+        self.assertIs(inverted_index.get_global_search_index(), index)
+        self.assertIn((SearchEntry.KIND_PRODUCT, added.pk), found)
+        self.assertNotIn((SearchEntry.KIND_JOB, self.job.pk), found)
+        # El documento viejo sigue en el indice base pero la fila cambiada lo reemplaza.
+        self.assertEqual(self._found(self.admin, "gratis"), set())
+        self.assertIn((SearchEntry.KIND_PRODUCT, self.product.pk), self._found(self.admin, "descuento"))
+
+    def test_stale_index_is_served_while_a_replacement_is_built(self):
+        index = inverted_index.build_global_search_index()
+        inverted_index.invalidate_global_search_index()
+
+        # La consulta recibe el indice vigente; el reemplazo se publica para la siguiente.
+        self.assertIs(inverted_index.get_global_search_index(), index)
+        replacement = inverted_index.get_global_search_index()
+        self.assertIsNot(replacement, index)
+        self.assertIs(inverted_index.get_global_search_index(), replacement)
+
+        with inverted_index._build_lock:
+            self.assertFalse(inverted_index.schedule_global_search_rebuild())
+
+    def test_delta_overflow_schedules_a_rebuild_instead_of_building_inline(self):
+        inverted_index.build_global_search_index()
+        newest = [Product.objects.create(user=self.enterprise, name=f"Cafe {index}") for index in range(3)]
+        with mock.patch("apps.search.utils.entries.MAX_DELTA_ENTRIES", 2), mock.patch(
+            "apps.search.utils.entries.schedule_global_search_rebuild"
+        ) as schedule:
+            found = self._found(self.admin)
+        schedule.assert_called_once_with()
+        self.assertLessEqual({(SearchEntry.KIND_PRODUCT, product.pk) for product in newest[1:]}, found)
+
+
+class RebuildSearchEntriesTests(TestCase):
+    def test_rebuild_upserts_sources_and_drops_unseen_rows(self):
+        enterprise = UserAccount.objects.create(
+            email="empresa@example.com", username="empresa", enterprise="Cafe Andino", role="enterprise"
+        )
+        product = Product.objects.create(user=enterprise, name="Cafe gratis")
+        product_entry = entry_id(SearchEntry.KIND_PRODUCT, product.pk)
+        SearchEntry.objects.filter(pk=product_entry).update(title="viejo")
+        orphan = SearchEntry.objects.create(
+            id=entry_id(SearchEntry.KIND_PRODUCT, "huerfano"),
+            kind=SearchEntry.KIND_PRODUCT,
+            object_id=product.pk,
+            title="huerfano",
+            status="active",
+        )
+        SearchEntry.objects.filter(pk=orphan.pk).update(updated=timezone.now() - datetime.timedelta(days=1))
+
+        totals = rebuild_search_entries(chunk_size=1)
+
+        self.assertEqual(totals[SearchEntry.KIND_PRODUCT], 1)
+        self.assertEqual(totals[SearchEntry.KIND_ENTERPRISE], 1)
+        self.assertEqual(SearchEntry.objects.get(pk=product_entry).title, "Cafe gratis")
+        self.assertFalse(SearchEntry.objects.filter(pk=orphan.pk).exists())
+        self.assertEqual(SearchEntry.objects.count(), 2)
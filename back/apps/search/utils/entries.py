@@ -0,0 +1,375 @@
+import uuid
+from collections import Counter
+
+import numpy as np
+from django.db.models import Q
+from django.utils import timezone
+
+from core.utils.search import build_search_document, search_tokens
+from .inverted_index import (
+    MAX_DELTA_ENTRIES,
+    MIN_PREFIX_LENGTH,
+    bm25_weight,
+    get_global_search_index,
+    invalidate_global_search_index,
+    schedule_global_search_rebuild,
+    visible_enterprise_ids,
+)
+
+ENTRY_ID_NAMESPACE = uuid.UUID("0f745b60-8bd7-4bb3-a65b-049ca2e0baef")
+ENTRY_UPDATE_FIELDS = ["kind", "object_id", "owner", "title", "subtitle", "document", "status", "start_date", "end_date", "updated"]
+GLOBAL_SEARCH_DEFAULT_LIMIT = 20
+GLOBAL_SEARCH_MAX_LIMIT = 50
+
+
+def entry_id(kind, object_id):
+    return uuid.uuid5(ENTRY_ID_NAMESPACE, f"{kind}:{object_id}")
+
+
+def _owner_name(owner):
+    if owner is None:
+        return ""
+    return owner.enterprise or owner.username or ""
+
+
+def _entry(kind, object_id, **fields):
+    from ..models import SearchEntry
+
+    return SearchEntry(id=entry_id(kind, object_id), kind=kind, object_id=object_id, **fields)
+
+
+def _product_entries(object_ids=None, owner_ids=None):
+    from apps.products.models import Product
+    from ..models import SearchEntry
+
+    products = Product.objects.select_related("user").only(
+        "id", "name", "finished", "search_document", "user__enterprise", "user__username"
+    )
+    if object_ids is not None:
+        products = products.filter(pk__in=object_ids)
+    if owner_ids is not None:
+        products = products.filter(user_id__in=owner_ids)
+    for product in products.iterator(chunk_size=1000):
+        yield _entry(
+            SearchEntry.KIND_PRODUCT,
+            product.pk,
+            owner_id=product.user_id,
+            title=product.name[:255],
+            subtitle=_owner_name(product.user)[:255],
+            document=product.search_document,
+            status="finished" if product.finished else "active",
+        )
+
+
+def _job_entries(object_ids=None, owner_ids=None):
+    from apps.job.models import JobBoard
+    from ..models import SearchEntry
+
+    jobs = JobBoard.objects.select_related("user").only(
+        "id", "title", "status", "start_date", "end_date", "search_document", "user__enterprise", "user__username"
+    )
+    if object_ids is not None:
+        jobs = jobs.filter(pk__in=object_ids)
+    if owner_ids is not None:
+        jobs = jobs.filter(user_id__in=owner_ids)
+    for job in jobs.iterator(chunk_size=1000):
+        yield _entry(
+            SearchEntry.KIND_JOB,
+            job.pk,
+            owner_id=job.user_id,
+            title=job.title[:255],
+            subtitle=_owner_name(job.user)[:255],
+            document=job.search_document,
+            status=job.status,
+            start_date=job.start_date,
+            end_date=job.end_date,
+        )
+
+
+def _project_entries(object_ids=None):
+    from apps.project.models import Project
+    from ..models import SearchEntry
+
+    projects = Project.objects.only("id", "user_id", "title", "department", "municipality", "status", "search_document")
+    if object_ids is not None:
+        projects = projects.filter(pk__in=object_ids)
+    for project in projects.iterator(chunk_size=1000):
+        yield _entry(
+            SearchEntry.KIND_PROJECT,
+            project.pk,
+            owner_id=project.user_id,
+            title=project.title[:255],
+            subtitle=f"{project.municipality}, {project.department}"[:255],
+            document=project.search_document,
+            status=project.status,
+        )
+
+
+def _licitation_entries(object_ids=None):
+    from apps.project.models import LicitationOpportunity
+    from ..models import SearchEntry
+
+    licitations = LicitationOpportunity.objects.only(
+        "id", "user_id", "title", "contracting_entity", "department", "status", "search_document"
+    )
+    if object_ids is not None:
+        licitations = licitations.filter(pk__in=object_ids)
+    for licitation in licitations.iterator(chunk_size=1000):
+        yield _entry(
+            SearchEntry.KIND_LICITATION,
+            licitation.pk,
+            owner_id=licitation.user_id,
+            title=licitation.title[:255],
+            subtitle=(licitation.contracting_entity or licitation.department or "")[:255],
+            document=licitation.search_document,
+            status=licitation.status,
+        )
+
+
+def _enterprise_entries(object_ids=None):
+    from apps.user.models import UserAccount
+    from ..models import SearchEntry
+
+    enterprises = UserAccount.objects.filter(role="enterprise").select_related("userprofile").only(
+        "id", "enterprise", "username", "is_active", "verified", "userprofile__niche", "userprofile__description"
+    )
+    if object_ids is not None:
+        enterprises = enterprises.filter(pk__in=object_ids)
+    for enterprise in enterprises.iterator(chunk_size=1000):
+        profile = getattr(enterprise, "userprofile", None)
+        niche = getattr(profile, "niche", None) or ""
+        yield _entry(
+            SearchEntry.KIND_ENTERPRISE,
+            enterprise.pk,
+            owner_id=enterprise.pk,
+            title=_owner_name(enterprise)[:255],
+            subtitle=niche[:255],
+            document=build_search_document(
+                enterprise.enterprise,
+                enterprise.username,
+                niche,
+                getattr(profile, "description", None),
+            ),
+            status="active" if enterprise.is_active and enterprise.verified else "inactive",
+        )
+
+
+def _entry_builders():
+    from ..models import SearchEntry
+
+    return {
+        SearchEntry.KIND_PRODUCT: _product_entries,
+        SearchEntry.KIND_JOB: _job_entries,
+        SearchEntry.KIND_PROJECT: _project_entries,
+        SearchEntry.KIND_LICITATION: _licitation_entries,
+        SearchEntry.KIND_ENTERPRISE: _enterprise_entries,
+    }
+
+
+def _upsert(entries):
+    from ..models import SearchEntry
+
+    if not entries:
+        return 0
+    SearchEntry.objects.bulk_create(
+        entries,
+        update_conflicts=True,
+        unique_fields=["id"],
+        update_fields=ENTRY_UPDATE_FIELDS,
+    )
+    return len(entries)
+
+
+def sync_search_entries(kind, object_ids):
+    """
+    Recalcula las entradas de los objetos dados; los que ya no existen (o ya no son
+    empresa) se eliminan del indice.
+    """
+    object_ids = list(object_ids)
+    entries = list(_entry_builders()[kind](object_ids=object_ids))
+    _upsert(entries)
+    synced = {entry.object_id for entry in entries}
+    missing = [object_id for object_id in object_ids if object_id not in synced]
+    if missing:
+        remove_search_entries(kind, missing)
+    return entries
+
+
+def sync_enterprise_entries(account, include_content=True):
+    from ..models import SearchEntry
+
+    previous = (
+        SearchEntry.objects.filter(pk=entry_id(SearchEntry.KIND_ENTERPRISE, account.pk))
+        .values_list("title", "document")
+        .first()
+    )
+    entries = sync_search_entries(SearchEntry.KIND_ENTERPRISE, [account.pk])
+    if not include_content or account.role != "enterprise":
+        return
+    # El nombre de la empresa es el subtitulo y hace parte del documento de su contenido:
+    # solo se reescribe si cambio enterprise o username (titulo o documento de su entrada;
+    # nicho y descripcion ya los sincroniza el guardado del perfil).
+    if previous is not None and entries and previous == (entries[0].title, entries[0].document):
+        return
+    _upsert(list(_product_entries(owner_ids=[account.pk])) + list(_job_entries(owner_ids=[account.pk])))
+
+
+def remove_search_entries(kind, object_ids):
+    from ..models import SearchEntry
+
+    # Las filas borradas que aun esten en el indice en memoria se descartan al leer.
+    SearchEntry.objects.filter(pk__in=[entry_id(kind, object_id) for object_id in object_ids]).delete()
+
+
+def rebuild_search_entries(chunk_size=1000):
+    """
+    Reconstruye todo el indice global desde los modelos origen. Retorna {tipo: filas}.
+    Las entradas se reescriben sobre las existentes y al final se borran las que no se
+    tocaron: la busqueda sigue respondiendo mientras corre y un fallo a mitad de camino
+    no deja el indice vacio.
+    """
+    from ..models import SearchEntry
+
+    totals = {}
+    started = timezone.now()
+    for kind, builder in _entry_builders().items():
+        total = 0
+        batch = []
+        for entry in builder():
+            batch.append(entry)
+            if len(batch) >= chunk_size:
+                total += _upsert(batch)
+                batch = []
+        total += _upsert(batch)
+        totals[kind] = total
+    # updated (auto_now) se reescribe en cada upsert: lo anterior a started ya no existe.
+    SearchEntry.objects.filter(updated__lt=started).delete()
+    # Los procesos web reconstruyen en segundo plano al ver la version nueva.
+    invalidate_global_search_index()
+    return totals
+
+
+def visible_search_entries(user, now=None):
+    """
+    Entradas que el rol puede ver:
+    - employees: beneficios activos, empleos vigentes y empresas visibles para empleados.
+    - enterprise: su propio contenido, proyectos y licitaciones publicadas y empresas activas.
+    - Admin: todo salvo beneficios finalizados.
+    """
+    from ..models import SearchEntry
+
+    now = now or timezone.now()
+    active_products = Q(kind=SearchEntry.KIND_PRODUCT, status="active")
+    role = getattr(user, "role", None)
+
+    if role == "employees":
+        active_jobs = (
+            Q(kind=SearchEntry.KIND_JOB, status="published")
+            & (Q(start_date__isnull=True) | Q(start_date__lte=now))
+            & (Q(end_date__isnull=True) | Q(end_date__gte=now))
+        )
+        return SearchEntry.objects.filter(
+            active_products | active_jobs | Q(kind=SearchEntry.KIND_ENTERPRISE),
+            owner_id__in=visible_enterprise_ids(),
+        )
+    if role == "enterprise":
+        return SearchEntry.objects.filter(
+            (Q(owner=user) & (active_products | Q(kind=SearchEntry.KIND_JOB)))
+            | Q(kind__in=[SearchEntry.KIND_PROJECT, SearchEntry.KIND_LICITATION], status="published")
+            | Q(kind=SearchEntry.KIND_ENTERPRISE, status="active")
+        )
+    if role == "Admin":
+        return SearchEntry.objects.filter(active_products | ~Q(kind=SearchEntry.KIND_PRODUCT))
+    return SearchEntry.objects.none()
+
+
+def _delta_scores(index, rows, tokens):
+    """
+    Puntajes BM25 de las entradas cambiadas despues del indice base, con las
+    estadisticas del indice (los pesos quedan en la misma escala).
+    """
+    scored = []
+    for entry_id_, document in rows:
+        terms = Counter((document or "").split())
+        length = sum(terms.values())
+        score = 0.0
+        for token in tokens:
+            candidates = [term for term in terms if term == token or (len(token) >= MIN_PREFIX_LENGTH and term.startswith(token))]
+            if not candidates:
+                break
+            score += max(
+                bm25_weight(
+                    terms[term],
+                    length,
+                    index.document_frequency(term),
+                    max(index.size, 1),
+                    index.average_length,
+                )
+                for term in candidates
+            )
+        else:
+            scored.append((score, entry_id_))
+    return scored
+
+
+def global_search(user, text, kinds=None, limit=GLOBAL_SEARCH_DEFAULT_LIMIT):
+    """
+    Entradas visibles mas relevantes para el texto, con search_rank. El indice base en
+    memoria resuelve el grueso; las entradas cambiadas despues de construirlo se leen
+    de la base de datos (pocas, por el indice de updated) y se puntuan aparte.
+    """
+    from ..models import SearchEntry
+
+    tokens = list(dict.fromkeys(search_tokens(text)))
+    if not tokens:
+        return []
+
+    index = get_global_search_index()
+    changed_ids = list(
+        SearchEntry.objects.filter(updated__gt=index.watermark)
+        .order_by("-updated")
+        .values_list("id", flat=True)[:MAX_DELTA_ENTRIES + 1]
+    )
+    if len(changed_ids) > MAX_DELTA_ENTRIES:
+        # Demasiados cambios para el delta: se reconstruye en segundo plano y, mientras
+        # tanto, se puntuan los mas recientes (el resto usa su version del indice base).
+        schedule_global_search_rebuild()
+        changed_ids = changed_ids[:MAX_DELTA_ENTRIES]
+
+    now = timezone.now()
+    mask, scores = index.match(tokens)
+    if user.role == "employees":
+        mask &= index.visibility(user, now, visible_enterprise_ids())
+    else:
+        mask &= index.visibility(user, now)
+    if kinds:
+        mask &= np.isin(index.kinds, [index.kind_codes[kind] for kind in kinds])
+    changed_positions = [index.positions[pk] for pk in changed_ids if pk in index.positions]
+    mask[changed_positions] = False
+
+    # Margen para las filas borradas que aun estan en el indice base.
+    wanted = limit * 2
+    candidates = np.flatnonzero(mask)
+    if len(candidates) > wanted:
+        candidates = candidates[np.argpartition(-scores[candidates], wanted - 1)[:wanted]]
+    hits = [(float(scores[position]), index.ids[position]) for position in candidates.tolist()]
+
+    if changed_ids:
+        changed = visible_search_entries(user, now).filter(pk__in=changed_ids)
+        if kinds:
+            changed = changed.filter(kind__in=kinds)
+        hits += _delta_scores(index, changed.values_list("id", "document"), tokens)
+
+    hits.sort(key=lambda hit: -hit[0])
+    rows = SearchEntry.objects.only("id", "kind", "object_id", "title", "subtitle").in_bulk(
+        [pk for _, pk in hits[:wanted]]
+    )
+    results = []
+    for score, pk in hits:
+        entry = rows.get(pk)
+        if entry is not None:
+            entry.search_rank = score
+            results.append(entry)
+            if len(results) >= limit:
+                break
+    return results
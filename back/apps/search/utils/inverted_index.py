@@ -0,0 +1,264 @@
+import bisect
+import logging
+import math
+import os
+import threading
+import time
+from collections import Counter
+
+import numpy as np
+from django.core.cache import cache
+from django.db import connections
+from django.utils import timezone
+
+from apps.user.utils.employee_dashboard import EMPLOYEE_DASHBOARD_NAMESPACE, EMPLOYEE_DASHBOARD_TIMEOUT
+from core.utils.cache import bump_cache_version, get_cache_version, versioned_key
+
+GLOBAL_SEARCH_NAMESPACE = "global-search"
+BM25_K1 = 1.2
+BM25_B = 0.75
+# Cambios posteriores al indice base que se resuelven por consulta; con mas se reconstruye.
+MAX_DELTA_ENTRIES = 2000
+INDEX_MAX_AGE = 60 * 30
+# Prefijos mas cortos solo coinciden con el termino exacto ("ca" no expande a todo el vocabulario).
+MIN_PREFIX_LENGTH = 3
+MAX_PREFIX_EXPANSIONS = 200
+
+logger = logging.getLogger(__name__)
+
+# Indice base por proceso: {"index", "version", "built_at"}. Se reemplaza entero (nunca
+# se modifica en sitio), asi que leerlo no necesita lock.
+_state = None
+# Tomado durante toda construccion: a lo sumo una por proceso a la vez.
+_build_lock = threading.Lock()
+
+
+def _timestamp(value):
+    return value.timestamp() if value is not None else np.nan
+
+
+def bm25_weight(tf, doc_length, document_frequency, total_documents, average_length):
+    idf = math.log(1.0 + (total_documents - document_frequency + 0.5) / (document_frequency + 0.5))
+    norm = BM25_K1 * (1.0 - BM25_B + BM25_B * doc_length / average_length)
+    return idf * tf * (BM25_K1 + 1.0) / (tf + norm)
+
+
+class GlobalSearchIndex:
+    """
+    Indice invertido en memoria sobre SearchEntry. Cada posting guarda su peso BM25 ya
+    calculado: consultar es sumar arreglos NumPy, sin importar cuan comun sea el termino.
+    Las columnas de visibilidad (tipo, estado, dueño, fechas) permiten filtrar por rol
+    con mascaras.
+    """
+
+    def __init__(self, rows, watermark):
+        from ..models import SearchEntry
+
+        self.watermark = watermark
+        self.kind_codes = {kind: code for code, (kind, _) in enumerate(SearchEntry.options_kind)}
+        self.ids = []
+        self.positions = {}
+        kinds, statuses, owners, starts, ends, lengths = [], [], [], [], [], []
+        owner_codes = {}
+        term_codes = {}
+        posting_terms, posting_positions, posting_frequencies = [], [], []
+        for entry_id, kind, owner_id, status, start_date, end_date, document in rows:
+            position = len(self.ids)
+            self.ids.append(entry_id)
+            self.positions[entry_id] = position
+            kinds.append(self.kind_codes[kind])
+            statuses.append(status)
+            owners.append(owner_codes.setdefault(owner_id, len(owner_codes)) if owner_id else -1)
+            starts.append(_timestamp(start_date))
+            ends.append(_timestamp(end_date))
+            tokens = (document or "").split()
+            lengths.append(len(tokens))
+            for term, tf in Counter(tokens).items():
+                posting_terms.append(term_codes.setdefault(term, len(term_codes)))
+                posting_positions.append(position)
+                posting_frequencies.append(tf)
+
+        self.size = len(self.ids)
+        self.kinds = np.asarray(kinds, dtype=np.int8)
+        self.statuses = np.asarray(statuses, dtype=object)
+        self.owner_codes = owner_codes
+        self.owners = np.asarray(owners, dtype=np.int64)
+        self.starts = np.asarray(starts, dtype=np.float64)
+        self.ends = np.asarray(ends, dtype=np.float64)
+        lengths = np.asarray(lengths, dtype=np.float32)
+        self.average_length = float(lengths.mean()) if self.size and lengths.mean() > 0 else 1.0
+
+        # Postings en formato CSR: los del termino t son [offsets[t], offsets[t + 1]).
+        posting_terms = np.asarray(posting_terms, dtype=np.int32)
+        order = np.argsort(posting_terms, kind="stable")
+        posting_terms = posting_terms[order]
+        positions = np.asarray(posting_positions, dtype=np.int32)[order]
+        frequencies = np.asarray(posting_frequencies, dtype=np.float32)[order]
+        frequency_by_term = np.bincount(posting_terms, minlength=len(term_codes))
+        idf = np.log(1.0 + (self.size - frequency_by_term + 0.5) / (frequency_by_term + 0.5))
+        norm = BM25_K1 * (1.0 - BM25_B + BM25_B * lengths[positions] / self.average_length)
+        self.posting_positions = positions
+        self.posting_weights = (idf[posting_terms] * frequencies * (BM25_K1 + 1.0) / (frequencies + norm)).astype(np.float32)
+        self.offsets = np.concatenate([[0], np.cumsum(frequency_by_term)])
+        self.term_codes = term_codes
+        self.vocabulary = sorted(term_codes)
+
+    def document_frequency(self, term):
+        code = self.term_codes.get(term)
+        return 0 if code is None else int(self.offsets[code + 1] - self.offsets[code])
+
+    def postings(self, term):
+        code = self.term_codes[term]
+        start, end = self.offsets[code], self.offsets[code + 1]
+        return self.posting_positions[start:end], self.posting_weights[start:end]
+
+    def expand(self, token):
+        if len(token) < MIN_PREFIX_LENGTH:
+            return [token] if token in self.term_codes else []
+        start = bisect.bisect_left(self.vocabulary, token)
+        end = bisect.bisect_left(self.vocabulary, token + "\uffff")
+        return self.vocabulary[start:min(end, start + MAX_PREFIX_EXPANSIONS)]
+
+    def match(self, tokens):
+        """
+        (mascara, puntajes): documentos que contienen todos los terminos (cada uno como
+        prefijo); el puntaje por termino es el mejor peso entre sus expansiones.
+        """
+        mask = np.ones(self.size, dtype=bool)
+        scores = np.zeros(self.size, dtype=np.float32)
+        for token in tokens:
+            token_scores = np.zeros(self.size, dtype=np.float32)
+            for term in self.expand(token):
+                positions, weights = self.postings(term)
+                np.maximum.at(token_scores, positions, weights)
+            mask &= token_scores > 0
+            scores += token_scores
+        return mask, scores
+
+    def visibility(self, user, now, visible_owner_ids=()):
+        # Mismas reglas que visible_search_entries(), sobre las columnas del indice.
+        from ..models import SearchEntry
+
+        kind_code = self.kind_codes
+        products = (self.kinds == kind_code[SearchEntry.KIND_PRODUCT]) & (self.statuses == "active")
+        jobs = self.kinds == kind_code[SearchEntry.KIND_JOB]
+        role = getattr(user, "role", None)
+        if role == "employees":
+            timestamp = now.timestamp()
+            active_jobs = (
+                jobs
+                & (self.statuses == "published")
+                & (np.isnan(self.starts) | (self.starts <= timestamp))
+                & (np.isnan(self.ends) | (self.ends >= timestamp))
+            )
+            owner_codes = [self.owner_codes[owner_id] for owner_id in visible_owner_ids if owner_id in self.owner_codes]
+            visible_owner = np.isin(self.owners, np.asarray(owner_codes, dtype=np.int64))
+            return visible_owner & (products | active_jobs | (self.kinds == kind_code[SearchEntry.KIND_ENTERPRISE]))
+        if role == "enterprise":
+            own_code = self.owner_codes.get(user.pk, -2)
+            published = np.isin(
+                self.kinds, [kind_code[SearchEntry.KIND_PROJECT], kind_code[SearchEntry.KIND_LICITATION]]
+            ) & (self.statuses == "published")
+            active_enterprises = (self.kinds == kind_code[SearchEntry.KIND_ENTERPRISE]) & (self.statuses == "active")
+            return ((self.owners == own_code) & (products | jobs)) | published | active_enterprises
+        if role == "Admin":
+            return products | (self.kinds != kind_code[SearchEntry.KIND_PRODUCT])
+        return np.zeros(self.size, dtype=bool)
+
+
+def _load_rows():
+    from ..models import SearchEntry
+
+    return SearchEntry.objects.order_by().values_list(
+        "id", "kind", "owner_id", "status", "start_date", "end_date", "document"
+    ).iterator(chunk_size=5000)
+
+
+def build_global_search_index():
+    """
+    Construye el indice desde SearchEntry y lo publica con un solo reemplazo de
+    referencia: las consultas en curso siguen con el anterior.
+    """
+    global _state
+    version = get_cache_version(GLOBAL_SEARCH_NAMESPACE)
+    # La marca se toma antes de leer: lo que cambie durante la lectura queda en el delta.
+    watermark = timezone.now()
+    index = GlobalSearchIndex(_load_rows(), watermark)
+    _state = {"index": index, "version": version, "built_at": time.monotonic()}
+    return index
+
+
+def _build_and_release():
+    try:
+        build_global_search_index()
+    except Exception:
+        logger.exception("No se pudo reconstruir el indice de busqueda global")
+    finally:
+        connections.close_all()
+        _build_lock.release()
+
+
+def schedule_global_search_rebuild():
+    """
+    Reconstruye el indice en un hilo aparte, si no hay ya una construccion en curso.
+    Retorna False si no se lanzo.
+    """
+    if not _build_lock.acquire(blocking=False):
+        return False
+    try:
+        threading.Thread(target=_build_and_release, name="global-search-index", daemon=True).start()
+    except Exception:
+        _build_lock.release()
+        raise
+    return True
+
+
+def warm_global_search_index():
+    # Para el arranque del servidor (wsgi/asgi): la primera consulta ya encuentra el indice.
+    return schedule_global_search_rebuild()
+
+
+def get_global_search_index():
+    """
+    Indice actual sin construir en la consulta: si esta vencido (edad o version) se
+    sigue usando mientras un hilo arma el reemplazo. Solo si el proceso aun no tiene
+    ninguno (sin precalentar) la consulta espera la primera construccion.
+    """
+    state = _state
+    if state is None:
+        with _build_lock:
+            state = _state
+            if state is None:
+                return build_global_search_index()
+    stale = (
+        state["version"] != get_cache_version(GLOBAL_SEARCH_NAMESPACE)
+        or time.monotonic() - state["built_at"] >= INDEX_MAX_AGE
+    )
+    if stale:
+        schedule_global_search_rebuild()
+    return state["index"]
+
+
+def _reset_after_fork():
+    # Un hijo creado mientras el padre construia heredaria el lock tomado para siempre.
+    global _build_lock
+    _build_lock = threading.Lock()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_after_fork)
+
+
+def invalidate_global_search_index():
+    bump_cache_version(GLOBAL_SEARCH_NAMESPACE)
+
+
+def visible_enterprise_ids():
+    cache_key = versioned_key(EMPLOYEE_DASHBOARD_NAMESPACE, "visible-enterprise-ids")
+    enterprise_ids = cache.get(cache_key)
+    if enterprise_ids is None:
+        from apps.user.models import UserAccount
+
+        enterprise_ids = list(UserAccount.objects.visible_to_employees().values_list("id", flat=True))
+        cache.set(cache_key, enterprise_ids, timeout=EMPLOYEE_DASHBOARD_TIMEOUT)
+    return enterprise_ids
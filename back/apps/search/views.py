@@ -0,0 +1,52 @@
+from rest_framework import status
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from core.utils.search import search_tokens
+from .models import SearchEntry
+from .utils.entries import GLOBAL_SEARCH_DEFAULT_LIMIT, GLOBAL_SEARCH_MAX_LIMIT, global_search
+
+
+class GlobalSearchView(APIView):
+    """
+    Busqueda global: ?q=texto&types=product,job&limit=20. Un solo indice para beneficios,
+    empleos, proyectos, licitaciones y empresas, filtrado segun el rol.
+    """
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request, *args, **kwargs):
+        query = (request.query_params.get("q") or "").strip()
+        valid_kinds = {kind for kind, _ in SearchEntry.options_kind}
+        kinds = [
+            kind.strip()
+            for kind in (request.query_params.get("types") or "").split(",")
+            if kind.strip()
+        ]
+        invalid_kinds = [kind for kind in kinds if kind not in valid_kinds]
+        if invalid_kinds:
+            return Response(
+                {"error": f"Tipos no validos: {', '.join(invalid_kinds)}."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        try:
+            limit = int(request.query_params.get("limit") or GLOBAL_SEARCH_DEFAULT_LIMIT)
+        except ValueError:
+            return Response({"error": "limit debe ser un numero."}, status=status.HTTP_400_BAD_REQUEST)
+        limit = max(1, min(limit, GLOBAL_SEARCH_MAX_LIMIT))
+
+        if not search_tokens(query):
+            return Response({"query": query, "results": []}, status=status.HTTP_200_OK)
+
+        entries = global_search(request.user, query, kinds=kinds, limit=limit)
+        results = [
+            {
+                "type": entry.kind,
+                "id": str(entry.object_id),
+                "title": entry.title,
+                "subtitle": entry.subtitle,
+                "rank": round(entry.search_rank or 0.0, 6),
+            }
+            for entry in entries
+        ]
+        return Response({"query": query, "results": results}, status=status.HTTP_200_OK)
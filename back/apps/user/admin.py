@@ -6,6 +6,7 @@ from .models import (
     OneTimePassword,
     EnterpriseMonthlyPayment,
     EnterprisePaymentNotificationLog,
+    EnterpriseSuggestion,
 )
 from unfold.forms import AdminPasswordChangeForm, UserChangeForm, UserCreationForm
 from django.utils.translation import gettext_lazy as _
@@ -27,7 +28,7 @@ class UserAccountAdmin(BaseUserAdmin, ModelAdmin):
         ),
         (
             _("Enterprise info"),
-            {"fields": ("enterprise",)},
+            {"fields": ("enterprise", "employer")},
         ),
         (
             _("Permissions"),
@@ -43,7 +44,7 @@ class UserAccountAdmin(BaseUserAdmin, ModelAdmin):
             },
         ),
         (_("Important dates"), {"fields": ("last_login", "date_joined", "updated_at")}),
-        (_("Account status"), {"fields": ("verified",)}),
+        (_("Account status"), {"fields": ("verified", "billing_blocked", "billing_blocked_since")}),
     )
 
     # Fields to be used when creating a user.
@@ -67,11 +68,12 @@ class UserAccountAdmin(BaseUserAdmin, ModelAdmin):
         "role",
         "verified",
     )
-    list_filter = ("is_staff", "is_active", "is_superuser", "role", "verified", "document_type", "gender")
+    list_filter = ("is_staff", "is_active", "is_superuser", "role", "verified", "billing_blocked", "document_type", "gender")
     search_fields = ("email", "username", "first_name", "last_name", "nuip", "phone", "enterprise")
-    readonly_fields = ("date_joined", "updated_at")
+    readonly_fields = ("date_joined", "updated_at", "billing_blocked", "billing_blocked_since")
     ordering = ("-date_joined",)
     filter_horizontal = ("groups", "user_permissions")
+    autocomplete_fields = ("employer",)
 
 
 @admin.register(UserProfile)
@@ -191,3 +193,11 @@ class EnterprisePaymentNotificationLogAdmin(ModelAdmin):
         "payment__id",
     )
     readonly_fields = ("sent_at",)
+
+
+@admin.register(EnterpriseSuggestion)
+class EnterpriseSuggestionAdmin(ModelAdmin):
+    list_display = ("enterprise", "stale", "updated_at")
+    list_filter = ("stale",)
+    search_fields = ("enterprise__email", "enterprise__enterprise")
+    readonly_fields = ("related_enterprise_ids", "product_ids", "job_ids", "updated_at")
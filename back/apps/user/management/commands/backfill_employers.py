@@ -0,0 +1,61 @@
+from django.core.management.base import BaseCommand
+
+from apps.user.models import UserAccount
+from apps.user.utils.enterprise_index import build_enterprise_index, lookup_enterprise_id
+
+
+class Command(BaseCommand):
+    help = (
+        "Asigna UserAccount.employer a los empleados a partir de la referencia libre "
+        "UserAccount.enterprise (UUID, nombre, username o email de la empresa)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--chunk-size", type=int, default=500)
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Solo reporta lo que se asignaria, sin escribir.",
+        )
+
+    def handle(self, *args, **options):
+        chunk_size = max(1, options["chunk_size"])
+        dry_run = options["dry_run"]
+
+        # Indice fresco (no el cacheado): mismas reglas de resolucion que el login.
+        index = build_enterprise_index()
+        resolved_total = 0
+        unresolved_total = 0
+        last_pk = None
+
+        while True:
+            employees = UserAccount.objects.filter(
+                role="employees",
+                employer__isnull=True,
+            ).order_by("pk")
+            if last_pk is not None:
+                employees = employees.filter(pk__gt=last_pk)
+            chunk = list(employees.only("id", "enterprise")[:chunk_size])
+            if not chunk:
+                break
+            last_pk = chunk[-1].pk
+
+            to_update = []
+            for employee in chunk:
+                employer_id = lookup_enterprise_id(employee.enterprise, index)
+                if employer_id:
+                    employee.employer_id = employer_id
+                    to_update.append(employee)
+                else:
+                    unresolved_total += 1
+
+            if to_update and not dry_run:
+                UserAccount.objects.bulk_update(to_update, ["employer"], batch_size=chunk_size)
+            resolved_total += len(to_update)
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"{'[dry-run] ' if dry_run else ''}Empleados asignados: {resolved_total}. "
+                f"Sin empresa resoluble: {unresolved_total}."
+            )
+        )
@@ -0,0 +1,86 @@
+from django.core.management.base import BaseCommand
+
+from apps.user.models import UserAccount
+from apps.user.utils.phone import normalize_colombian_phone
+
+
+class Command(BaseCommand):
+    help = (
+        "Calcula UserAccount.phone_normalized para los usuarios existentes. "
+        "Si varios usuarios comparten numero, lo conserva el registro mas antiguo "
+        "y el resto queda sin normalizar y se reporta para depuracion manual."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--chunk-size", type=int, default=500)
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Solo reporta asignaciones y colisiones, sin escribir.",
+        )
+
+    def handle(self, *args, **options):
+        chunk_size = max(1, options["chunk_size"])
+        dry_run = options["dry_run"]
+
+        # Una sola pasada ordenada por antiguedad: el primero que reclama un numero lo conserva.
+        owners = {}
+        collisions = {}
+        rows = (
+            UserAccount.objects.exclude(phone__isnull=True)
+            .exclude(phone="")
+            .order_by("date_joined", "pk")
+            .values_list("id", "email", "phone")
+            .iterator(chunk_size=2000)
+        )
+        for user_id, email, phone in rows:
+            normalized = normalize_colombian_phone(phone)
+            if not normalized:
+                continue
+            if normalized in owners:
+                collisions.setdefault(normalized, [owners[normalized][1]]).append(email)
+                continue
+            owners[normalized] = (user_id, email)
+
+        assigned = {user_id: normalized for normalized, (user_id, _) in owners.items()}
+        updated_total = 0
+        last_pk = None
+
+        while True:
+            users = UserAccount.objects.order_by("pk")
+            if last_pk is not None:
+                users = users.filter(pk__gt=last_pk)
+            chunk = list(users.only("id", "phone_normalized")[:chunk_size])
+            if not chunk:
+                break
+            last_pk = chunk[-1].pk
+
+            to_update = []
+            for user in chunk:
+                target = assigned.get(user.pk)
+                if user.phone_normalized != target:
+                    user.phone_normalized = target
+                    to_update.append(user)
+
+            if to_update and not dry_run:
+                # Primero se liberan los valores para no chocar con el indice unico dentro del lote.
+                UserAccount.objects.filter(pk__in=[user.pk for user in to_update]).update(
+                    phone_normalized=None
+                )
+                UserAccount.objects.bulk_update(to_update, ["phone_normalized"], batch_size=chunk_size)
+            updated_total += len(to_update)
+
+        for normalized, emails in collisions.items():
+            self.stdout.write(
+                self.style.WARNING(
+                    f"Telefono duplicado {normalized}: se conserva {emails[0]}; "
+                    f"sin normalizar: {', '.join(emails[1:])}"
+                )
+            )
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"{'[dry-run] ' if dry_run else ''}Usuarios actualizados: {updated_total}. "
+                f"Numeros con colision: {len(collisions)}."
+            )
+        )
@@ -0,0 +1,41 @@
+from django.core.management.base import BaseCommand
+
+from apps.user.models import EnterpriseSuggestion, UserAccount
+from apps.user.utils.suggestions import refresh_enterprise_suggestions
+
+
+class Command(BaseCommand):
+    help = (
+        "Construye el indice de sugerencias por empresa (empresas, beneficios y empleos "
+        "relacionados por nicho y categorias). Con --stale solo recalcula las marcadas; "
+        "pensado para correr periodicamente (cron)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--chunk-size", type=int, default=200)
+        parser.add_argument(
+            "--stale",
+            action="store_true",
+            help="Solo recalcula empresas sin indice o marcadas como desactualizadas.",
+        )
+
+    def handle(self, *args, **options):
+        chunk_size = max(1, options["chunk_size"])
+        enterprises = UserAccount.objects.filter(role="enterprise")
+        if options["stale"]:
+            fresh_ids = EnterpriseSuggestion.objects.filter(stale=False).values("enterprise_id")
+            enterprises = enterprises.exclude(id__in=fresh_ids)
+
+        refreshed_total = 0
+        last_pk = None
+        while True:
+            chunk = enterprises.order_by("pk")
+            if last_pk is not None:
+                chunk = chunk.filter(pk__gt=last_pk)
+            chunk_ids = list(chunk.values_list("id", flat=True)[:chunk_size])
+            if not chunk_ids:
+                break
+            last_pk = chunk_ids[-1]
+            refreshed_total += len(refresh_enterprise_suggestions(chunk_ids))
+
+        self.stdout.write(self.style.SUCCESS(f"Sugerencias recalculadas: {refreshed_total}."))
@@ -0,0 +1,29 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from apps.user.utils.recommendations import build_recommendation_index
+
+
+class Command(BaseCommand):
+    help = (
+        "Construye la matriz TF-IDF (memory-mapped) de beneficios y empleos para el feed "
+        "\"recomendado para ti\". Por defecto es incremental: solo vectoriza items nuevos o editados."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--full",
+            action="store_true",
+            help="Vectoriza todas las filas desde cero (el IDF se recalcula en cada corrida).",
+        )
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        total, rebuilt = build_recommendation_index(full=options["full"])
+        elapsed_ms = round((time.perf_counter() - started) * 1000, 1)
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Indice de recomendaciones listo: {total} items, {rebuilt} vectorizados en {elapsed_ms} ms."
+            )
+        )
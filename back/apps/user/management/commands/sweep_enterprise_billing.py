@@ -0,0 +1,43 @@
+import uuid
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from apps.user.models import UserAccount
+from apps.user.utils.billing import refresh_enterprise_blocked_state
+
+
+class Command(BaseCommand):
+    help = (
+        "Marca pagos vencidos y recalcula el estado de bloqueo por mora de las empresas. "
+        "Programar en cron (ej. cada hora) para mantener billing_blocked al dia."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--enterprise-id",
+            dest="enterprise_id",
+            help="Limita el recalculo a una empresa.",
+        )
+
+    def handle(self, *args, **options):
+        enterprise_id = None
+        if options.get("enterprise_id"):
+            try:
+                enterprise_id = uuid.UUID(options["enterprise_id"])
+            except ValueError:
+                raise CommandError("--enterprise-id debe ser un UUID valido.")
+        today = timezone.localdate()
+
+        blocked_ids = refresh_enterprise_blocked_state(
+            [enterprise_id] if enterprise_id else None,
+            today,
+        )
+        total_blocked = UserAccount.objects.filter(role="enterprise", billing_blocked=True).count()
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Sweeper de mora ejecutado ({today}). "
+                f"Bloqueadas en alcance: {len(blocked_ids)}. Bloqueadas en total: {total_blocked}."
+            )
+        )
@@ -8,7 +8,15 @@ import uuid
 from django.utils import timezone
 from .utils.choices import DOCUMENT_TYPES,DOCUMENT_TYPES_ENTERPRISES ,GENDER_TYPES
 from .utils.img import image_picture_directory_path,image_banner_directory_path,image_rut_directory_path
-from django.db.models.signals import post_save
+from .utils.enterprise_index import invalidate_enterprise_index
+from .utils.employee_dashboard import invalidate_employee_dashboard
+from .utils.enterprise_map import invalidate_enterprise_map
+from .utils.suggestions import schedule_suggestion_refresh
+from .utils.phone import normalize_colombian_phone
+from core.utils.pagination import track_cached_counts
+from django.db.models import F, Value
+from django.db.models.functions import Length, Replace, Trim
+from django.db.models.signals import post_save, post_delete
 from django.dispatch import receiver
 from datetime import timedelta
 from decimal import Decimal
@@ -51,6 +59,48 @@ class UserAccountManager(BaseUserManager):
         user = self.create_user(email, password, **extra_fields)
         return user
 
+    # Campos obligatorios del perfil para que una empresa aparezca en el directorio de empleados.
+    EMPLOYEE_VISIBLE_REQUIRED_FIELDS = (
+        "email",
+        "first_name",
+        "last_name",
+        "enterprise",
+        "phone",
+        "userprofile__document_type_enterprise",
+        "userprofile__nuip_enterprise",
+        "userprofile__description",
+        "userprofile__niche",
+        "userprofile__address",
+    )
+
+    def visible_to_employees(self):
+        """
+        Empresas visibles para empleados en una sola consulta: activas, verificadas,
+        con perfil completo y sin bloqueo por mora (billing_blocked, que mantiene el
+        sweeper de facturacion).
+        """
+        lengths = {
+            f"required_len_{index}": _stripped_length(field)
+            for index, field in enumerate(self.EMPLOYEE_VISIBLE_REQUIRED_FIELDS)
+        }
+
+        return (
+            self.get_queryset()
+            .filter(role="enterprise", is_active=True, verified=True, billing_blocked=False)
+            .alias(**lengths)
+            .filter(**{f"{name}__gt": 0 for name in lengths})
+        )
+
+
+def _stripped_length(field):
+    # Largo del campo tras quitar espacios en los extremos. TRIM de SQL solo quita
+    # espacios, asi que tabs, saltos de linea y demas blancos ASCII se pasan antes a
+    # espacio, como str.strip(). Blancos unicode (p. ej. U+00A0) no se cubren.
+    expression = F(field)
+    for char in "\t\n\r\x0b\x0c":
+        expression = Replace(expression, Value(char), Value(" "))
+    return Length(Trim(expression))
+
 
 class UserAccount(AbstractBaseUser, PermissionsMixin):
     roles = (
@@ -83,7 +133,17 @@ class UserAccount(AbstractBaseUser, PermissionsMixin):
     document_type =     models.CharField(max_length=2, choices=DOCUMENT_TYPES, default='CC', blank=True)
     nuip =              models.CharField(max_length=11, blank=True, null=True)
     phone =             models.CharField(max_length=20, blank=True, null=True)
+    # Telefono normalizado (10 digitos, sin indicativo 57) con indice unico para validar duplicados.
+    phone_normalized =  models.CharField(max_length=20, unique=True, blank=True, null=True, editable=False)
     enterprise =        models.CharField(max_length=100, blank=True, null=True)
+    employer =          models.ForeignKey(
+                        "self",
+                        on_delete=models.SET_NULL,
+                        blank=True,
+                        null=True,
+                        related_name="employees",
+                        limit_choices_to={"role": "enterprise"},
+                        )
     
     gender =            models.CharField(max_length=10, choices=GENDER_TYPES, null=True, blank=True)
     is_active =         models.BooleanField(default=True)
@@ -91,6 +151,9 @@ class UserAccount(AbstractBaseUser, PermissionsMixin):
 
     role =              models.CharField(max_length=20, choices=roles, default="employees")
     verified =          models.BooleanField(default=False)
+    # Estado de bloqueo por mora (empresas), recalculado por el sweeper de facturación.
+    billing_blocked =   models.BooleanField(default=False, db_index=True)
+    billing_blocked_since = models.DateTimeField(blank=True, null=True)
 
     date_joined =       models.DateTimeField(default=timezone.now)
     updated_at =        models.DateTimeField(auto_now=True)
@@ -99,10 +162,36 @@ class UserAccount(AbstractBaseUser, PermissionsMixin):
     USERNAME_FIELD = "email"
     REQUIRED_FIELDS = ["first_name", "last_name"]
 
-    
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_phone = instance.__dict__.get("phone")
+        return instance
+
+    def refresh_from_db(self, *args, **kwargs):
+        super().refresh_from_db(*args, **kwargs)
+        self._loaded_phone = self.__dict__.get("phone")
+
+    def save(self, *args, **kwargs):
+        # Solo se recalcula cuando el telefono cambia: las filas que el backfill dejo
+        # sin normalizar por colision no deben romper guardados no relacionados.
+        if self._state.adding or self.phone != getattr(self, "_loaded_phone", self.phone):
+            self.phone_normalized = normalize_colombian_phone(self.phone) or None
+            update_fields = kwargs.get("update_fields")
+            if update_fields is not None and "phone" in update_fields:
+                kwargs["update_fields"] = {*update_fields, "phone_normalized"}
+        super().save(*args, **kwargs)
+        self._loaded_phone = self.phone
+
     def __str__(self):
         return self.email
 
+
+# Los inicios de sesion solo actualizan last_login y no cambian el listado de empleados.
+track_cached_counts(UserAccount, ignore_fields=("last_login",))
+
+
 class UserProfile(models.Model):
     id =                        models.UUIDField(default=uuid.uuid4, unique=True, primary_key=True)
     user =                      models.OneToOneField(UserAccount, on_delete=models.CASCADE)
@@ -124,6 +213,10 @@ class UserProfile(models.Model):
         verbose_name = "Perfil Empresarial"
         verbose_name_plural = "Perfiles Empresariales"
         ordering = ["-created_at"]
+        indexes = [
+            # Prefiltro por caja (bbox) de la busqueda "empresas cerca de mi".
+            models.Index(fields=["latitude", "longitude"], name="userprofile_lat_lng_idx"),
+        ]
         
     def __str__(self):
         return str(self.user.email)
@@ -257,7 +350,86 @@ class EnterprisePaymentNotificationLog(models.Model):
         return f"Notif stage {self.stage} - {self.enterprise.email} - pago {self.payment_id}"
 
 
+class EnterpriseSuggestion(models.Model):
+    """
+    Indice precalculado de sugerencias por empresa (empresas, beneficios y empleos
+    relacionados por nicho y categorias). Las señales marcan filas como desactualizadas y
+    build_enterprise_suggestions --stale, corrido periodicamente, las recalcula.
+    """
+    enterprise = models.OneToOneField(
+        UserAccount,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name="suggestion_index",
+    )
+    related_enterprise_ids = models.JSONField(default=list, blank=True)
+    product_ids = models.JSONField(default=list, blank=True)
+    job_ids = models.JSONField(default=list, blank=True)
+    stale = models.BooleanField(default=False, db_index=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = "Sugerencias de empresa"
+        verbose_name_plural = "Sugerencias de empresas"
+
+    def __str__(self):
+        return f"Sugerencias {self.enterprise.email}"
+
+
 @receiver(post_save, sender=UserAccount)
 def create_user_profile(sender, instance, created, **kwargs):
     if created and instance.role == "enterprise":
         UserProfile.objects.get_or_create(user=instance)
+
+
+@receiver(post_save, sender=UserAccount)
+@receiver(post_delete, sender=UserAccount)
+def invalidate_enterprise_index_on_change(sender, instance, **kwargs):
+    if instance.role != "enterprise":
+        return
+    update_fields = kwargs.get("update_fields")
+    if update_fields and not {"enterprise", "username", "email", "role"} & set(update_fields):
+        return
+    invalidate_enterprise_index()
+
+
+@receiver(post_save, sender=UserAccount)
+@receiver(post_delete, sender=UserAccount)
+def invalidate_employee_dashboard_on_enterprise_change(sender, instance, **kwargs):
+    if instance.role != "enterprise":
+        return
+    update_fields = kwargs.get("update_fields")
+    if update_fields and set(update_fields) <= {"last_login"}:
+        return
+    invalidate_employee_dashboard()
+
+
+@receiver(post_save, sender=UserProfile)
+@receiver(post_save, sender=EnterpriseMonthlyPayment)
+@receiver(post_delete, sender=EnterpriseMonthlyPayment)
+def invalidate_employee_dashboard_on_profile_or_payment(sender, instance, **kwargs):
+    invalidate_employee_dashboard()
+
+
+@receiver(post_save, sender=UserAccount)
+@receiver(post_delete, sender=UserAccount)
+def invalidate_enterprise_map_on_enterprise_change(sender, instance, **kwargs):
+    if instance.role != "enterprise":
+        return
+    update_fields = kwargs.get("update_fields")
+    if update_fields and set(update_fields) <= {"last_login"}:
+        return
+    invalidate_enterprise_map()
+
+
+@receiver(post_save, sender=UserProfile)
+@receiver(post_delete, sender=UserProfile)
+@receiver(post_save, sender=EnterpriseMonthlyPayment)
+@receiver(post_delete, sender=EnterpriseMonthlyPayment)
+def invalidate_enterprise_map_on_profile_or_payment(sender, instance, **kwargs):
+    invalidate_enterprise_map()
+
+
+@receiver(post_save, sender=UserProfile)
+def refresh_suggestions_on_profile_change(sender, instance, **kwargs):
+    schedule_suggestion_refresh(instance.user_id)
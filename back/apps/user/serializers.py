@@ -6,6 +6,7 @@ from django.utils.crypto import get_random_string
 import re
 User = get_user_model()
 from .models import UserProfile, EnterpriseMonthlyPayment
+from .utils.phone import normalize_colombian_phone
 
 
 def enterprise_profile_missing_fields(user):
@@ -65,11 +66,19 @@ def employee_profile_is_complete(user):
     return len(employee_profile_missing_fields(user)) == 0
 
 
-def normalize_colombian_phone(raw_phone):
-    phone = re.sub(r"\D+", "", str(raw_phone or ""))
-    if phone.startswith("57") and len(phone) == 12:
-        phone = phone[2:]
-    return phone
+class EmployerNameMixin:
+    """
+    Para empleados ligados por employer, expone en `enterprise` el nombre
+    actual de la empresa (el texto guardado en el empleado puede quedar viejo).
+    """
+
+    def to_representation(self, instance):
+        representation = super().to_representation(instance)
+        if "enterprise" in representation and getattr(instance, "role", None) == "employees" and instance.employer_id:
+            employer = instance.employer
+            representation["enterprise"] = employer.enterprise or employer.username
+        return representation
+
 
 class UserCreateSerializer(UserCreatePasswordRetypeSerializer):
     class Meta(UserCreatePasswordRetypeSerializer.Meta):
@@ -86,7 +95,7 @@ class UserCreateSerializer(UserCreatePasswordRetypeSerializer):
         ]
 
 
-class UserSerializer(serializers.ModelSerializer):
+class UserSerializer(EmployerNameMixin, serializers.ModelSerializer):
     enterprise_profile_completed = serializers.SerializerMethodField()
     enterprise_profile_missing = serializers.SerializerMethodField()
     employee_profile_completed = serializers.SerializerMethodField()
@@ -131,7 +140,7 @@ class UserSerializer(serializers.ModelSerializer):
         return employee_profile_missing_fields(obj)
 
 
-class EditUserSerializer(serializers.ModelSerializer):
+class EditUserSerializer(EmployerNameMixin, serializers.ModelSerializer):
     class Meta:
         model = User  # Add the model attribute here
         fields = [
@@ -149,7 +158,7 @@ class EditUserSerializer(serializers.ModelSerializer):
         ]
 
 
-class EditUserEnterpriseSerializer(serializers.ModelSerializer):
+class EditUserEnterpriseSerializer(EmployerNameMixin, serializers.ModelSerializer):
     picture = serializers.ImageField(required=False)
     banner = serializers.ImageField(required=False)
     class Meta:
@@ -170,7 +179,7 @@ class EditUserEnterpriseSerializer(serializers.ModelSerializer):
             "banner",
         ]
         
-class EditUserEmployeesSerializer(serializers.ModelSerializer):
+class EditUserEmployeesSerializer(EmployerNameMixin, serializers.ModelSerializer):
     picture = serializers.ImageField(required=False)
     banner = serializers.ImageField(required=False)
     class Meta:
@@ -313,6 +322,15 @@ class EmployeeEnterpriseListSerializer(serializers.ModelSerializer):
 
     def get_banner(self, obj):
         return self._build_media_url(obj.banner)
+
+
+class EmployeeEnterpriseNearbySerializer(EmployeeEnterpriseListSerializer):
+    distance_km = serializers.FloatField(read_only=True)
+
+    class Meta(EmployeeEnterpriseListSerializer.Meta):
+        fields = EmployeeEnterpriseListSerializer.Meta.fields + ["distance_km"]
+
+
 class CustomPasswordResetConfirmSerializer(PasswordResetConfirmSerializer):
     def build_password_reset_confirm_url(self, uid, token):
         url = f"?forgot_password_confirm=True&uid={uid}&token={token}"
@@ -382,13 +400,8 @@ class UserCreateByRoleSerializer(serializers.ModelSerializer):
                 "El teléfono debe ser colombiano: 10 dígitos e iniciar por 3."
             )
         else:
-            # Validación de unicidad por número normalizado.
-            existing_users = User.objects.exclude(phone__isnull=True).exclude(phone="")
-            already_used = any(
-                normalize_colombian_phone(existing.phone) == normalized_phone
-                for existing in existing_users
-            )
-            if already_used:
+            # Validación de unicidad por número normalizado (indice unico).
+            if User.objects.filter(phone_normalized=normalized_phone).exists():
                 errors["phone"] = (
                     "El número de teléfono ingresado pertenece a un usuario "
                     "ya registrado en el portal."
@@ -1,3 +1,347 @@
-from django.test import TestCase
+import io
+import tempfile
+from datetime import timedelta
+from unittest import mock
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from apps.job.models import JobBoard
+from apps.products.models import Product
+from .models import (
+    EnterpriseMonthlyPayment,
+    EnterprisePaymentNotificationLog,
+    EnterpriseSuggestion,
+    UserAccount,
+    UserProfile,
+)
+from .utils import autocomplete, recommendations
+from .utils.autocomplete import AUTOCOMPLETE_LIMIT, CompletionIndex, complete_enterprises
+from .utils.employee_dashboard import invalidate_employee_dashboard
+from .utils.notifications import NOTIFICATION_LOG_BATCH_SIZE
+from .utils.recommendations import KIND_JOB, KIND_PRODUCT, build_recommendation_index, recommend_for_history
+from .utils.suggestions import get_enterprise_suggestion
+from .views import _parse_bbox
+
+
+class EnterpriseMapBboxTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.admin = UserAccount.objects.create(email="admin@example.com", username="admin", role="Admin")
+        for index, longitude in enumerate((-179.5, 0, 179.5)):
+            enterprise = UserAccount.objects.create(
+                email=f"empresa{index}@example.com",
+                username=f"empresa{index}",
+                role="enterprise",
+                verified=True,
+            )
+            UserProfile.objects.filter(user=enterprise).update(latitude=10, longitude=longitude)
+        self.client = APIClient()
+        self.client.force_authenticate(self.admin)
+
+    def _total(self, bbox, zoom=3):
+        response = self.client.get("/api/enterprise/map/clusters/", {"bbox": bbox, "zoom": zoom})
+        self.assertEqual(response.status_code, 200)
+        return response.data["total"]
+
+    def test_parse_bbox_wraps_longitudes(self):
+        self.assertEqual(_parse_bbox("-540,-100,540,100"), (-180.0, -90.0, 180.0, 90.0))
+        self.assertEqual(_parse_bbox("170,0,200,20"), (170.0, 0.0, -160.0, 20.0))
+        self.assertEqual(_parse_bbox("190,0,200,20"), (-170.0, 0.0, -160.0, 20.0))
+        with self.assertRaises(ValueError):
+            _parse_bbox("10,20,0,30")
+
+    def test_out_of_range_bbox_returns_clusters(self):
+        self.assertEqual(self._total("-400,-85,400,85", zoom=0), 3)
+        # Vista que cruza el antimeridiano despues de desplazar el mapa hacia el este.
+        self.assertEqual(self._total("170,0,190,20"), 2)
+        self.assertEqual(self._total("-10,0,10,20"), 1)
+        response = self.client.get("/api/enterprise/map/clusters/", {"bbox": "a,b,c,d"})
+        self.assertEqual(response.status_code, 400)
+
+
+class EnterpriseSuggestionTests(TestCase):
+    def setUp(self):
+        self.enterprises = []
+        for index in range(2):
+            enterprise = UserAccount.objects.create(
+                email=f"empresa{index}@example.com",
+                username=f"empresa{index}",
+                role="enterprise",
+            )
+            UserProfile.objects.filter(user=enterprise).update(niche="Cafe")
+            self.enterprises.append(enterprise)
+
+    def test_writes_mark_neighbors_stale_and_job_recomputes(self):
+        first, second = self.enterprises
+        call_command("build_enterprise_suggestions", stdout=io.StringIO())
+        self.assertEqual(get_enterprise_suggestion(first.pk).related_enterprise_ids, [str(second.pk)])
+
+        # Empresa nueva del mismo nicho: sin relacion previa con nadie.
+        newcomer = UserAccount.objects.create(email="nueva@example.com", username="nueva", role="enterprise")
+        with self.captureOnCommitCallbacks(execute=True):
+            UserProfile.objects.filter(user=newcomer).update(niche=" cafe ")
+            UserProfile.objects.get(user=newcomer).save()
+        self.assertEqual(
+            set(EnterpriseSuggestion.objects.filter(stale=True).values_list("pk", flat=True)),
+            {first.pk, second.pk},
+        )
+
+        # La lectura no escribe: devuelve la fila marcada y calcula en memoria si falta.
+        with self.assertNumQueries(1):
+            self.assertTrue(get_enterprise_suggestion(first.pk).stale)
+        self.assertEqual(
+            set(get_enterprise_suggestion(newcomer.pk).related_enterprise_ids), {str(first.pk), str(second.pk)}
+        )
+        self.assertFalse(EnterpriseSuggestion.objects.filter(pk=newcomer.pk).exists())
+
+        call_command("build_enterprise_suggestions", stale=True, stdout=io.StringIO())
+        suggestion = get_enterprise_suggestion(first.pk)
+        self.assertFalse(suggestion.stale)
+        self.assertIn(str(newcomer.pk), suggestion.related_enterprise_ids)
+
+    def test_category_overlap_marks_enterprises_without_shared_niche(self):
+        first, second = self.enterprises
+        other = UserAccount.objects.create(email="otra@example.com", username="otra", role="enterprise")
+        Product.objects.create(user=first, name="Cafe", category="Bebidas")
+        Product.objects.create(user=other, name="Te", category="Infusiones")
+        call_command("build_enterprise_suggestions", stdout=io.StringIO())
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Product.objects.create(user=other, name="Jugo", category=" bebidas")
+        self.assertTrue(EnterpriseSuggestion.objects.get(pk=first.pk).stale)
+        self.assertFalse(EnterpriseSuggestion.objects.get(pk=second.pk).stale)
+
+
+class DelinquencyNotificationTests(TestCase):
+    def setUp(self):
+        today = timezone.localdate()
+        for index in range(NOTIFICATION_LOG_BATCH_SIZE + 2):
+            enterprise = UserAccount.objects.create(
+                email=f"empresa{index}@example.com",
+                username=f"empresa{index}",
+                role="enterprise",
+            )
+            EnterpriseMonthlyPayment.objects.create(
+                enterprise=enterprise,
+                year=today.year,
+                month=today.month,
+                due_date=today - timedelta(days=5),
+                grace_date=today - timedelta(days=2),
+            )
+        self.client = APIClient()
+        self.client.force_authenticate(
+            UserAccount.objects.create(email="admin@example.com", username="admin", role="Admin")
+        )
+
+    @staticmethod
+    def _deliveries(fail_after=None):
+        def deliver(jobs):
+            for index, _job in enumerate(jobs):
+                if index == fail_after:
+                    raise RuntimeError("corte a mitad de la corrida")
+                yield {"email_sent": True, "sms_sent": False, "errors": []}
+
+        return deliver
+
+    def test_logs_are_saved_as_deliveries_finish(self):
+        with mock.patch(
+            "apps.user.views.iter_notifications",
+            side_effect=self._deliveries(fail_after=NOTIFICATION_LOG_BATCH_SIZE + 1),
+        ):
+            with self.assertRaises(RuntimeError):
+                self.client.post("/api/billing/notifications/delinquency/")
+        self.assertEqual(EnterprisePaymentNotificationLog.objects.count(), NOTIFICATION_LOG_BATCH_SIZE)
+        self.assertEqual(
+            EnterpriseMonthlyPayment.objects.filter(status=EnterpriseMonthlyPayment.STATUS_OVERDUE).count(),
+            NOTIFICATION_LOG_BATCH_SIZE + 2,
+        )
+
+        with mock.patch("apps.user.views.iter_notifications", side_effect=self._deliveries()):
+            response = self.client.post("/api/billing/notifications/delinquency/")
+        self.assertEqual(response.data["meta"]["sent_count"], 2)
+        self.assertEqual(response.data["meta"]["skipped_count"], NOTIFICATION_LOG_BATCH_SIZE)
+        self.assertEqual(response.data["meta"]["overdue_updated"], 0)
+        self.assertEqual(EnterprisePaymentNotificationLog.objects.count(), NOTIFICATION_LOG_BATCH_SIZE + 2)
+
+
+class BackfillEmployersTests(TestCase):
+    def test_resolves_references_with_enterprise_index_rules(self):
+        enterprise = UserAccount.objects.create(
+            email="rrhh@acme.com", username="acme", enterprise="Acme Corp", role="enterprise"
+        )
+        references = [str(enterprise.pk), "ACME CORP", "rrhh@acme.com", "acme-corp!", "otra"]
+        employees = [
+            UserAccount.objects.create(
+                email=f"empleado{index}@example.com",
+                username=f"empleado{index}",
+                enterprise=reference,
+                role="employees",
+            )
+            for index, reference in enumerate(references)
+        ]
+
+        call_command("backfill_employers", chunk_size=2, stdout=io.StringIO())
+
+        self.assertEqual(
+            [UserAccount.objects.get(pk=employee.pk).employer_id for employee in employees],
+            [enterprise.pk] * 4 + [None],
+        )
+
+
+def _visible_enterprise(index, **profile):
+    enterprise = UserAccount.objects.create(
+        email=f"empresa{index}@example.com",
+        username=f"empresa{index}",
+        first_name="Ana",
+        last_name="Diaz",
+        enterprise=f"Empresa {index}",
+        phone=f"300123456{index}",
+        role="enterprise",
+        verified=True,
+    )
+    values = {
+        "nuip_enterprise": "900123456",
+        "description": "Cafe de origen",
+        "niche": "Cafe",
+        "address": "Calle 1",
+    }
+    values.update(profile)
+    UserProfile.objects.filter(user=enterprise).update(**values)
+    return enterprise
+
+
+class VisibleToEmployeesTests(TestCase):
+    def test_uses_billing_flag_and_strips_all_whitespace(self):
+        visible = _visible_enterprise(0)
+        blank_description = _visible_enterprise(1, description=" \t\r\n ")
+        blocked = _visible_enterprise(2)
+        UserAccount.objects.filter(pk=blocked.pk).update(billing_blocked=True)
+
+        ids = set(UserAccount.objects.visible_to_employees().values_list("id", flat=True))
+        self.assertEqual(ids, {visible.pk})
+        self.assertNotIn(blank_description.pk, ids)
+
+
+class CompletionIndexTests(TestCase):
+    def _values(self, index, prefix, **kwargs):
+        return [suggestion["value"] for suggestion in index.complete(prefix, **kwargs)]
+
+    def test_full_name_matches_come_before_later_words(self):
+        index = CompletionIndex([
+            (1, "Panaderia La Central", "Panaderia"),
+            (2, "Central de Carnes", "Carnes"),
+            (3, "Centro Medico", "Salud"),
+        ])
+        self.assertEqual(
+            self._values(index, "central"),
+            ["Central de Carnes", "Panaderia La Central"],
+        )
+        self.assertEqual(self._values(index, "  CENTRÁL  "), ["Central de Carnes", "Panaderia La Central"])
+        self.assertEqual(self._values(index, "la cen"), ["Panaderia La Central"])
+        self.assertEqual(index.complete("¿?"), [])
+
+    def test_suggestions_are_not_repeated(self):
+        # "pan" coincide con el nombre completo y con el sufijo "pan express".
+        index = CompletionIndex([(1, "Pan Pan Express", "Panes")])
+        suggestions = index.complete("pan")
+        self.assertEqual([(row["type"], row["value"]) for row in suggestions], [
+            ("enterprise", "Pan Pan Express"),
+            ("niche", "Panes"),
+        ])
+        self.assertEqual(suggestions[0]["id"], "1")
+
+    def test_results_are_limited(self):
+        index = CompletionIndex([(number, f"Tienda {number:02d}", "") for number in range(15)])
+        values = self._values(index, "tienda")
+        self.assertEqual(len(values), AUTOCOMPLETE_LIMIT)
+        self.assertEqual(values, [f"Tienda {number:02d}" for number in range(AUTOCOMPLETE_LIMIT)])
+        self.assertEqual(len(index.complete("tienda", limit=3)), 3)
+
+    def test_niches_are_grouped_with_counts(self):
+        index = CompletionIndex([
+            (1, "Empresa Uno", "Comidas Rapidas"),
+            (2, "Empresa Dos", " comidas   rápidas "),
+            (3, "Empresa Tres", "Comidas Rapidas"),
+            (4, "Empresa Cuatro", None),
+        ])
+        niches = [row for row in index.complete("rapi") if row["type"] == "niche"]
+        self.assertEqual(niches, [{"type": "niche", "value": "Comidas Rapidas", "count": 3}])
+
+    def test_index_is_rebuilt_when_dashboard_version_changes(self):
+        cache.clear()
+        autocomplete._local.clear()
+        self.addCleanup(autocomplete._local.clear)
+        enterprise = _visible_enterprise(0)
+        self.assertEqual([row["value"] for row in complete_enterprises("empresa")], ["Empresa 0"])
+
+        # Sin senales no cambia la version: se sigue sirviendo el indice del proceso.
+        UserAccount.objects.filter(pk=enterprise.pk).update(enterprise="Empresa Cero")
+        self.assertEqual([row["value"] for row in complete_enterprises("empresa")], ["Empresa 0"])
+        invalidate_employee_dashboard()
+        self.assertEqual([row["value"] for row in complete_enterprises("empresa")], ["Empresa Cero"])
+
+        enterprise.refresh_from_db()
+        enterprise.enterprise = "Empresa Renombrada"
+        enterprise.save()
+        self.assertEqual([row["value"] for row in complete_enterprises("empresa")], ["Empresa Renombrada"])
+
+
+class RecommendationIndexTests(TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        settings_override = override_settings(RECOMMENDATIONS_DIR=directory.name)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        self.enterprise = UserAccount.objects.create(
+            email="empresa@example.com",
+            username="empresa",
+            role="enterprise",
+        )
+        self.coffee = Product.objects.create(user=self.enterprise, name="Cafe organico tostado")
+        self.ground = Product.objects.create(user=self.enterprise, name="Cafe molido premium")
+        self.shoes = Product.objects.create(user=self.enterprise, name="Zapatos deportivos running")
+        self.barista = JobBoard.objects.create(user=self.enterprise, title="Barista de cafe")
+
+    def _recommend(self, product_ids, job_ids=()):
+        # Cada construccion cambia index.json; se fuerza la recarga por si el mtime coincide.
+        recommendations._loaded["mtime"] = None
+        ranked = recommend_for_history(product_ids, job_ids)
+        return ranked if ranked is None else {(kind, item_id): score for kind, item_id, score in ranked}
+
+    def test_recommend_for_history_ranks_similar_items(self):
+        self.assertIsNone(self._recommend([self.coffee.pk]))
+
+        build_recommendation_index(full=True)
+        scores = self._recommend([self.coffee.pk])
+        self.assertEqual(
+            set(scores),
+            {(KIND_PRODUCT, str(self.ground.pk)), (KIND_JOB, str(self.barista.pk))},
+        )
+        self.assertNotIn((KIND_PRODUCT, str(self.coffee.pk)), scores)
+        self.assertIsNone(self._recommend([Product().pk]))
+
+        scores = self._recommend([], [self.barista.pk])
+        self.assertIn((KIND_PRODUCT, str(self.coffee.pk)), scores)
+        self.assertNotIn((KIND_PRODUCT, str(self.shoes.pk)), scores)
+
+    def test_incremental_build_matches_full_build(self):
+        self.assertEqual(build_recommendation_index(full=True), (4, 4))
+
+        # Un item editado y uno nuevo cambian el IDF de "cafe" para las filas conservadas.
+        self.shoes.name = "Zapatos para barista de cafe"
+        self.shoes.save()
+        Product.objects.create(user=self.enterprise, name="Cafe en grano")
+        self.assertEqual(build_recommendation_index(), (5, 2))
+        incremental = self._recommend([self.coffee.pk])
+
+        build_recommendation_index(full=True)
+        full = self._recommend([self.coffee.pk])
+        self.assertEqual(set(incremental), set(full))
+        for key, score in full.items():
+            self.assertAlmostEqual(incremental[key], score, places=5)
 
-# Create your tests here.
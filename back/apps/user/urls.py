@@ -12,8 +12,12 @@ from .views import (
     EnterprisePaymentDelinquencyNotificationsView,
     EmployeeEnterpriseDetailView,
     EmployeeDashboardView,
+    EmployeeRecommendationsView,
     EmployeeCompaniesListView,
+    EmployeeCompaniesAutocompleteView,
     EnterpriseMapView,
+    EnterpriseMapClustersView,
+    EnterpriseMapDetailView,
 )
 from django.urls import path
 urlpatterns = [
@@ -34,7 +38,11 @@ urlpatterns = [
     path('api/billing/notifications/delinquency/', EnterprisePaymentDelinquencyNotificationsView.as_view(), name='billing-delinquency-notifications'),
     path('api/billing/my-payments/', EnterpriseOwnPaymentsView.as_view(), name='billing-my-payments'),
     path('api/employee/dashboard/', EmployeeDashboardView.as_view(), name='employee-dashboard'),
+    path('api/employee/recommendations/', EmployeeRecommendationsView.as_view(), name='employee-recommendations'),
     path('api/employee/companies/', EmployeeCompaniesListView.as_view(), name='employee-companies'),
+    path('api/employee/companies/autocomplete/', EmployeeCompaniesAutocompleteView.as_view(), name='employee-companies-autocomplete'),
     path('api/enterprise/map/', EnterpriseMapView.as_view(), name='enterprise-map'),
+    path('api/enterprise/map/clusters/', EnterpriseMapClustersView.as_view(), name='enterprise-map-clusters'),
+    path('api/enterprise/map/<uuid:enterprise_id>/', EnterpriseMapDetailView.as_view(), name='enterprise-map-detail'),
     path('api/employee/portal/enterprises/<uuid:enterprise_id>/', EmployeeEnterpriseDetailView.as_view(), name='employee-enterprise-detail'),
 ]
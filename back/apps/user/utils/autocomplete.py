@@ -0,0 +1,115 @@
+import bisect
+import re
+import threading
+import time
+
+from core.utils.cache import get_cache_version
+from core.utils.search import strip_accents
+
+from .employee_dashboard import EMPLOYEE_DASHBOARD_NAMESPACE, EMPLOYEE_DASHBOARD_TIMEOUT
+
+AUTOCOMPLETE_LIMIT = 10
+AUTOCOMPLETE_MAX_QUERY_LENGTH = 100
+
+_SPACES_RE = re.compile(r"\s+")
+
+# Arreglos ordenados por proceso. Se reconstruyen cuando cambia la version del tablero
+# de empleados (empresas, perfiles y pagos) o vencen, porque la visibilidad depende de
+# la fecha de gracia.
+_local = {}
+_local_lock = threading.Lock()
+
+
+def normalize_completion(text):
+    text = strip_accents(str(text or "")).lower()
+    return _SPACES_RE.sub(" ", re.sub(r"[^a-z0-9 ]", " ", text)).strip()
+
+
+def _word_suffixes(key):
+    # "panaderia la central" -> "la central", "central": completa desde cualquier palabra.
+    words = key.split(" ")
+    return [" ".join(words[start:]) for start in range(1, len(words))]
+
+
+class CompletionIndex:
+    """
+    Dos arreglos ordenados de (llave normalizada, orden, sugerencia): el primario con el
+    nombre completo de cada empresa y cada nicho, y el secundario con los sufijos desde
+    cada palabra. Un prefijo es un rango contiguo que se ubica con bisect.
+    """
+
+    def __init__(self, enterprises):
+        primary, secondary = [], []
+        niches = {}
+        for enterprise_id, name, niche in enterprises:
+            key = normalize_completion(name)
+            if key:
+                suggestion = {"type": "enterprise", "id": str(enterprise_id), "value": name, "niche": niche or ""}
+                primary.append((key, name, suggestion))
+                secondary.extend((suffix, name, suggestion) for suffix in _word_suffixes(key))
+            niche_key = normalize_completion(niche)
+            if niche_key:
+                entry = niches.setdefault(niche_key, {"type": "niche", "value": niche.strip(), "count": 0})
+                entry["count"] += 1
+        for niche_key, suggestion in niches.items():
+            primary.append((niche_key, suggestion["value"], suggestion))
+            secondary.extend((suffix, suggestion["value"], suggestion) for suffix in _word_suffixes(niche_key))
+
+        primary.sort(key=lambda row: (row[0], row[1]))
+        secondary.sort(key=lambda row: (row[0], row[1]))
+        self.keys = ([row[0] for row in primary], [row[0] for row in secondary])
+        self.suggestions = ([row[2] for row in primary], [row[2] for row in secondary])
+
+    def complete(self, prefix, limit=AUTOCOMPLETE_LIMIT):
+        prefix = normalize_completion(prefix)
+        if not prefix:
+            return []
+        results = []
+        seen = set()
+        # Primero coincidencias desde el inicio del nombre; luego desde otras palabras.
+        for keys, suggestions in zip(self.keys, self.suggestions):
+            position = bisect.bisect_left(keys, prefix)
+            while position < len(keys) and len(results) < limit and keys[position].startswith(prefix):
+                suggestion = suggestions[position]
+                marker = id(suggestion)
+                if marker not in seen:
+                    seen.add(marker)
+                    results.append(suggestion)
+                position += 1
+            if len(results) >= limit:
+                break
+        return results
+
+
+def build_completion_index():
+    from ..models import UserAccount
+
+    rows = (
+        UserAccount.objects.visible_to_employees()
+        .order_by()
+        .values_list("id", "enterprise", "username", "userprofile__niche")
+    )
+    return CompletionIndex(
+        (enterprise_id, enterprise or username, niche) for enterprise_id, enterprise, username, niche in rows
+    )
+
+
+def get_completion_index():
+    version = get_cache_version(EMPLOYEE_DASHBOARD_NAMESPACE)
+    now = time.monotonic()
+
+    def _fresh():
+        return _local.get("version") == version and now - _local["built_at"] < EMPLOYEE_DASHBOARD_TIMEOUT
+
+    if _fresh():
+        return _local["index"]
+    with _local_lock:
+        if _fresh():
+            return _local["index"]
+        index = build_completion_index()
+        _local.update(index=index, version=version, built_at=now)
+        return index
+
+
+def complete_enterprises(prefix, limit=AUTOCOMPLETE_LIMIT):
+    return get_completion_index().complete(prefix[:AUTOCOMPLETE_MAX_QUERY_LENGTH], limit)
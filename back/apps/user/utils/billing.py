@@ -3,9 +3,11 @@ import re
 from datetime import date, timedelta
 from decimal import Decimal
 
+from django.db.models import Count, Q
 from django.utils import timezone
 
 from ..models import EnterpriseMonthlyPayment, UserAccount
+from .enterprise_index import lookup_enterprise_id
 
 
 def normalize_email(email: str) -> str:
@@ -166,11 +168,37 @@ def payment_stage_messages(payment: EnterpriseMonthlyPayment, stage: int, today:
 
 
 def count_enterprise_employees(enterprise: UserAccount):
-    refs = [str(enterprise.id), enterprise.enterprise, enterprise.username, enterprise.email]
-    refs = [value for value in refs if value]
-    if not refs:
-        return 0
-    return UserAccount.objects.filter(role="employees", enterprise__in=refs).count()
+    return UserAccount.objects.filter(role="employees", employer=enterprise).count()
+
+
+def count_employees_by_enterprise(enterprises):
+    """
+    Conteo de empleados para muchas empresas con un solo GROUP BY sobre employer.
+    Retorna {enterprise_id: total}.
+    """
+    enterprise_ids = [enterprise.id for enterprise in enterprises]
+    if not enterprise_ids:
+        return {}
+
+    totals = dict(
+        UserAccount.objects.filter(role="employees", employer_id__in=enterprise_ids)
+        .values("employer_id")
+        .annotate(total=Count("id"))
+        .values_list("employer_id", "total")
+    )
+    return {enterprise_id: totals.get(enterprise_id, 0) for enterprise_id in enterprise_ids}
+
+
+def resolve_enterprise_reference(enterprise_ref: str):
+    """
+    Resuelve la referencia libre (legacy) de UserAccount.enterprise a una empresa
+    usando el indice en memoria (id, nombre, username, email, nombre normalizado).
+    Solo se usa para filas aun sin employer (ver comando backfill_employers).
+    """
+    enterprise_id = lookup_enterprise_id(enterprise_ref)
+    if not enterprise_id:
+        return None
+    return UserAccount.objects.filter(role="enterprise", pk=enterprise_id).first()
 
 
 def resolve_enterprise_for_user(user: UserAccount):
@@ -178,99 +206,144 @@ def resolve_enterprise_for_user(user: UserAccount):
         return user
     if user.role != "employees":
         return None
-    enterprise_ref = (user.enterprise or "").strip()
-    if not enterprise_ref:
-        return None
 
-    # 1) Referencia por UUID en el campo enterprise.
-    try:
-        enterprise_by_id = UserAccount.objects.filter(
-            role="enterprise",
-            pk=enterprise_ref,
-        ).first()
-        if enterprise_by_id:
-            return enterprise_by_id
-    except Exception:
-        pass
-
-    # 2) Match por nombre de empresa.
-    enterprise = UserAccount.objects.filter(
-        role="enterprise",
-        enterprise__iexact=enterprise_ref,
-    ).first()
-    if enterprise:
-        return enterprise
+    if user.employer_id:
+        return user.employer
 
-    # 3) Fallback por username del usuario enterprise.
-    enterprise = UserAccount.objects.filter(
-        role="enterprise",
-        username__iexact=enterprise_ref,
-    ).first()
+    # Filas legacy sin employer: se resuelve la referencia libre y se persiste el FK.
+    enterprise = resolve_enterprise_reference(user.enterprise)
     if enterprise:
-        return enterprise
+        UserAccount.objects.filter(pk=user.pk, employer__isnull=True).update(employer=enterprise)
+        user.employer = enterprise
+    return enterprise
 
-    # 4) Fallback por email del usuario enterprise.
-    enterprise = UserAccount.objects.filter(
-        role="enterprise",
-        email__iexact=enterprise_ref,
-    ).first()
-    if enterprise:
-        return enterprise
 
-    # 5) Fallback tolerante: comparar nombre normalizado (sin espacios/símbolos).
-    def _normalize_name(value: str) -> str:
-        return re.sub(r"[^a-z0-9]", "", (value or "").strip().lower())
+def payment_defaults(year: int, month: int):
+    due_date = month_end_date(year, month)
+    return {
+        "amount": Decimal("0.00"),
+        "due_date": due_date,
+        "grace_date": due_date + timedelta(days=2),
+        "status": EnterpriseMonthlyPayment.STATUS_PENDING,
+    }
 
-    normalized_ref = _normalize_name(enterprise_ref)
-    if normalized_ref:
-        candidates = UserAccount.objects.filter(role="enterprise").only("id", "enterprise", "username")
-        for candidate in candidates:
-            if _normalize_name(candidate.enterprise or "") == normalized_ref:
-                return candidate
-            if _normalize_name(candidate.username or "") == normalized_ref:
-                return candidate
 
-    return None
+def payment_periods_filter(periods):
+    # Filtro OR por tuplas (year, month).
+    periods_filter = Q()
+    for year, month in periods:
+        periods_filter |= Q(year=year, month=month)
+    return periods_filter
 
 
 def ensure_payment_for_month(enterprise: UserAccount, year: int, month: int):
-    amount = Decimal("0.00")
-    due_date = month_end_date(year, month)
-    grace_date = due_date + timedelta(days=2)
-
     payment, _ = EnterpriseMonthlyPayment.objects.get_or_create(
         enterprise=enterprise,
         year=year,
         month=month,
-        defaults={
-            "amount": amount,
-            "due_date": due_date,
-            "grace_date": grace_date,
-            "status": EnterpriseMonthlyPayment.STATUS_PENDING,
-        },
+        defaults=payment_defaults(year, month),
     )
 
     return payment
 
 
-def is_enterprise_blocked(enterprise: UserAccount):
-    if not enterprise or enterprise.role != "enterprise":
-        return False
+def materialize_payments(enterprise_ids, periods):
+    """
+    Crea en bloque las mensualidades faltantes para cada (empresa, anio, mes).
+    Una consulta para leer las existentes y un INSERT masivo para las faltantes;
+    los conflictos por carreras se ignoran gracias al unique_together.
+    Retorna la cantidad de filas nuevas intentadas.
+    """
+    enterprise_ids = list(enterprise_ids)
+    periods = list(dict.fromkeys(periods))
+    if not enterprise_ids or not periods:
+        return 0
+
+    existing = set(
+        EnterpriseMonthlyPayment.objects.filter(enterprise_id__in=enterprise_ids)
+        .filter(payment_periods_filter(periods))
+        .values_list("enterprise_id", "year", "month")
+    )
+    defaults_by_period = {(year, month): payment_defaults(year, month) for year, month in periods}
+    missing = [
+        EnterpriseMonthlyPayment(
+            enterprise_id=enterprise_id,
+            year=year,
+            month=month,
+            **defaults_by_period[(year, month)],
+        )
+        for enterprise_id in enterprise_ids
+        for year, month in periods
+        if (enterprise_id, year, month) not in existing
+    ]
+    if missing:
+        EnterpriseMonthlyPayment.objects.bulk_create(
+            missing,
+            batch_size=500,
+            ignore_conflicts=True,
+        )
+    return len(missing)
 
-    today = timezone.localdate()
 
-    # Marca como vencidos los pagos no cancelados cuyo periodo de gracia ya expiró.
-    enterprise.monthly_payments.filter(
+def mark_overdue_payments(enterprise_ids=None, today=None):
+    # Marca como vencidos los pagos pendientes cuyo periodo de gracia ya expiró.
+    today = today or timezone.localdate()
+    payments = EnterpriseMonthlyPayment.objects.filter(
         status=EnterpriseMonthlyPayment.STATUS_PENDING,
         grace_date__lt=today,
-    ).update(status=EnterpriseMonthlyPayment.STATUS_OVERDUE)
+    )
+    if enterprise_ids is not None:
+        payments = payments.filter(enterprise_id__in=list(enterprise_ids))
+    return payments.update(status=EnterpriseMonthlyPayment.STATUS_OVERDUE)
 
-    # Bloqueo: existe al menos un pago no pagado con gracia expirada.
-    return enterprise.monthly_payments.filter(
-        grace_date__lt=today,
-    ).exclude(
+
+def blocked_enterprise_ids(enterprise_ids=None, today=None):
+    # Empresas con al menos un pago no pagado con gracia expirada.
+    today = today or timezone.localdate()
+    payments = EnterpriseMonthlyPayment.objects.filter(grace_date__lt=today).exclude(
         status=EnterpriseMonthlyPayment.STATUS_PAID,
-    ).exists()
+    )
+    if enterprise_ids is not None:
+        payments = payments.filter(enterprise_id__in=list(enterprise_ids))
+    return set(payments.values_list("enterprise_id", flat=True).distinct())
+
+
+def refresh_enterprise_blocked_state(enterprise_ids=None, today=None, mark_overdue=True):
+    """
+    Sweeper de mora: marca pagos vencidos y recalcula el flag billing_blocked
+    de las empresas con sentencias por conjunto (no una consulta por empresa).
+    Con mark_overdue=False se asume que el llamador ya corrio mark_overdue_payments.
+    Retorna el conjunto de ids de empresas bloqueadas dentro del alcance.
+    """
+    today = today or timezone.localdate()
+    if enterprise_ids is not None:
+        enterprise_ids = list(enterprise_ids)
+
+    if mark_overdue:
+        mark_overdue_payments(enterprise_ids, today)
+    blocked_ids = blocked_enterprise_ids(enterprise_ids, today)
+
+    enterprises = UserAccount.objects.filter(role="enterprise")
+    if enterprise_ids is not None:
+        enterprises = enterprises.filter(id__in=enterprise_ids)
+
+    enterprises.filter(id__in=blocked_ids, billing_blocked=False).update(
+        billing_blocked=True,
+        billing_blocked_since=timezone.now(),
+    )
+    enterprises.filter(billing_blocked=True).exclude(id__in=blocked_ids).update(
+        billing_blocked=False,
+        billing_blocked_since=None,
+    )
+    return blocked_ids
+
+
+def is_enterprise_blocked(enterprise: UserAccount):
+    if not enterprise or enterprise.role != "enterprise":
+        return False
+
+    # Lectura del estado persistido; el sweeper se encarga de mantenerlo al dia.
+    return bool(enterprise.billing_blocked)
 
 
 def user_access_blocked(user: UserAccount):
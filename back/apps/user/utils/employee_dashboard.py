@@ -0,0 +1,9 @@
+from core.utils.cache import bump_cache_version
+
+EMPLOYEE_DASHBOARD_NAMESPACE = "employee-dashboard"
+# Tope de vida aunque nadie invalide: la mora por fecha de gracia cambia sin que se guarde nada.
+EMPLOYEE_DASHBOARD_TIMEOUT = 60 * 5
+
+
+def invalidate_employee_dashboard():
+    bump_cache_version(EMPLOYEE_DASHBOARD_NAMESPACE)
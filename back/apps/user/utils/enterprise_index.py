@@ -0,0 +1,85 @@
+import re
+import threading
+
+from django.core.cache import cache
+
+from core.utils.cache import bump_cache_version, get_cache_version
+
+ENTERPRISE_INDEX_NAMESPACE = "enterprise-index"
+ENTERPRISE_INDEX_TIMEOUT = 60 * 60 * 6
+
+# Copia por proceso: evita deserializar el indice en cada login mientras la version no cambie.
+_local_index = {"version": None, "entries": {}}
+_local_lock = threading.Lock()
+
+
+def normalize_enterprise_name(value: str) -> str:
+    # Nombre normalizado (sin espacios/símbolos) para comparar referencias libres.
+    return re.sub(r"[^a-z0-9]", "", (value or "").strip().lower())
+
+
+def build_enterprise_index():
+    """
+    Diccionario referencia -> id de empresa. Mismo orden de prioridad que el
+    resolver legacy: id, nombre, username, email y, al final, nombre/username normalizado.
+    """
+    from ..models import UserAccount
+
+    rows = list(
+        UserAccount.objects.filter(role="enterprise").values_list("id", "enterprise", "username", "email")
+    )
+    entries = {}
+    for enterprise_id, _, _, _ in rows:
+        entries[f"id:{enterprise_id}"] = enterprise_id
+        entries[f"id:{enterprise_id.hex}"] = enterprise_id
+    for column in (1, 2, 3):
+        for row in rows:
+            value = (row[column] or "").strip().lower()
+            if value:
+                entries.setdefault(f"ref:{value}", row[0])
+    for enterprise_id, name, username, _ in rows:
+        for value in (name, username):
+            normalized = normalize_enterprise_name(value)
+            if normalized:
+                entries.setdefault(f"norm:{normalized}", enterprise_id)
+    return entries
+
+
+def get_enterprise_index():
+    version = get_cache_version(ENTERPRISE_INDEX_NAMESPACE)
+    if _local_index["version"] == version:
+        return _local_index["entries"]
+
+    with _local_lock:
+        if _local_index["version"] == version:
+            return _local_index["entries"]
+
+        cache_key = f"{ENTERPRISE_INDEX_NAMESPACE}:{version}"
+        entries = cache.get(cache_key)
+        if entries is None:
+            entries = build_enterprise_index()
+            cache.set(cache_key, entries, timeout=ENTERPRISE_INDEX_TIMEOUT)
+
+        _local_index["entries"] = entries
+        _local_index["version"] = version
+        return entries
+
+
+def lookup_enterprise_id(enterprise_ref: str, entries=None):
+    # entries permite reusar un indice ya construido (p. ej. en backfills masivos).
+    enterprise_ref = (enterprise_ref or "").strip()
+    if not enterprise_ref:
+        return None
+
+    if entries is None:
+        entries = get_enterprise_index()
+    lowered = enterprise_ref.lower()
+    return (
+        entries.get(f"id:{lowered}")
+        or entries.get(f"ref:{lowered}")
+        or entries.get(f"norm:{normalize_enterprise_name(enterprise_ref)}")
+    )
+
+
+def invalidate_enterprise_index():
+    bump_cache_version(ENTERPRISE_INDEX_NAMESPACE)
@@ -0,0 +1,140 @@
+import math
+import threading
+import time
+
+from django.core.cache import cache
+
+from core.utils.cache import bump_cache_version, get_cache_version
+
+ENTERPRISE_MAP_NAMESPACE = "enterprise-map"
+# La visibilidad para empleados depende de la fecha de gracia, que vence sin que se guarde nada.
+ENTERPRISE_MAP_TIMEOUT = 60 * 5
+MAP_MIN_ZOOM = 0
+MAP_MAX_ZOOM = 19
+# Celdas por tile de 256px (~64px por celda): a ese tamaño los pines se solapan.
+CLUSTER_CELLS_PER_TILE = 4
+
+# Copia por proceso de los puntos por alcance: {alcance: {"version", "built_at", "points"}}.
+_local_points = {}
+_local_lock = threading.Lock()
+
+
+def map_scope_for_role(role):
+    # Los empleados solo ven empresas visibles; empresas y admin ven todas las activas y verificadas.
+    return "employees" if role == "employees" else "all"
+
+
+def enterprises_for_map_scope(scope):
+    from ..models import UserAccount
+
+    if scope == "employees":
+        return UserAccount.objects.visible_to_employees()
+    return UserAccount.objects.filter(role="enterprise", is_active=True, verified=True)
+
+
+def build_enterprise_points(scope):
+    """
+    Arreglos columnares (ids, lat, lng) de las empresas con coordenadas dentro del alcance.
+    """
+    rows = (
+        enterprises_for_map_scope(scope)
+        .filter(userprofile__latitude__isnull=False, userprofile__longitude__isnull=False)
+        .order_by("pk")
+        .values_list("id", "userprofile__latitude", "userprofile__longitude")
+    )
+    points = {"ids": [], "lat": [], "lng": []}
+    for enterprise_id, latitude, longitude in rows:
+        points["ids"].append(str(enterprise_id))
+        points["lat"].append(float(latitude))
+        points["lng"].append(float(longitude))
+    return points
+
+
+def get_enterprise_points(scope):
+    version = get_cache_version(ENTERPRISE_MAP_NAMESPACE)
+    now = time.monotonic()
+
+    def _fresh(entry):
+        return (
+            entry is not None
+            and entry["version"] == version
+            and now - entry["built_at"] < ENTERPRISE_MAP_TIMEOUT
+        )
+
+    entry = _local_points.get(scope)
+    if _fresh(entry):
+        return entry["points"]
+
+    with _local_lock:
+        entry = _local_points.get(scope)
+        if _fresh(entry):
+            return entry["points"]
+
+        cache_key = f"{ENTERPRISE_MAP_NAMESPACE}:{version}:points:{scope}"
+        points = cache.get(cache_key)
+        if points is None:
+            points = build_enterprise_points(scope)
+            cache.set(cache_key, points, timeout=ENTERPRISE_MAP_TIMEOUT)
+
+        _local_points[scope] = {"version": version, "built_at": now, "points": points}
+        return points
+
+
+def cluster_points(points, zoom):
+    """
+    Agrupa los puntos en una grilla de celdas de 360 / (2^zoom * CLUSTER_CELLS_PER_TILE) grados.
+    Retorna columnas paralelas: centroide, cantidad e id (solo cuando la celda tiene un pin).
+    """
+    cell_size = 360.0 / ((2 ** zoom) * CLUSTER_CELLS_PER_TILE)
+    cells = {}
+    for enterprise_id, latitude, longitude in zip(points["ids"], points["lat"], points["lng"]):
+        key = (math.floor(latitude / cell_size), math.floor(longitude / cell_size))
+        cell = cells.get(key)
+        if cell is None:
+            cells[key] = [1, latitude, longitude, enterprise_id]
+        else:
+            cell[0] += 1
+            cell[1] += latitude
+            cell[2] += longitude
+            cell[3] = None
+
+    clusters = {"lat": [], "lng": [], "count": [], "id": []}
+    for count, latitude_sum, longitude_sum, enterprise_id in cells.values():
+        clusters["lat"].append(round(latitude_sum / count, 6))
+        clusters["lng"].append(round(longitude_sum / count, 6))
+        clusters["count"].append(count)
+        clusters["id"].append(enterprise_id)
+    return clusters
+
+
+def get_enterprise_clusters(scope, zoom):
+    # Los clusters de todo el mapa se calculan una vez por alcance y zoom; el bbox solo filtra.
+    cache_key = f"{ENTERPRISE_MAP_NAMESPACE}:{get_cache_version(ENTERPRISE_MAP_NAMESPACE)}:clusters:{scope}:{zoom}"
+    clusters = cache.get(cache_key)
+    if clusters is None:
+        clusters = cluster_points(get_enterprise_points(scope), zoom)
+        cache.set(cache_key, clusters, timeout=ENTERPRISE_MAP_TIMEOUT)
+    return clusters
+
+
+def filter_clusters_by_bbox(clusters, bbox):
+    west, south, east, north = bbox
+    # Si el bbox cruza el antimeridiano, west > east.
+    crosses_antimeridian = west > east
+    filtered = {"lat": [], "lng": [], "count": [], "id": []}
+    for index, latitude in enumerate(clusters["lat"]):
+        longitude = clusters["lng"][index]
+        if not south <= latitude <= north:
+            continue
+        if crosses_antimeridian:
+            if not (longitude >= west or longitude <= east):
+                continue
+        elif not west <= longitude <= east:
+            continue
+        for column in filtered:
+            filtered[column].append(clusters[column][index])
+    return filtered
+
+
+def invalidate_enterprise_map():
+    bump_cache_version(ENTERPRISE_MAP_NAMESPACE)
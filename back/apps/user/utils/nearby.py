@@ -0,0 +1,108 @@
+import math
+import threading
+
+import numpy as np
+from django.db.models import Q
+
+from .enterprise_map import get_enterprise_points
+
+EARTH_RADIUS_KM = 6371.0088
+NEARBY_DEFAULT_RADIUS_KM = 10
+NEARBY_MAX_RADIUS_KM = 500
+
+# Arreglos NumPy por alcance, derivados de los puntos cacheados del mapa. Se reconstruyen
+# cuando cambia el objeto de puntos (version bump al guardar perfiles/empresas).
+_local_arrays = {}
+_local_lock = threading.Lock()
+
+
+def bounding_box(latitude, longitude, radius_km):
+    """
+    Caja (lat_min, lat_max, lng_min, lng_max) que contiene el circulo de radio dado.
+    Cerca de los polos la caja cubre todas las longitudes.
+    """
+    lat_delta = math.degrees(radius_km / EARTH_RADIUS_KM)
+    lat_min = max(-90.0, latitude - lat_delta)
+    lat_max = min(90.0, latitude + lat_delta)
+    cos_lat = math.cos(math.radians(latitude))
+    if cos_lat <= 1e-6 or lat_min <= -90.0 or lat_max >= 90.0:
+        return lat_min, lat_max, -180.0, 180.0
+    lng_delta = min(180.0, lat_delta / cos_lat)
+    return lat_min, lat_max, longitude - lng_delta, longitude + lng_delta
+
+
+def bounding_box_filter(bbox, prefix="userprofile__"):
+    # Filtro SQL equivalente a la caja; usa el indice (latitude, longitude) del perfil.
+    lat_min, lat_max, lng_min, lng_max = bbox
+    condition = Q(**{f"{prefix}latitude__range": (lat_min, lat_max)})
+    if lng_min <= -180.0 and lng_max >= 180.0:
+        return condition
+    if lng_min < -180.0:
+        return condition & (
+            Q(**{f"{prefix}longitude__gte": lng_min + 360.0}) | Q(**{f"{prefix}longitude__lte": lng_max})
+        )
+    if lng_max > 180.0:
+        return condition & (
+            Q(**{f"{prefix}longitude__gte": lng_min}) | Q(**{f"{prefix}longitude__lte": lng_max - 360.0})
+        )
+    return condition & Q(**{f"{prefix}longitude__range": (lng_min, lng_max)})
+
+
+def get_point_arrays(scope):
+    points = get_enterprise_points(scope)
+    entry = _local_arrays.get(scope)
+    if entry is not None and entry["points"] is points:
+        return entry["arrays"]
+
+    with _local_lock:
+        entry = _local_arrays.get(scope)
+        if entry is not None and entry["points"] is points:
+            return entry["arrays"]
+
+        latitudes = np.asarray(points["lat"], dtype=np.float64)
+        # Ordenados por latitud: el rango de la caja se resuelve con busqueda binaria.
+        order = np.argsort(latitudes, kind="stable")
+        arrays = {
+            "ids": np.asarray(points["ids"], dtype=object)[order],
+            "lat": latitudes[order],
+            "lng": np.asarray(points["lng"], dtype=np.float64)[order],
+        }
+        _local_arrays[scope] = {"points": points, "arrays": arrays}
+        return arrays
+
+
+def haversine_km(latitude, longitude, latitudes, longitudes):
+    lat1 = math.radians(latitude)
+    lat2 = np.radians(latitudes)
+    dlat = lat2 - lat1
+    dlng = np.radians(longitudes) - math.radians(longitude)
+    a = np.sin(dlat / 2.0) ** 2 + math.cos(lat1) * np.cos(lat2) * np.sin(dlng / 2.0) ** 2
+    return 2.0 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.clip(a, 0.0, 1.0)))
+
+
+def nearby_enterprises(scope, latitude, longitude, radius_km):
+    """
+    Empresas del alcance dentro del radio, ordenadas por distancia.
+    Retorna una lista de (id, distancia_km).
+    """
+    arrays = get_point_arrays(scope)
+    lat_min, lat_max, lng_min, lng_max = bounding_box(latitude, longitude, radius_km)
+
+    start = np.searchsorted(arrays["lat"], lat_min, side="left")
+    stop = np.searchsorted(arrays["lat"], lat_max, side="right")
+    ids = arrays["ids"][start:stop]
+    latitudes = arrays["lat"][start:stop]
+    longitudes = arrays["lng"][start:stop]
+
+    if lng_min > -180.0 or lng_max < 180.0:
+        # La caja puede cruzar el antimeridiano; se normaliza la diferencia a [-180, 180).
+        offsets = (longitudes - longitude + 180.0) % 360.0 - 180.0
+        lng_delta = lng_max - longitude
+        mask = np.abs(offsets) <= lng_delta
+        ids, latitudes, longitudes = ids[mask], latitudes[mask], longitudes[mask]
+
+    distances = haversine_km(latitude, longitude, latitudes, longitudes)
+    within = distances <= radius_km
+    ids, distances = ids[within], distances[within]
+    order = np.argsort(distances, kind="stable")
+    return list(zip(ids[order].tolist(), distances[order].tolist()))
@@ -0,0 +1,90 @@
+from concurrent.futures import ThreadPoolExecutor
+import logging
+
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+
+from .sendOTP import get_twilio_client, send_sms
+
+logger = logging.getLogger(__name__)
+
+# Pool acotado para no abrir un hilo por pago en corridas con miles de empresas.
+NOTIFICATION_MAX_WORKERS = 8
+# Logs de notificación que se acumulan antes de escribirlos (a lo sumo se pierde una tanda).
+NOTIFICATION_LOG_BATCH_SIZE = NOTIFICATION_MAX_WORKERS
+
+
+def iter_notifications(jobs, max_workers=NOTIFICATION_MAX_WORKERS):
+    """
+    Envía email + SMS para cada job con un pool acotado de hilos.
+    Entrega un resultado por job (email_sent, sms_sent, errors), en el orden de
+    `jobs`, apenas termina su envío, para que el llamador registre lo ya enviado
+    sin esperar a toda la corrida.
+
+    Cada job es un dict con: email, phone, subject, email_body, sms_body.
+    Se reutiliza una sola conexión SMTP y un solo cliente Twilio para toda la corrida.
+    """
+    if not jobs:
+        return
+
+    connection = get_connection(fail_silently=False)
+    try:
+        connection.open()
+    except Exception as exc:
+        logger.error(f'No fue posible abrir la conexión SMTP: {exc}')
+        connection = None
+
+    needs_sms = any(job.get("phone") for job in jobs)
+    sms_client = get_twilio_client() if needs_sms else None
+    from_email = getattr(settings, "DEFAULT_FROM_EMAIL", None)
+
+    def _send_email(job):
+        message = EmailMessage(
+            subject=job["subject"],
+            body=job["email_body"],
+            from_email=from_email,
+            to=[job["email"]],
+            connection=connection,
+        )
+        send_now = getattr(connection, "send_messages_now", None)
+        sent = send_now([message]) if send_now else connection.send_messages([message])
+        return bool(sent)
+
+    def _deliver(job):
+        result = {"email_sent": False, "sms_sent": False, "errors": []}
+
+        if job.get("email"):
+            if connection is None:
+                result["errors"].append("email_error: smtp_unavailable")
+            else:
+                try:
+                    result["email_sent"] = _send_email(job)
+                except Exception as exc:
+                    result["errors"].append(f"email_error: {exc}")
+        else:
+            result["errors"].append("email_missing")
+
+        if job.get("phone"):
+            if sms_client is None:
+                result["errors"].append("sms_error: twilio_not_configured")
+            elif send_sms(job["phone"], job["sms_body"], client=sms_client):
+                result["sms_sent"] = True
+            else:
+                result["errors"].append("sms_error: not_sent")
+        else:
+            result["errors"].append("phone_missing_or_invalid")
+
+        return result
+
+    try:
+        with ThreadPoolExecutor(
+            max_workers=max(1, min(max_workers, len(jobs))),
+            thread_name_prefix="billing-notify",
+        ) as executor:
+            yield from executor.map(_deliver, jobs)
+    finally:
+        if connection is not None:
+            try:
+                connection.close()
+            except Exception:
+                logger.exception("Error cerrando la conexión SMTP")
@@ -0,0 +1,8 @@
+import re
+
+
+def normalize_colombian_phone(raw_phone):
+    phone = re.sub(r"\D+", "", str(raw_phone or ""))
+    if phone.startswith("57") and len(phone) == 12:
+        phone = phone[2:]
+    return phone
@@ -0,0 +1,261 @@
+import json
+import math
+import os
+import re
+import threading
+import unicodedata
+import uuid
+import zlib
+
+import numpy as np
+from django.conf import settings
+from django.db.models import Q
+from django.utils.html import strip_tags
+
+from core.utils.search import SPANISH_STOPWORDS
+
+# Vectores con hashing de terminos: el vocabulario es fijo y el indice se puede
+# actualizar por filas sin reindexar todo. En disco se guarda el TF crudo; el IDF
+# cambia con cada construccion, se guarda aparte y se aplica al cargar.
+VECTOR_DIMENSIONS = 2 ** 10
+VECTORS_PREFIX = "vectors-"
+INDEX_FILENAME = "index.json"
+# Version del formato en disco; un indice con otra version se reconstruye completo.
+INDEX_FORMAT = 2
+# Filas por bloque al recorrer la matriz en disco.
+ROW_CHUNK_SIZE = 2000
+
+KIND_PRODUCT = "product"
+KIND_JOB = "job"
+
+_TOKEN_RE = re.compile(r"[a-z0-9]{2,}")
+
+_loaded = {"mtime": None, "matrix": None, "index": None, "positions": None, "idf": None, "norms": None}
+_loaded_lock = threading.Lock()
+
+
+def _index_dir():
+    return settings.RECOMMENDATIONS_DIR
+
+
+def tokenize(text):
+    text = unicodedata.normalize("NFKD", strip_tags(text or "").lower())
+    text = "".join(char for char in text if not unicodedata.combining(char))
+    return [token for token in _TOKEN_RE.findall(text) if token not in SPANISH_STOPWORDS]
+
+
+def term_frequencies(text):
+    # TF sublineal sobre terminos hasheados (crc32 es estable entre procesos).
+    vector = np.zeros(VECTOR_DIMENSIONS, dtype=np.float32)
+    for token in tokenize(text):
+        vector[zlib.crc32(token.encode("utf-8")) % VECTOR_DIMENSIONS] += 1.0
+    np.log1p(vector, out=vector)
+    return vector
+
+
+def product_text(name, description, category, subcategory, extracategory):
+    return " ".join(filter(None, [name, description, category, subcategory, extracategory]))
+
+
+def job_text(title, description):
+    return " ".join(filter(None, [title, description]))
+
+
+def _indexable_items():
+    """
+    (tipo, id, dueno, marca de actualizacion, texto) de beneficios activos y empleos publicados.
+    """
+    from apps.job.models import JobBoard
+    from apps.products.models import Product
+
+    products = (
+        Product.objects.filter(Q(finished=False) | Q(finished__isnull=True))
+        .values_list("id", "user_id", "updated", "name", "description", "category", "subcategory", "extracategory")
+        .iterator(chunk_size=2000)
+    )
+    for product_id, owner_id, updated, *texts in products:
+        yield KIND_PRODUCT, str(product_id), str(owner_id or ""), updated.timestamp() if updated else 0, product_text(*texts)
+
+    jobs = (
+        JobBoard.objects.filter(status="published")
+        .values_list("id", "user_id", "updated", "title", "description")
+        .iterator(chunk_size=2000)
+    )
+    for job_id, owner_id, updated, *texts in jobs:
+        yield KIND_JOB, str(job_id), str(owner_id), updated.timestamp() if updated else 0, job_text(*texts)
+
+
+def _read_index(directory):
+    # El indice nombra su archivo de vectores: reemplazar index.json cambia ambos a la vez.
+    index_path = os.path.join(directory, INDEX_FILENAME)
+    if not os.path.exists(index_path):
+        return None, None
+    with open(index_path, encoding="utf-8") as handle:
+        index = json.load(handle)
+    if index.get("format") != INDEX_FORMAT:
+        return None, None
+    vectors_path = os.path.join(directory, index["vectors"])
+    if not os.path.exists(vectors_path):
+        return None, None
+    return np.load(vectors_path, mmap_mode="r"), index
+
+
+def build_recommendation_index(full=False):
+    """
+    Construye (o actualiza) la matriz de TF en disco y recalcula el IDF sobre todas las
+    filas. En modo incremental las filas de items sin cambios se copian tal cual; solo
+    se vectorizan los nuevos o editados. Retorna (total, recalculados).
+    """
+    directory = _index_dir()
+    os.makedirs(directory, exist_ok=True)
+
+    old_matrix, old_index = (None, None) if full else _read_index(directory)
+    old_rows = {}
+    if old_index is not None:
+        for row, (kind, item_id, updated) in enumerate(
+            zip(old_index["kinds"], old_index["ids"], old_index["updated"])
+        ):
+            old_rows[(kind, item_id)] = (row, updated)
+
+    kinds, ids, owners, updated_marks = [], [], [], []
+    kept_rows, new_positions, new_frequencies = [], [], []
+    for kind, item_id, owner_id, updated, text in _indexable_items():
+        position = len(ids)
+        kinds.append(kind)
+        ids.append(item_id)
+        owners.append(owner_id)
+        updated_marks.append(updated)
+        previous = old_rows.get((kind, item_id))
+        if previous is not None and previous[1] == updated:
+            kept_rows.append((position, previous[0]))
+        else:
+            new_positions.append(position)
+            new_frequencies.append(term_frequencies(text))
+
+    total = len(ids)
+    new_frequencies = (
+        np.vstack(new_frequencies) if new_frequencies else np.zeros((0, VECTOR_DIMENSIONS), dtype=np.float32)
+    )
+
+    # Frecuencia documental sobre todas las filas: las conservadas guardan su TF crudo.
+    document_frequency = np.count_nonzero(new_frequencies, axis=0).astype(np.float64)
+    for start in range(0, len(kept_rows), ROW_CHUNK_SIZE):
+        old_positions = [old_row for _, old_row in kept_rows[start:start + ROW_CHUNK_SIZE]]
+        document_frequency += np.count_nonzero(old_matrix[old_positions], axis=0)
+    idf = np.log((1.0 + total) / (1.0 + document_frequency)) + 1.0
+
+    # Escritura atomica: los procesos web siguen leyendo la matriz anterior hasta el reemplazo.
+    vectors_filename = f"{VECTORS_PREFIX}{uuid.uuid4().hex}.npy"
+    matrix = np.lib.format.open_memmap(
+        os.path.join(directory, vectors_filename),
+        mode="w+",
+        dtype=np.float32,
+        shape=(max(total, 1), VECTOR_DIMENSIONS),
+    )
+    if total == 0:
+        matrix[:] = 0
+    for position, row in zip(new_positions, new_frequencies):
+        matrix[position] = row
+    for position, old_row in kept_rows:
+        matrix[position] = old_matrix[old_row]
+    matrix.flush()
+    del matrix, old_matrix
+
+    tmp_index = os.path.join(directory, f"{INDEX_FILENAME}.tmp")
+    with open(tmp_index, "w", encoding="utf-8") as handle:
+        json.dump(
+            {
+                "format": INDEX_FORMAT,
+                "vectors": vectors_filename,
+                "idf": idf.tolist(),
+                "kinds": kinds,
+                "ids": ids,
+                "owners": owners,
+                "updated": updated_marks,
+            },
+            handle,
+        )
+    os.replace(tmp_index, os.path.join(directory, INDEX_FILENAME))
+
+    # Las matrices anteriores ya mapeadas por otros procesos siguen validas tras el unlink.
+    for filename in os.listdir(directory):
+        if filename.startswith(VECTORS_PREFIX) and filename != vectors_filename:
+            os.remove(os.path.join(directory, filename))
+    return total, len(new_positions)
+
+
+def _weighted_norms(matrix, idf):
+    # Norma de cada fila TF-IDF, por bloques para no cargar la matriz entera.
+    norms = np.empty(matrix.shape[0], dtype=np.float32)
+    for start in range(0, matrix.shape[0], ROW_CHUNK_SIZE):
+        block = np.asarray(matrix[start:start + ROW_CHUNK_SIZE], dtype=np.float32) * idf
+        norms[start:start + ROW_CHUNK_SIZE] = np.linalg.norm(block, axis=1)
+    return norms
+
+
+def _get_loaded_index():
+    directory = _index_dir()
+    index_path = os.path.join(directory, INDEX_FILENAME)
+    try:
+        mtime = os.stat(index_path).st_mtime_ns
+    except FileNotFoundError:
+        return None
+    if _loaded["mtime"] == mtime:
+        return _loaded
+
+    with _loaded_lock:
+        if _loaded["mtime"] == mtime:
+            return _loaded
+        matrix, index = _read_index(directory)
+        if matrix is None:
+            return None
+        idf = np.asarray(index["idf"], dtype=np.float32)
+        _loaded["matrix"] = matrix
+        _loaded["index"] = index
+        _loaded["idf"] = idf
+        _loaded["norms"] = _weighted_norms(matrix, idf)
+        _loaded["positions"] = {
+            (kind, item_id): row for row, (kind, item_id) in enumerate(zip(index["kinds"], index["ids"]))
+        }
+        _loaded["mtime"] = mtime
+        return _loaded
+
+
+def recommend_for_history(product_ids, job_ids, limit=30):
+    """
+    Candidatos ordenados por similitud coseno con el perfil del empleado (promedio de los
+    vectores de lo que ya canjeo o a lo que ya se postulo). Un solo producto matriz-vector.
+    Retorna [(tipo, id, puntaje)] excluyendo el historial, o None si no hay indice/historial.
+    """
+    loaded = _get_loaded_index()
+    if loaded is None:
+        return None
+
+    positions = loaded["positions"]
+    history_rows = [positions[(KIND_PRODUCT, str(item_id))] for item_id in product_ids if (KIND_PRODUCT, str(item_id)) in positions]
+    history_rows += [positions[(KIND_JOB, str(item_id))] for item_id in job_ids if (KIND_JOB, str(item_id)) in positions]
+    if not history_rows:
+        return None
+
+    matrix, idf, norms = loaded["matrix"], loaded["idf"], loaded["norms"]
+    rows = sorted(set(history_rows))
+    history = np.asarray(matrix[rows], dtype=np.float32) * idf
+    history_norms = norms[rows][:, None]
+    history = np.divide(history, history_norms, out=np.zeros_like(history), where=history_norms > 0)
+    profile = history.mean(axis=0)
+    norm = float(np.linalg.norm(profile))
+    if norm == 0 or math.isnan(norm):
+        return None
+    # Coseno contra las filas TF-IDF sin materializarlas: el IDF va en el perfil.
+    dot = np.asarray(matrix @ (profile * idf / norm))
+    scores = np.divide(dot, norms, out=np.zeros_like(dot), where=norms > 0)
+    scores[history_rows] = -1.0
+
+    limit = min(limit, scores.shape[0])
+    if limit <= 0:
+        return []
+    top = np.argpartition(-scores, limit - 1)[:limit]
+    top = top[np.argsort(-scores[top], kind="stable")]
+
+    kinds, ids = loaded["index"]["kinds"], loaded["index"]["ids"]
+    return [(kinds[row], ids[row], float(scores[row])) for row in top.tolist() if scores[row] > 0]
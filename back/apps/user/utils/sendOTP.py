@@ -6,6 +6,57 @@ import threading
 
 logger = logging.getLogger(__name__)
 
+REQUIRED_TWILIO_SETTINGS = (
+    'TWILIO_ACCOUNT_SID',
+    'TWILIO_AUTH_TOKEN',
+    'TWILIO_PHONE_NUMBER',
+)
+
+
+def get_twilio_client():
+    """
+    Retorna un cliente Twilio reutilizable o None si falta configuración.
+    """
+    for setting in REQUIRED_TWILIO_SETTINGS:
+        if not getattr(settings, setting, None):
+            logger.error(f'Configuración faltante: {setting}')
+            return None
+    return Client(settings.TWILIO_ACCOUNT_SID, settings.TWILIO_AUTH_TOKEN)
+
+
+def send_sms(to_number: str, body_text: str, client=None) -> bool:
+    """
+    Envío síncrono. Permite pasar un cliente ya creado para reutilizarlo
+    entre muchos envíos. Retorna True si Twilio aceptó el mensaje.
+    """
+    try:
+        # 1. Validar número destino
+        if not to_number or not to_number.startswith('+'):
+            logger.error(f'Número inválido: {to_number}')
+            return False
+
+        # 2. Inicializar cliente (si no se recibió uno)
+        client = client or get_twilio_client()
+        if client is None:
+            return False
+
+        # 3. Enviar mensaje
+        message = client.messages.create(
+            body=body_text[:160],
+            from_=settings.TWILIO_PHONE_NUMBER,
+            to=to_number
+        )
+
+        logger.info(f'SMS enviado a {to_number}. SID: {message.sid}')
+        return True
+
+    except TwilioRestException as e:
+        logger.error(f'Error Twilio ({e.code}): {e.msg}')
+    except Exception as e:
+        logger.error(f'Error inesperado: {str(e)}')
+    return False
+
+
 def send_sms_in_background(to_number: str, body_text: str) -> None:
     """
     Versión mejorada con:
@@ -13,43 +64,5 @@ def send_sms_in_background(to_number: str, body_text: str) -> None:
     - Manejo de errores robusto
     - Compatibilidad con modo prueba
     """
-    def _send_sms():
-        try:
-            # 1. Validar configuración
-            required_settings = [
-                'TWILIO_ACCOUNT_SID',
-                'TWILIO_AUTH_TOKEN',
-                'TWILIO_PHONE_NUMBER'
-            ]
-            
-            for setting in required_settings:
-                if not getattr(settings, setting, None):
-                    logger.error(f'Configuración faltante: {setting}')
-                    return
-
-            # 2. Validar número destino
-            if not to_number.startswith('+'):
-                logger.error(f'Número inválido: {to_number}')
-                return
-            account_sid = settings.TWILIO_ACCOUNT_SID
-            auth_token = settings.TWILIO_AUTH_TOKEN
-            # 3. Inicializar cliente
-            client = Client(account_sid, auth_token)
-
-            # 4. Enviar mensaje
-            message = client.messages.create(
-                body=body_text[:160],
-                from_=settings.TWILIO_PHONE_NUMBER,
-                to=to_number
-            )
-
-            logger.info(f'SMS enviado a {to_number}. SID: {message.sid}')
-
-        except TwilioRestException as e:
-            logger.error(f'Error Twilio ({e.code}): {e.msg}')
-        except Exception as e:
-            logger.error(f'Error inesperado: {str(e)}')
-
     # Ejecutar en segundo plano
-    threading.Thread(target=_send_sms, daemon=True).start()
-    
\ No newline at end of file
+    threading.Thread(target=send_sms, args=(to_number, body_text), daemon=True).start()
@@ -0,0 +1,235 @@
+from collections import defaultdict
+
+from django.db import transaction
+from django.db.models import Q
+from django.db.models.functions import Lower, Trim
+
+# Peso del nicho frente a cada categoria compartida al puntuar empresas relacionadas.
+NICHE_WEIGHT = 2
+SUGGESTED_ENTERPRISES_LIMIT = 20
+# Se guardan mas de los que se muestran: la visibilidad se filtra al leer.
+SUGGESTED_PRODUCTS_LIMIT = 60
+SUGGESTED_JOBS_LIMIT = 60
+
+
+def _normalized(value):
+    return (value or "").strip().lower()
+
+
+def _active_products():
+    from apps.products.models import Product
+
+    return Product.objects.filter(Q(finished=False) | Q(finished__isnull=True))
+
+
+def refresh_enterprise_suggestions(enterprise_ids, persist=True):
+    """
+    Recalcula el indice de sugerencias (empresas, beneficios y empleos relacionados)
+    para las empresas dadas, puntuando por nicho y categorias compartidas.
+    Con persist=False solo calcula, sin escribir. Retorna {enterprise_id: EnterpriseSuggestion}.
+    """
+    from apps.job.models import JobBoard
+    from ..models import EnterpriseSuggestion, UserAccount, UserProfile
+
+    targets = dict(
+        UserAccount.objects.filter(id__in=list(enterprise_ids), role="enterprise").values_list(
+            "id", "userprofile__niche"
+        )
+    )
+    if not targets:
+        return {}
+    target_niches = {enterprise_id: _normalized(niche) for enterprise_id, niche in targets.items()}
+
+    target_categories = defaultdict(set)
+    own_products = _active_products().filter(user_id__in=list(targets)).values_list(
+        "user_id", "category", "subcategory", "extracategory"
+    )
+    for user_id, *values in own_products:
+        target_categories[user_id].update(filter(None, map(_normalized, values)))
+
+    niches = {niche for niche in target_niches.values() if niche}
+    categories = set().union(*target_categories.values()) if target_categories else set()
+
+    # Duenos candidatos por nicho y beneficios candidatos por nicho o categoria, en dos consultas.
+    niche_by_owner = {}
+    if niches:
+        niche_by_owner = dict(
+            UserProfile.objects.filter(user__role="enterprise")
+            .annotate(niche_normalized=Lower(Trim("niche")))
+            .filter(niche_normalized__in=niches)
+            .values_list("user_id", "niche_normalized")
+        )
+
+    product_filter = Q(user_id__in=list(niche_by_owner))
+    if categories:
+        product_filter |= (
+            Q(category_normalized__in=categories)
+            | Q(subcategory_normalized__in=categories)
+            | Q(extracategory_normalized__in=categories)
+        )
+    candidate_products = []
+    owner_categories = defaultdict(set)
+    if niche_by_owner or categories:
+        rows = (
+            _active_products()
+            .annotate(
+                category_normalized=Lower(Trim("category")),
+                subcategory_normalized=Lower(Trim("subcategory")),
+                extracategory_normalized=Lower(Trim("extracategory")),
+            )
+            .filter(product_filter)
+            .values_list(
+                "id",
+                "user_id",
+                "created",
+                "category_normalized",
+                "subcategory_normalized",
+                "extracategory_normalized",
+            )
+        )
+        for product_id, owner_id, created, *values in rows:
+            product_categories = {value for value in values if value}
+            owner_categories[owner_id].update(product_categories)
+            candidate_products.append((product_id, owner_id, created, product_categories))
+
+    enterprise_scores = {}
+    for target_id in targets:
+        niche = target_niches[target_id]
+        own_categories = target_categories.get(target_id, set())
+        scores = {}
+        for owner_id in set(niche_by_owner) | set(owner_categories):
+            if owner_id == target_id:
+                continue
+            score = len(owner_categories.get(owner_id, set()) & own_categories)
+            if niche and niche_by_owner.get(owner_id) == niche:
+                score += NICHE_WEIGHT
+            if score:
+                scores[owner_id] = score
+        enterprise_scores[target_id] = scores
+
+    related_owner_ids = set().union(*(scores.keys() for scores in enterprise_scores.values()))
+    candidate_jobs = []
+    if related_owner_ids:
+        candidate_jobs = list(
+            JobBoard.objects.filter(status="published", user_id__in=list(related_owner_ids)).values_list(
+                "id", "user_id", "created"
+            )
+        )
+
+    def _recency(created):
+        return created.timestamp() if created else 0
+
+    rows = []
+    for target_id, scores in enterprise_scores.items():
+        own_categories = target_categories.get(target_id, set())
+        niche = target_niches[target_id]
+
+        scored_products = []
+        for product_id, owner_id, created, product_categories in candidate_products:
+            if owner_id == target_id:
+                continue
+            overlap = len(product_categories & own_categories)
+            # Igual que antes: si la empresa tiene categorias, el beneficio debe compartir alguna.
+            if own_categories and not overlap:
+                continue
+            score = overlap
+            if niche and niche_by_owner.get(owner_id) == niche:
+                score += NICHE_WEIGHT
+            if score:
+                scored_products.append((score, _recency(created), product_id))
+        scored_products.sort(reverse=True)
+
+        scored_jobs = [
+            (scores[owner_id], _recency(created), job_id)
+            for job_id, owner_id, created in candidate_jobs
+            if owner_id in scores
+        ]
+        scored_jobs.sort(reverse=True)
+
+        related = sorted(scores.items(), key=lambda item: (-item[1], str(item[0])))
+        rows.append(
+            EnterpriseSuggestion(
+                enterprise_id=target_id,
+                related_enterprise_ids=[str(owner_id) for owner_id, _ in related[:SUGGESTED_ENTERPRISES_LIMIT]],
+                product_ids=[str(product_id) for _, _, product_id in scored_products[:SUGGESTED_PRODUCTS_LIMIT]],
+                job_ids=[str(job_id) for _, _, job_id in scored_jobs[:SUGGESTED_JOBS_LIMIT]],
+                stale=False,
+            )
+        )
+
+    if persist:
+        EnterpriseSuggestion.objects.bulk_create(
+            rows,
+            update_conflicts=True,
+            unique_fields=["enterprise"],
+            update_fields=["related_enterprise_ids", "product_ids", "job_ids", "stale", "updated_at"],
+        )
+    return {row.enterprise_id: row for row in rows}
+
+
+def mark_suggestions_stale(enterprise_id):
+    """
+    Marca como desactualizadas las sugerencias que un cambio de la empresa puede
+    alterar: la propia, las que ya tenia relacionadas y las de toda empresa que hoy
+    comparte su nicho o alguna categoria (incluye empresas nuevas). El recalculo lo
+    hace build_enterprise_suggestions --stale, no la lectura.
+    """
+    from ..models import EnterpriseSuggestion, UserProfile
+
+    previous = (
+        EnterpriseSuggestion.objects.filter(pk=enterprise_id).values_list("related_enterprise_ids", flat=True).first()
+        or []
+    )
+    affected = Q(pk__in=[enterprise_id, *previous])
+
+    niche = _normalized(
+        UserProfile.objects.filter(user_id=enterprise_id).values_list("niche", flat=True).first()
+    )
+    if niche:
+        affected |= Q(
+            pk__in=UserProfile.objects.annotate(niche_normalized=Lower(Trim("niche")))
+            .filter(niche_normalized=niche)
+            .values("user_id")
+        )
+
+    categories = set()
+    for values in _active_products().filter(user_id=enterprise_id).values_list(
+        "category", "subcategory", "extracategory"
+    ):
+        categories.update(filter(None, map(_normalized, values)))
+    if categories:
+        affected |= Q(
+            pk__in=_active_products()
+            .annotate(
+                category_normalized=Lower(Trim("category")),
+                subcategory_normalized=Lower(Trim("subcategory")),
+                extracategory_normalized=Lower(Trim("extracategory")),
+            )
+            .filter(
+                Q(category_normalized__in=categories)
+                | Q(subcategory_normalized__in=categories)
+                | Q(extracategory_normalized__in=categories)
+            )
+            .values("user_id")
+        )
+
+    EnterpriseSuggestion.objects.filter(affected, stale=False).update(stale=True)
+
+
+def schedule_suggestion_refresh(enterprise_id):
+    if enterprise_id:
+        transaction.on_commit(lambda: mark_suggestions_stale(enterprise_id))
+
+
+def get_enterprise_suggestion(enterprise_id):
+    """
+    Solo lectura: devuelve la fila del indice aunque este marcada como desactualizada
+    (la recalcula build_enterprise_suggestions --stale). Si la empresa aun no tiene
+    fila se calcula en memoria sin guardarla.
+    """
+    from ..models import EnterpriseSuggestion
+
+    suggestion = EnterpriseSuggestion.objects.filter(pk=enterprise_id).first()
+    if suggestion is not None:
+        return suggestion
+    return refresh_enterprise_suggestions([enterprise_id], persist=False).get(enterprise_id)
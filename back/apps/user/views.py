@@ -14,12 +14,14 @@ from .serializers import (
     UserCreateByRoleSerializer,
     EnterpriseMonthlyPaymentSerializer,
     EmployeeEnterpriseListSerializer,
+    EmployeeEnterpriseNearbySerializer,
 )
 from .utils.pagination import SmallSetPagination
 from django.http import Http404
 from django.contrib.auth import authenticate, get_user_model
 from django.utils import timezone
 from django.conf import settings
+from django.core.cache import cache
 from django.core.mail import send_mail
 from rest_framework.permissions import IsAuthenticated, AllowAny
 from rest_framework_simplejwt.tokens import RefreshToken
@@ -28,14 +30,37 @@ from datetime import timedelta
 from decimal import Decimal, InvalidOperation
 from .models import EnterpriseMonthlyPayment, EnterprisePaymentNotificationLog
 from django.db import IntegrityError
-from apps.products.models import Product
-from apps.job.models import JobBoard
+from apps.products.models import Product, ProductRedemption
+from apps.job.models import JobBoard, JobApplication
 from django.db.models import Case, When, Value, IntegerField, Q, Count
+import math
 import re
 from urllib.parse import quote
+import time
 from apps.products.serializers import EmployeeBenefitListSerializer
 from apps.job.serializers import EmployeeJobListSerializer
-from .utils.sendOTP import send_sms_in_background
+from .utils.notifications import NOTIFICATION_LOG_BATCH_SIZE, iter_notifications
+from .utils.phone import normalize_colombian_phone
+from core.utils.cache import versioned_key
+from .utils.employee_dashboard import EMPLOYEE_DASHBOARD_NAMESPACE, EMPLOYEE_DASHBOARD_TIMEOUT
+from .utils.enterprise_map import (
+    MAP_MAX_ZOOM,
+    MAP_MIN_ZOOM,
+    enterprises_for_map_scope,
+    filter_clusters_by_bbox,
+    get_enterprise_clusters,
+    map_scope_for_role,
+)
+from .utils.suggestions import get_enterprise_suggestion
+from .utils.autocomplete import complete_enterprises
+from .utils.recommendations import KIND_JOB, KIND_PRODUCT, recommend_for_history
+from .utils.nearby import (
+    NEARBY_DEFAULT_RADIUS_KM,
+    NEARBY_MAX_RADIUS_KM,
+    bounding_box,
+    bounding_box_filter,
+    nearby_enterprises,
+)
 from .utils.billing import (
     normalize_email,
     months_for_payment_cycle,
@@ -44,10 +69,12 @@ from .utils.billing import (
     normalize_sms_phone,
     payment_notification_stage,
     payment_stage_messages,
-    count_enterprise_employees,
+    count_employees_by_enterprise,
     resolve_enterprise_for_user,
-    ensure_payment_for_month,
-    is_enterprise_blocked,
+    materialize_payments,
+    payment_periods_filter,
+    mark_overdue_payments,
+    refresh_enterprise_blocked_state,
     user_access_blocked,
     employee_login_context_valid,
     previous_year_month
@@ -75,13 +102,6 @@ def _mutable_request_data(request):
     return dict(incoming)
 
 
-def normalize_colombian_phone(raw_phone):
-    phone = re.sub(r"\D+", "", str(raw_phone or ""))
-    if phone.startswith("57") and len(phone) == 12:
-        phone = phone[2:]
-    return phone
-
-
 def validate_unique_phone(phone_raw, current_user_id=None):
     normalized_phone = normalize_colombian_phone(phone_raw)
     if not normalized_phone:
@@ -90,15 +110,11 @@ def validate_unique_phone(phone_raw, current_user_id=None):
     if not re.fullmatch(r"3\d{9}", normalized_phone):
         raise ValueError("El teléfono debe ser colombiano: 10 dígitos e iniciar por 3.")
 
-    existing_users = UserAccount.objects.exclude(phone__isnull=True).exclude(phone="")
+    existing_users = UserAccount.objects.filter(phone_normalized=normalized_phone)
     if current_user_id:
         existing_users = existing_users.exclude(pk=current_user_id)
 
-    already_used = any(
-        normalize_colombian_phone(existing.phone) == normalized_phone
-        for existing in existing_users.only("id", "phone")
-    )
-    if already_used:
+    if existing_users.exists():
         raise ValueError(
             "El número de teléfono ingresado pertenece a un usuario ya registrado en el portal."
         )
@@ -121,44 +137,27 @@ def _parse_coordinate(raw_value, field_name):
     return value
 
 
-def _enterprise_profile_is_complete(enterprise: UserAccount):
-    if not enterprise or enterprise.role != "enterprise":
-        return False
-
-    profile = getattr(enterprise, "userprofile", None)
-
-    def _normalized(value):
-        if value is None:
-            return None
-        if isinstance(value, str):
-            return value.strip()
+def _parse_bbox(raw_value):
+    # Formato de Leaflet (toBBoxString): "oeste,sur,este,norte".
+    try:
+        west, south, east, north = [float(part) for part in str(raw_value or "").split(",")]
+    except (TypeError, ValueError):
+        raise ValueError("bbox inválido. Usa oeste,sur,este,norte.")
+    if not all(math.isfinite(value) for value in (west, south, east, north)) or south > north or west > east:
+        raise ValueError("bbox fuera de rango.")
+    # Con zoom bajo o tras cruzar el antimeridiano Leaflet entrega longitudes fuera de
+    # [-180, 180]: se envuelven y una vista de 360 grados o mas cubre todo el mundo.
+    south, north = max(south, -90.0), min(north, 90.0)
+    if east - west >= 360:
+        return -180.0, south, 180.0, north
+    return _wrap_longitude(west), south, _wrap_longitude(east), north
+
+
+def _wrap_longitude(value):
+    if -180 <= value <= 180:
         return value
+    return (value + 180) % 360 - 180
 
-    required_values = [
-        enterprise.email,
-        enterprise.first_name,
-        enterprise.last_name,
-        enterprise.enterprise,
-        enterprise.phone,
-        getattr(profile, "document_type_enterprise", None) if profile else None,
-        getattr(profile, "nuip_enterprise", None) if profile else None,
-        getattr(profile, "description", None) if profile else None,
-        getattr(profile, "niche", None) if profile else None,
-        getattr(profile, "address", None) if profile else None,
-    ]
-    return all(_normalized(value) not in [None, ""] for value in required_values)
-
-
-def _enterprise_is_visible_to_employees(enterprise: UserAccount):
-    if not enterprise or enterprise.role != "enterprise":
-        return False
-    if not enterprise.is_active or not enterprise.verified:
-        return False
-    if not _enterprise_profile_is_complete(enterprise):
-        return False
-    if is_enterprise_blocked(enterprise):
-        return False
-    return True
 
 class UserView(APIView):
     permission_classes = [IsAuthenticated]
@@ -193,12 +192,11 @@ class UserView(APIView):
                 return Response({'error': 'employee does not belong to this user'}, status=status.HTTP_404_NOT_FOUND)
         else:
             if request.user.role == 'enterprise':
-                enterprise = request.user.enterprise
                 employees = UserAccount.objects.filter(
-                    enterprise=enterprise,
+                    employer=request.user,
                     role='employees',
-                ).order_by('-date_joined')
-                paginator = SmallSetPagination()
+                ).select_related('employer').order_by('-date_joined')
+                paginator = SmallSetPagination(cache_count=True)
                 results = paginator.paginate_queryset(employees, request)
                 serializer = UserSerializer(results, many=True)
                 return paginator.get_paginated_response({'employees': serializer.data})
@@ -270,7 +268,7 @@ class UserView(APIView):
                         status=status.HTTP_403_FORBIDDEN,
                     )
             elif actor.role == "enterprise":
-                if user.role != "employees" or user.enterprise != actor.enterprise:
+                if user.role != "employees" or user.employer_id != actor.id:
                     return Response(
                         {"error": "Solo puedes editar empleados de tu empresa."},
                         status=status.HTTP_403_FORBIDDEN,
@@ -303,9 +301,7 @@ class UserView(APIView):
                 data['last_name'] = data['last_name'].title()
                 user.last_name = data['last_name']
             if actor.role == "Admin" and data.get('enterprise') and data['enterprise'] not in ['undefined', '']:
-                old_enterprise_name = user.enterprise
-                new_enterprise_name = data['enterprise']
-                user.enterprise = new_enterprise_name
+                user.enterprise = data['enterprise']
             if data.get('document_type') and data['document_type'] not in ['undefined', '']:
                 user.document_type = data['document_type']
             if data.get('nuip') and data['nuip'] not in ['undefined', '']:
@@ -324,19 +320,7 @@ class UserView(APIView):
                 user.is_active = str(data.get("is_active")).lower() in ["true", "1", "yes"]
             user.updated_at = timezone.now()
             user.save()
-
-            # Si admin cambia nombre de empresa, actualizar referencia en empleados ligados.
-            if (
-                actor.role == "Admin"
-                and user.role == "enterprise"
-                and 'old_enterprise_name' in locals()
-                and old_enterprise_name
-                and old_enterprise_name != user.enterprise
-            ):
-                UserAccount.objects.filter(
-                    role="employees",
-                    enterprise=old_enterprise_name,
-                ).update(enterprise=user.enterprise)
+            # Los empleados quedan ligados por employer (FK), no requieren reescritura al renombrar.
 
             return Response({'success': 'Titular Editado Correctamente.'}, status=status.HTTP_200_OK)
         except Exception as e:
@@ -397,7 +381,10 @@ class UserView(APIView):
 
         serializer = UserCreateByRoleSerializer(data=data)
         serializer.is_valid(raise_exception=True)
-        user = serializer.save()
+        if actor.role == "enterprise":
+            user = serializer.save(employer=actor)
+        else:
+            user = serializer.save()
         created_payment = None
 
         # Un admin crea empresas verificadas para habilitar operación inmediata.
@@ -405,10 +392,12 @@ class UserView(APIView):
             user.verified = True
             user.save(update_fields=["verified"])
             today = timezone.localdate()
-            for year, month in months_for_payment_cycle(today):
-                payment = ensure_payment_for_month(user, year, month)
-                if month == today.month:
-                    created_payment = payment
+            materialize_payments([user.id], months_for_payment_cycle(today))
+            created_payment = EnterpriseMonthlyPayment.objects.filter(
+                enterprise=user,
+                year=today.year,
+                month=today.month,
+            ).first()
             if profile_payload:
                 profile = getattr(user, "userprofile", None)
                 if profile is None:
@@ -445,7 +434,7 @@ class UserView(APIView):
                     status=status.HTTP_403_FORBIDDEN,
                 )
         elif actor.role == "enterprise":
-            if target.role != "employees" or target.enterprise != actor.enterprise:
+            if target.role != "employees" or target.employer_id != actor.id:
                 return Response(
                     {"error": "Solo puedes eliminar empleados de tu empresa."},
                     status=status.HTTP_403_FORBIDDEN,
@@ -636,19 +625,41 @@ class EmployeeDashboardView(APIView):
                 status=status.HTTP_403_FORBIDDEN,
             )
 
-        base_enterprises = (
-            UserAccount.objects.filter(role="enterprise", is_active=True, verified=True)
-            .select_related("userprofile")
-            .order_by("enterprise", "username")
+        # El listado compartido es igual para todos los empleados: se cachea por version
+        # (invalidada por señales) y por host, ya que las URLs de imagenes son absolutas.
+        cache_key = versioned_key(
+            EMPLOYEE_DASHBOARD_NAMESPACE,
+            request.scheme,
+            request.get_host(),
         )
-        visible_enterprise_ids = [
-            enterprise.id
-            for enterprise in base_enterprises
-            if _enterprise_is_visible_to_employees(enterprise)
-        ]
+        shared = cache.get(cache_key)
+        cache_status = "HIT"
+        if shared is None:
+            cache_status = "MISS"
+            shared = self._build_shared_payload(request)
+            cache.set(cache_key, shared, timeout=EMPLOYEE_DASHBOARD_TIMEOUT)
 
-        enterprises = (
-            UserAccount.objects.filter(id__in=visible_enterprise_ids)
+        linked_enterprise = None
+        if request.user.employer_id:
+            employer_id = str(request.user.employer_id)
+            linked_enterprise = next(
+                (item for item in shared["enterprises"] if str(item.get("id")) == employer_id),
+                None,
+            )
+
+        payload = {
+            **shared,
+            "linked_enterprise": linked_enterprise,
+        }
+        response = Response(payload, status=status.HTTP_200_OK)
+        response["X-Cache"] = cache_status
+        return response
+
+    def _build_shared_payload(self, request):
+        visible_enterprise_ids = UserAccount.objects.visible_to_employees().values("id")
+
+        enterprises = list(
+            UserAccount.objects.visible_to_employees()
             .select_related("userprofile")
             .annotate(
                 jobs_count=Count("job_board", filter=Q(job_board__status="published"), distinct=True),
@@ -692,41 +703,99 @@ class EmployeeDashboardView(APIView):
             context={"request": request},
         )
 
-        linked_enterprise = None
-        employee_enterprise_name = (request.user.enterprise or "").strip()
-        if employee_enterprise_name:
-            linked_enterprise = enterprises.filter(
-                enterprise__iexact=employee_enterprise_name
-            ).first()
-            if linked_enterprise is None:
-                linked_enterprise = enterprises.filter(
-                    username__iexact=employee_enterprise_name
-                ).first()
-
-        payload = {
+        # Los totales salen de las anotaciones ya materializadas, sin COUNT adicionales.
+        return {
             "enterprises": enterprise_serializer.data,
             "jobs": jobs_serializer.data,
             "benefits": benefits_serializer.data,
-            "linked_enterprise": (
-                EmployeeEnterpriseListSerializer(
-                    linked_enterprise,
-                    context={"request": request},
-                ).data
-                if linked_enterprise is not None
-                else None
-            ),
             "meta": {
-                "total_enterprises": enterprises.count(),
-                "total_jobs": JobBoard.objects.filter(
-                    status="published",
-                    user_id__in=visible_enterprise_ids,
-                ).count(),
-                "total_benefits": Product.objects.filter(
-                    user_id__in=visible_enterprise_ids,
-                ).filter(Q(finished=False) | Q(finished__isnull=True)).count(),
+                "total_enterprises": len(enterprises),
+                "total_jobs": sum(enterprise.jobs_count for enterprise in enterprises),
+                "total_benefits": sum(enterprise.benefits_count for enterprise in enterprises),
             },
         }
-        return Response(payload, status=status.HTTP_200_OK)
+
+
+class EmployeeRecommendationsView(APIView):
+    permission_classes = [IsAuthenticated]
+    RESULTS_LIMIT = 12
+    HISTORY_LIMIT = 50
+
+    def get(self, request, *args, **kwargs):
+        if request.user.role != "employees":
+            return Response(
+                {"detail": "Solo empleados."},
+                status=status.HTTP_403_FORBIDDEN,
+            )
+
+        started = time.perf_counter()
+        redeemed_product_ids = list(
+            ProductRedemption.objects.filter(employee=request.user, product__isnull=False)
+            .order_by("-redeemed_at")
+            .values_list("product_id", flat=True)[: self.HISTORY_LIMIT]
+        )
+        applied_job_ids = list(
+            JobApplication.objects.filter(applicant=request.user)
+            .order_by("-created_at")
+            .values_list("job_id", flat=True)[: self.HISTORY_LIMIT]
+        )
+        # Se piden mas candidatos de los que se muestran: la visibilidad se filtra despues.
+        ranked = recommend_for_history(
+            redeemed_product_ids,
+            applied_job_ids,
+            limit=self.RESULTS_LIMIT * 5,
+        )
+
+        visible_enterprise_ids = UserAccount.objects.visible_to_employees().values("id")
+        benefits_qs = (
+            Product.objects.filter(user_id__in=visible_enterprise_ids)
+            .filter(Q(finished=False) | Q(finished__isnull=True))
+            .select_related("user")
+        )
+        jobs_qs = JobBoard.objects.filter(
+            status="published",
+            user_id__in=visible_enterprise_ids,
+        ).select_related("user")
+
+        if ranked:
+            strategy = "tfidf"
+            product_rank = {item_id: index for index, (kind, item_id, _) in enumerate(ranked) if kind == KIND_PRODUCT}
+            job_rank = {item_id: index for index, (kind, item_id, _) in enumerate(ranked) if kind == KIND_JOB}
+            benefits = sorted(
+                benefits_qs.filter(id__in=list(product_rank)),
+                key=lambda benefit: product_rank[str(benefit.id)],
+            )[: self.RESULTS_LIMIT]
+            jobs = sorted(
+                jobs_qs.filter(id__in=list(job_rank)),
+                key=lambda job: job_rank[str(job.id)],
+            )[: self.RESULTS_LIMIT]
+        else:
+            # Sin historial (o sin indice construido): lo mas reciente.
+            strategy = "recent"
+            benefits = list(
+                benefits_qs.exclude(id__in=redeemed_product_ids).order_by("-created")[: self.RESULTS_LIMIT]
+            )
+            jobs = list(jobs_qs.exclude(id__in=applied_job_ids).order_by("-created")[: self.RESULTS_LIMIT])
+
+        return Response(
+            {
+                "benefits": EmployeeBenefitListSerializer(
+                    benefits,
+                    many=True,
+                    context={"request": request},
+                ).data,
+                "jobs": EmployeeJobListSerializer(
+                    jobs,
+                    many=True,
+                    context={"request": request},
+                ).data,
+                "meta": {
+                    "strategy": strategy,
+                    "took_ms": round((time.perf_counter() - started) * 1000, 2),
+                },
+            },
+            status=status.HTTP_200_OK,
+        )
 
 
 class EnterpriseMapView(APIView):
@@ -741,17 +810,7 @@ class EnterpriseMapView(APIView):
             )
 
         if role == "employees":
-            base_enterprises = (
-                UserAccount.objects.filter(role="enterprise", is_active=True, verified=True)
-                .select_related("userprofile")
-                .order_by("enterprise", "username")
-            )
-            visible_enterprise_ids = [
-                enterprise.id
-                for enterprise in base_enterprises
-                if _enterprise_is_visible_to_employees(enterprise)
-            ]
-            enterprises = UserAccount.objects.filter(id__in=visible_enterprise_ids)
+            enterprises = UserAccount.objects.visible_to_employees()
         else:
             enterprises = UserAccount.objects.filter(
                 role="enterprise",
@@ -779,6 +838,91 @@ class EnterpriseMapView(APIView):
         return Response({"enterprises": serializer.data}, status=status.HTTP_200_OK)
 
 
+class EnterpriseMapClustersView(APIView):
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request, *args, **kwargs):
+        role = request.user.role
+        if role not in ["enterprise", "employees", "Admin"]:
+            return Response(
+                {"detail": "No autorizado."},
+                status=status.HTTP_403_FORBIDDEN,
+            )
+
+        try:
+            bbox = _parse_bbox(request.query_params.get("bbox"))
+        except ValueError as exc:
+            return Response({"detail": str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            zoom = int(request.query_params.get("zoom", MAP_MIN_ZOOM))
+        except (TypeError, ValueError):
+            return Response({"detail": "zoom inválido."}, status=status.HTTP_400_BAD_REQUEST)
+        zoom = max(MAP_MIN_ZOOM, min(MAP_MAX_ZOOM, zoom))
+
+        clusters = get_enterprise_clusters(map_scope_for_role(role), zoom)
+        clusters = filter_clusters_by_bbox(clusters, bbox)
+        return Response(
+            {
+                "zoom": zoom,
+                "total": sum(clusters["count"]),
+                "clusters": clusters,
+            },
+            status=status.HTTP_200_OK,
+        )
+
+
+class EnterpriseMapDetailView(APIView):
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request, enterprise_id, *args, **kwargs):
+        role = request.user.role
+        if role not in ["enterprise", "employees", "Admin"]:
+            return Response(
+                {"detail": "No autorizado."},
+                status=status.HTTP_403_FORBIDDEN,
+            )
+
+        enterprise = (
+            enterprises_for_map_scope(map_scope_for_role(role))
+            .filter(id=enterprise_id)
+            .select_related("userprofile")
+            .annotate(
+                jobs_count=Count("job_board", filter=Q(job_board__status="published"), distinct=True),
+                benefits_count=Count(
+                    "products",
+                    filter=Q(products__finished=False) | Q(products__finished__isnull=True),
+                    distinct=True,
+                ),
+            )
+            .first()
+        )
+        if not enterprise:
+            return Response(
+                {"detail": "Empresa no encontrada."},
+                status=status.HTTP_404_NOT_FOUND,
+            )
+
+        serializer = EmployeeEnterpriseListSerializer(enterprise, context={"request": request})
+        return Response(serializer.data, status=status.HTTP_200_OK)
+
+
+class EmployeeCompaniesAutocompleteView(APIView):
+    """
+    Sugerencias por prefijo (?q=) de nombres de empresas visibles y nichos, desde un
+    arreglo ordenado en memoria; no consulta la base de datos por pulsacion.
+    """
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request, *args, **kwargs):
+        if request.user.role != "employees":
+            return Response(
+                {"detail": "Solo empleados."},
+                status=status.HTTP_403_FORBIDDEN,
+            )
+        query = request.query_params.get("q") or ""
+        return Response({"query": query, "results": complete_enterprises(query)}, status=status.HTTP_200_OK)
+
+
 class EmployeeCompaniesListView(APIView):
     permission_classes = [IsAuthenticated]
 
@@ -790,19 +934,8 @@ class EmployeeCompaniesListView(APIView):
             )
 
         search = (request.query_params.get("search") or "").strip()
-        base_enterprises = (
-            UserAccount.objects.filter(role="enterprise", is_active=True, verified=True)
-            .select_related("userprofile")
-            .order_by("enterprise", "username")
-        )
-        visible_enterprise_ids = [
-            enterprise.id
-            for enterprise in base_enterprises
-            if _enterprise_is_visible_to_employees(enterprise)
-        ]
-
         enterprises = (
-            UserAccount.objects.filter(id__in=visible_enterprise_ids)
+            UserAccount.objects.visible_to_employees()
             .select_related("userprofile")
             .annotate(
                 jobs_count=Count("job_board", filter=Q(job_board__status="published"), distinct=True),
@@ -812,7 +945,6 @@ class EmployeeCompaniesListView(APIView):
                     distinct=True,
                 ),
             )
-            .order_by("enterprise", "username")
         )
         if search:
             enterprises = enterprises.filter(
@@ -822,6 +954,33 @@ class EmployeeCompaniesListView(APIView):
                 | Q(userprofile__description__icontains=search)
                 | Q(userprofile__niche__icontains=search)
             )
+
+        lat_raw = request.query_params.get("lat")
+        lng_raw = request.query_params.get("lng")
+        if lat_raw not in [None, ""] or lng_raw not in [None, ""]:
+            try:
+                latitude = _parse_coordinate(lat_raw, "latitude")
+                longitude = _parse_coordinate(lng_raw, "longitude")
+                if latitude is None or longitude is None:
+                    raise ValueError("Envía lat y lng para buscar empresas cercanas.")
+                radius_km = float(request.query_params.get("radius_km") or NEARBY_DEFAULT_RADIUS_KM)
+            except ValueError as exc:
+                return Response({"detail": str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+            if not 0 < radius_km <= NEARBY_MAX_RADIUS_KM:
+                return Response(
+                    {"detail": f"radius_km debe estar entre 0 y {NEARBY_MAX_RADIUS_KM}."},
+                    status=status.HTTP_400_BAD_REQUEST,
+                )
+            return self._nearby_response(
+                request,
+                enterprises,
+                bool(search),
+                float(latitude),
+                float(longitude),
+                radius_km,
+            )
+
+        enterprises = enterprises.order_by("enterprise", "username")
         paginator = SmallSetPagination()
         paginated = paginator.paginate_queryset(enterprises, request)
         serializer = EmployeeEnterpriseListSerializer(
@@ -831,6 +990,42 @@ class EmployeeCompaniesListView(APIView):
         )
         return paginator.get_paginated_response(serializer.data)
 
+    def _nearby_response(self, request, enterprises, filtered, latitude, longitude, radius_km):
+        # Distancias sobre los arreglos en memoria (caja + haversine vectorizado).
+        nearby = nearby_enterprises("employees", latitude, longitude, radius_km)
+        if filtered and nearby:
+            # Con busqueda, el texto se filtra en SQL solo dentro de la caja (indice lat/lng).
+            bbox = bounding_box(latitude, longitude, radius_km)
+            allowed_ids = {
+                str(enterprise_id)
+                for enterprise_id in enterprises.filter(bounding_box_filter(bbox))
+                .order_by()
+                .values_list("id", flat=True)
+            }
+            nearby = [row for row in nearby if row[0] in allowed_ids]
+
+        paginator = SmallSetPagination()
+        page = paginator.paginate_queryset(nearby, request)
+        distances = dict(page)
+        by_id = {
+            str(enterprise.id): enterprise
+            for enterprise in enterprises.filter(id__in=list(distances))
+        }
+        results = []
+        for enterprise_id, distance in page:
+            enterprise = by_id.get(enterprise_id)
+            if enterprise is None:
+                continue
+            enterprise.distance_km = round(distance, 3)
+            results.append(enterprise)
+
+        serializer = EmployeeEnterpriseNearbySerializer(
+            results,
+            many=True,
+            context={"request": request},
+        )
+        return paginator.get_paginated_response(serializer.data)
+
 
 class EmployeeEnterpriseDetailView(APIView):
     permission_classes = [IsAuthenticated]
@@ -842,12 +1037,10 @@ class EmployeeEnterpriseDetailView(APIView):
                 status=status.HTTP_403_FORBIDDEN,
             )
 
-        enterprise = UserAccount.objects.filter(
+        enterprise = UserAccount.objects.visible_to_employees().filter(
             id=enterprise_id,
-            role="enterprise",
-            is_active=True,
         ).select_related("userprofile").first()
-        if not enterprise or not _enterprise_is_visible_to_employees(enterprise):
+        if not enterprise:
             return Response(
                 {"detail": "Empresa no encontrada."},
                 status=status.HTTP_404_NOT_FOUND,
@@ -866,47 +1059,31 @@ class EmployeeEnterpriseDetailView(APIView):
             Q(finished=False) | Q(finished__isnull=True)
         ).order_by("-created")[:60]
 
-        categories = set()
-        for benefit in benefits_qs:
-            for value in [benefit.category, benefit.subcategory, benefit.extracategory]:
-                if value:
-                    categories.add(value.strip().lower())
-
-        niche_enterprise_ids = []
-        if niche:
-            suggested_candidate_ids = list(
-                UserProfile.objects.filter(niche__iexact=niche)
-                .exclude(user=enterprise)
-                .values_list("user_id", flat=True)
-            )
-            suggested_candidates = UserAccount.objects.filter(
-                id__in=suggested_candidate_ids,
-                role="enterprise",
-                is_active=True,
-                verified=True,
-            ).select_related("userprofile")
-            niche_enterprise_ids = [
-                candidate.id
-                for candidate in suggested_candidates
-                if _enterprise_is_visible_to_employees(candidate)
-            ]
+        # Sugerencias desde el indice precalculado (lectura por llave primaria); la
+        # visibilidad se aplica al leer porque depende del estado de pago actual.
+        suggestion = get_enterprise_suggestion(enterprise.id)
+        suggested_product_ids = suggestion.product_ids if suggestion else []
+        suggested_job_ids = suggestion.job_ids if suggestion else []
+        visible_enterprise_ids = UserAccount.objects.visible_to_employees().values("id")
 
         suggestions_benefits_qs = Product.objects.filter(
-            user_id__in=niche_enterprise_ids,
+            id__in=suggested_product_ids,
+            user_id__in=visible_enterprise_ids,
         ).filter(
             Q(finished=False) | Q(finished__isnull=True)
-        ).exclude(user=enterprise).select_related("user").order_by("-created")
-
-        if categories:
-            category_filter = Q()
-            for category in categories:
-                category_filter |= Q(category__icontains=category) | Q(subcategory__icontains=category)
-            suggestions_benefits_qs = suggestions_benefits_qs.filter(category_filter)
-
+        ).select_related("user")
         suggestions_jobs_qs = JobBoard.objects.filter(
-            user_id__in=niche_enterprise_ids,
+            id__in=suggested_job_ids,
+            user_id__in=visible_enterprise_ids,
             status="published",
-        ).exclude(user=enterprise).select_related("user").annotate(applications_count=Count('applications')).order_by("-created")[:30]
+        ).select_related("user").annotate(applications_count=Count('applications'))
+
+        def _index_order(items, ordered_ids):
+            position = {item_id: index for index, item_id in enumerate(ordered_ids)}
+            return sorted(items, key=lambda item: position.get(str(item.id), len(position)))
+
+        suggestions_benefits = _index_order(suggestions_benefits_qs, suggested_product_ids)
+        suggestions_jobs = _index_order(suggestions_jobs_qs, suggested_job_ids)[:30]
 
         def _file_url(field):
             if not field:
@@ -954,7 +1131,7 @@ class EmployeeEnterpriseDetailView(APIView):
                 "enterprise": benefit.user.enterprise or benefit.user.username,
                 "image": _file_url(benefit.image),
             }
-            for benefit in suggestions_benefits_qs[:30]
+            for benefit in suggestions_benefits[:30]
         ]
 
         suggested_jobs = [
@@ -967,7 +1144,7 @@ class EmployeeEnterpriseDetailView(APIView):
                 "image": _file_url(job.image),
                 "applications_count": getattr(job, 'applications_count', 0),
             }
-            for job in suggestions_jobs_qs
+            for job in suggestions_jobs
         ]
 
         payload = {
@@ -1014,43 +1191,36 @@ class EnterpriseBillingDashboardView(APIView):
             )
 
         today = timezone.localdate()
-        enterprises = UserAccount.objects.filter(role="enterprise").select_related("userprofile")
+        enterprises = list(
+            UserAccount.objects.filter(role="enterprise").select_related("userprofile")
+        )
+        enterprise_ids = [enterprise.id for enterprise in enterprises]
         cycle = months_for_payment_cycle(today)
 
-        results = []
-        for enterprise in enterprises:
-            for year, month in cycle:
-                ensure_payment_for_month(enterprise, year, month)
-
-            # Actualiza estados pendientes->vencidos y calcula bloqueo real.
-            blocked = is_enterprise_blocked(enterprise)
+        materialize_payments(enterprise_ids, cycle)
 
-            cycle_filter = Q()
-            for year, month in cycle:
-                cycle_filter |= Q(year=year, month=month)
+        # Actualiza estados pendientes->vencidos y recalcula el bloqueo de todas las empresas.
+        blocked_ids = refresh_enterprise_blocked_state(enterprise_ids, today)
 
-            # Incluye ciclo actual + cualquier deuda antigua no pagada para que admin pueda normalizar la empresa.
-            unpaid_legacy_ids = list(
-                enterprise.monthly_payments.filter(
-                    grace_date__lt=today,
-                )
-                .exclude(status=EnterpriseMonthlyPayment.STATUS_PAID)
-                .exclude(cycle_filter)
-                .values_list("id", flat=True)
-            )
-
-            payments_qs = enterprise.monthly_payments.filter(
-                cycle_filter | Q(id__in=unpaid_legacy_ids)
-            ).order_by("-year", "-month")
-
-            payments = []
-            for payment in payments_qs:
-                payment_data = EnterpriseMonthlyPaymentSerializer(payment, context={"request": request}).data
-                payment_data["can_register"] = can_register_payment_today(payment, today)
-                payments.append(payment_data)
+        # Incluye ciclo actual + cualquier deuda antigua no pagada para que admin pueda normalizar la empresa.
+        unpaid_legacy_filter = Q(grace_date__lt=today) & ~Q(status=EnterpriseMonthlyPayment.STATUS_PAID)
+        payments_qs = (
+            EnterpriseMonthlyPayment.objects.filter(enterprise_id__in=enterprise_ids)
+            .filter(payment_periods_filter(cycle) | unpaid_legacy_filter)
+            .select_related("enterprise", "paid_reported_by")
+            .order_by("-year", "-month")
+        )
+        payments_by_enterprise = {}
+        for payment in payments_qs:
+            payment_data = EnterpriseMonthlyPaymentSerializer(payment, context={"request": request}).data
+            payment_data["can_register"] = can_register_payment_today(payment, today)
+            payments_by_enterprise.setdefault(payment.enterprise_id, []).append(payment_data)
 
+        prev_year, prev_month = previous_year_month(today.year, today.month)
+        results = []
+        for enterprise in enterprises:
+            payments = payments_by_enterprise.get(enterprise.id, [])
             current_payment = next((p for p in payments if p["year"] == today.year and p["month"] == today.month), None)
-            prev_year, prev_month = previous_year_month(today.year, today.month)
             previous_payment = (
                 next((p for p in payments if p["year"] == prev_year and p["month"] == prev_month), None)
             )
@@ -1060,7 +1230,7 @@ class EnterpriseBillingDashboardView(APIView):
                     "current_payment": current_payment,
                     "previous_payment": previous_payment,
                     "payments": payments,
-                    "is_blocked": blocked,
+                    "is_blocked": enterprise.id in blocked_ids,
                 }
             )
 
@@ -1081,11 +1251,11 @@ class EnterpriseBillingGenerateView(APIView):
         year = int(request.data.get("year", today.year))
         month = int(request.data.get("month", today.month))
 
-        created_or_updated = 0
-        enterprises = UserAccount.objects.filter(role="enterprise").select_related("userprofile")
-        for enterprise in enterprises:
-            ensure_payment_for_month(enterprise, year, month)
-            created_or_updated += 1
+        enterprise_ids = list(
+            UserAccount.objects.filter(role="enterprise").values_list("id", flat=True)
+        )
+        materialize_payments(enterprise_ids, [(year, month)])
+        created_or_updated = len(enterprise_ids)
 
         return Response(
             {
@@ -1187,8 +1357,7 @@ class EnterpriseBillingActivationCronView(APIView):
         enterprise_ids = list(enterprises.values_list("id", flat=True))
 
         if not dry_run:
-            for enterprise in enterprises:
-                ensure_payment_for_month(enterprise, year, month)
+            materialize_payments(enterprise_ids, [(year, month)])
 
         return Response(
             {
@@ -1286,6 +1455,7 @@ class EnterpriseMonthlyPaymentMarkPaidView(APIView):
         if notes not in [None, "", "undefined"]:
             payment.notes = notes
         payment.save()
+        refresh_enterprise_blocked_state([payment.enterprise_id], today)
 
         return Response(
             {
@@ -1396,47 +1566,131 @@ class EnterprisePaymentDelinquencyNotificationsView(APIView):
                     status=status.HTTP_400_BAD_REQUEST,
                 )
 
+        timings = {}
+        phase_started = time.perf_counter()
+
+        def _close_phase(name):
+            nonlocal phase_started
+            now = time.perf_counter()
+            timings[name] = round((now - phase_started) * 1000, 2)
+            phase_started = now
+
         payments = (
-            EnterpriseMonthlyPayment.objects.select_related("enterprise", "enterprise__userprofile")
+            EnterpriseMonthlyPayment.objects.select_related("enterprise")
             .exclude(status=EnterpriseMonthlyPayment.STATUS_PAID)
         )
         if enterprise_id:
             payments = payments.filter(enterprise_id=enterprise_id)
 
         # Mantener estados al dia antes de evaluar stages.
-        overdue_updated = payments.filter(
-            status=EnterpriseMonthlyPayment.STATUS_PENDING,
-            grace_date__lt=today,
-        ).update(status=EnterpriseMonthlyPayment.STATUS_OVERDUE)
-
-        results = []
-        sent_count = 0
-        skipped_count = 0
-
-        for payment in payments.order_by("due_date", "enterprise__enterprise", "enterprise__email"):
+        scope = [enterprise_id] if enterprise_id else None
+        overdue_updated = mark_overdue_payments(scope, today)
+        refresh_enterprise_blocked_state(scope, today, mark_overdue=False)
+        _close_phase("refresh_status")
+
+        # 1) Prefiltro SQL: solo pagos que pueden tener stage hoy (vencen en <= 2 dias o ya vencidos).
+        candidates = []
+        for payment in payments.filter(due_date__lte=today + timedelta(days=2)).order_by(
+            "due_date", "enterprise__enterprise", "enterprise__email"
+        ):
             stage = payment_notification_stage(payment, today)
             if not stage:
                 continue
             if stage_filter and stage != stage_filter:
                 continue
-
             template = payment_stage_messages(payment, stage, today)
             if not template:
                 continue
+            candidates.append((payment, stage, template))
+        _close_phase("prefilter")
+
+        # 2) Logs existentes (payment, stage) en una sola consulta.
+        already_notified = {}
+        if candidates:
+            existing_logs = EnterprisePaymentNotificationLog.objects.filter(
+                payment_id__in={payment.id for payment, _, _ in candidates},
+            ).values_list("payment_id", "stage", "sent_to_phone")
+            already_notified = {
+                (payment_id, stage): sent_to_phone
+                for payment_id, stage, sent_to_phone in existing_logs
+            }
+        _close_phase("prefetch_logs")
 
-            existing_log = EnterprisePaymentNotificationLog.objects.filter(
-                payment=payment,
-                stage=stage,
-            ).first()
-            if existing_log and not dry_run:
+        # 3) Conteo de empleados afectados con un GROUP BY.
+        pending = [
+            (payment, stage, template)
+            for payment, stage, template in candidates
+            if dry_run or (payment.id, stage) not in already_notified
+        ]
+        employees_by_enterprise = count_employees_by_enterprise(
+            {payment.enterprise_id: payment.enterprise for payment, _, _ in pending}.values()
+        )
+        _close_phase("employee_counts")
+
+        # 4) Envío de email y SMS con pool acotado (una conexión SMTP y un cliente Twilio).
+        jobs = []
+        for payment, stage, template in pending:
+            enterprise = payment.enterprise
+            phone = normalize_sms_phone(enterprise.phone) if enterprise.phone else None
+            email = (enterprise.email or "").strip().lower() or None
+            jobs.append(
+                {
+                    "email": email,
+                    "phone": phone,
+                    "subject": template["subject"],
+                    "email_body": template["email"],
+                    "sms_body": template["sms"],
+                }
+            )
+        # 5) Los logs se guardan por tandas a medida que terminan los envíos: si la
+        # corrida se corta, lo ya enviado queda registrado y no se reenvía.
+        deliveries = []
+        sent_count = 0
+        if not dry_run:
+            new_logs = []
+            for (payment, stage, template), job, delivery in zip(pending, jobs, iter_notifications(jobs)):
+                deliveries.append(delivery)
+                new_logs.append(
+                    EnterprisePaymentNotificationLog(
+                        payment=payment,
+                        enterprise_id=payment.enterprise_id,
+                        stage=stage,
+                        stage_label=template["label"],
+                        email_sent=delivery["email_sent"],
+                        sms_sent=delivery["sms_sent"],
+                        sent_to_email=job["email"],
+                        sent_to_phone=job["phone"],
+                        metadata={
+                            "auth_source": auth_source,
+                            "today": str(today),
+                            "errors": delivery["errors"],
+                            "affected_users": employees_by_enterprise.get(payment.enterprise_id, 0),
+                        },
+                    )
+                )
+                if len(new_logs) >= NOTIFICATION_LOG_BATCH_SIZE:
+                    EnterprisePaymentNotificationLog.objects.bulk_create(new_logs, ignore_conflicts=True)
+                    sent_count += len(new_logs)
+                    new_logs = []
+            EnterprisePaymentNotificationLog.objects.bulk_create(new_logs, ignore_conflicts=True)
+            sent_count += len(new_logs)
+        _close_phase("dispatch")
+
+        results = []
+        skipped_count = 0
+        pending_results = iter(zip(jobs, deliveries if not dry_run else [None] * len(jobs)))
+
+        for payment, stage, template in candidates:
+            enterprise = payment.enterprise
+            if not dry_run and (payment.id, stage) in already_notified:
                 skipped_count += 1
                 results.append(
                     {
                         "payment_id": payment.id,
                         "enterprise_id": str(payment.enterprise_id),
-                        "enterprise_name": payment.enterprise.enterprise or payment.enterprise.username or "",
-                        "enterprise_email": payment.enterprise.email,
-                        "enterprise_phone": existing_log.sent_to_phone,
+                        "enterprise_name": enterprise.enterprise or enterprise.username or "",
+                        "enterprise_email": enterprise.email,
+                        "enterprise_phone": already_notified[(payment.id, stage)],
                         "stage": stage,
                         "stage_label": template["label"],
                         "status": "skipped_already_notified",
@@ -1444,77 +1698,24 @@ class EnterprisePaymentDelinquencyNotificationsView(APIView):
                 )
                 continue
 
-            enterprise = payment.enterprise
-            enterprise_name = enterprise.enterprise or enterprise.username or enterprise.email
-            phone_raw = enterprise.phone
-            phone = normalize_sms_phone(phone_raw) if phone_raw else None
-            email = (enterprise.email or "").strip().lower() or None
-            affected_users = count_enterprise_employees(enterprise)
-
-            email_sent = False
-            sms_sent = False
-            errors = []
-
-            if not dry_run:
-                if email:
-                    try:
-                        send_mail(
-                            subject=template["subject"],
-                            message=template["email"],
-                            from_email=getattr(settings, "DEFAULT_FROM_EMAIL", None),
-                            recipient_list=[email],
-                            fail_silently=False,
-                        )
-                        email_sent = True
-                    except Exception as exc:
-                        errors.append(f"email_error: {exc}")
-                else:
-                    errors.append("email_missing")
-
-                if phone:
-                    try:
-                        send_sms_in_background(phone, template["sms"])
-                        sms_sent = True
-                    except Exception as exc:
-                        errors.append(f"sms_error: {exc}")
-                else:
-                    errors.append("phone_missing_or_invalid")
-
-                EnterprisePaymentNotificationLog.objects.update_or_create(
-                    payment=payment,
-                    stage=stage,
-                    defaults={
-                        "enterprise": enterprise,
-                        "stage_label": template["label"],
-                        "email_sent": email_sent,
-                        "sms_sent": sms_sent,
-                        "sent_to_email": email,
-                        "sent_to_phone": phone,
-                        "metadata": {
-                            "auth_source": auth_source,
-                            "today": str(today),
-                            "errors": errors,
-                            "affected_users": affected_users,
-                        },
-                    },
-                )
-                sent_count += 1
-
+            job, delivery = next(pending_results)
+            email_sent = delivery["email_sent"] if delivery else False
+            sms_sent = delivery["sms_sent"] if delivery else False
             results.append(
                 {
                     "payment_id": payment.id,
                     "enterprise_id": str(payment.enterprise_id),
-                    "enterprise_name": enterprise_name,
-                    "enterprise_email": email,
-                    "enterprise_phone": phone,
-                    "affected_users": affected_users,
+                    "enterprise_name": enterprise.enterprise or enterprise.username or enterprise.email,
+                    "enterprise_email": job["email"],
+                    "enterprise_phone": job["phone"],
+                    "affected_users": employees_by_enterprise.get(payment.enterprise_id, 0),
                     "stage": stage,
                     "stage_label": template["label"],
                     "dry_run": dry_run,
                     "email_sent": email_sent if not dry_run else None,
                     "sms_sent": sms_sent if not dry_run else None,
                     "status": "dry_run" if dry_run else ("sent" if (email_sent or sms_sent) else "no_channel_sent"),
-                    "errors": errors,
+                    "errors": delivery["errors"] if delivery else [],
                 }
             )
 
@@ -1529,6 +1730,8 @@ class EnterprisePaymentDelinquencyNotificationsView(APIView):
                     "sent_count": sent_count,
                     "skipped_count": skipped_count,
                     "total_results": len(results),
+                    "candidates": len(candidates),
+                    "timings_ms": timings,
                 },
                 "results": results,
             },
@@ -1563,13 +1766,10 @@ class EnterpriseOwnPaymentsView(APIView):
         cycle = months_for_payment_cycle(today)  # [(year, month), (year, month), ...]
 
         # asegura registros
-        for year, month in cycle:
-            ensure_payment_for_month(enterprise, year, month)
+        materialize_payments([enterprise.id], cycle)
 
         # filtro correcto por tuplas (year, month)
-        cycle_filter = Q()
-        for year, month in cycle:
-            cycle_filter |= Q(year=year, month=month)
+        cycle_filter = payment_periods_filter(cycle)
 
         status_order = Case(
             When(status=EnterpriseMonthlyPayment.STATUS_PAID, then=Value(0)),
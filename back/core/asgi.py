@@ -14,3 +14,8 @@ from django.core.asgi import get_asgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'core.settings')
 
 application = get_asgi_application()
+
+# El indice en memoria de la busqueda global se arma en segundo plano al arrancar.
+from apps.search.utils.inverted_index import warm_global_search_index  # noqa: E402
+
+warm_global_search_index()
@@ -66,6 +66,7 @@ PROJECT_APPS = [
     "apps.complaints",
     "apps.job",
     "apps.project",
+    "apps.search",
 ]
 
 THIRD_PARTY_APPS = [
@@ -146,6 +147,27 @@ else:
     }
 
 
+# Cache compartido entre workers (Redis) si REDIS_URL esta definido; memoria local en otro caso.
+REDIS_URL = os.environ.get("REDIS_URL")
+
+if REDIS_URL:
+    CACHES = {
+        "default": {
+            "BACKEND": "django_redis.cache.RedisCache",
+            "LOCATION": REDIS_URL,
+            "OPTIONS": {
+                "CLIENT_CLASS": "django_redis.client.DefaultClient",
+            },
+        }
+    }
+else:
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+            "LOCATION": "cie-default",
+        }
+    }
+
 # DATABASES["default"]["ATOMIC_REQUESTS"] = True
 # Password validation
 # https://docs.djangoproject.com/en/4.2/ref/settings/#auth-password-validators
@@ -192,6 +214,9 @@ STATIC_URL = '/static/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 MEDIA_URL = '/media/'
 
+# Matriz TF-IDF de recomendaciones (memory-mapped), generada por build_recommendations.
+RECOMMENDATIONS_DIR = os.environ.get("RECOMMENDATIONS_DIR", os.path.join(BASE_DIR, 'var', 'recommendations'))
+
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
@@ -15,6 +15,7 @@ urlpatterns = [
     path('', include('apps.job.urls')),
     path('', include('apps.project.urls')),
     path('', include('apps.complaints.urls')),
+    path('', include('apps.search.urls')),
 
 
 ] + static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
@@ -0,0 +1,35 @@
+import uuid
+
+from django.core.cache import cache
+
+CACHE_VERSION_PREFIX = "cache-version"
+
+
+def _version_key(namespace: str) -> str:
+    return f"{CACHE_VERSION_PREFIX}:{namespace}"
+
+
+def get_cache_version(namespace: str) -> str:
+    """
+    Version actual de un espacio de cache. Las llaves derivadas incluyen la version,
+    de modo que invalidar es solo cambiarla (las llaves viejas expiran solas).
+    """
+    key = _version_key(namespace)
+    version = cache.get(key)
+    if version is None:
+        version = uuid.uuid4().hex
+        if not cache.add(key, version, timeout=None):
+            version = cache.get(key) or version
+    return version
+
+
+def bump_cache_version(namespace: str) -> str:
+    version = uuid.uuid4().hex
+    cache.set(_version_key(namespace), version, timeout=None)
+    return version
+
+
+def versioned_key(namespace: str, *parts) -> str:
+    suffix = ":".join(str(part) for part in parts)
+    key = f"{namespace}:{get_cache_version(namespace)}"
+    return f"{key}:{suffix}" if suffix else key
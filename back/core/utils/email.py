@@ -35,6 +35,16 @@ class CustomEmailBackend(EmailBackend):
         for email_message in email_messages:
             threading.Thread(target=self._send_email, args=(email_message,)).start()
 
+    def send_messages_now(self, email_messages):
+        """
+        Envía en el hilo actual sobre la conexión abierta (sin un hilo por mensaje).
+        Útil para envíos masivos que reutilizan una sola conexión SMTP; el lock
+        del backend serializa el uso de la conexión entre hilos.
+        """
+        for email_message in email_messages:
+            email_message.content_subtype = 'html'
+        return super().send_messages(email_messages)
+
     def _send_email(self, email_message):
         try:
             # Set the email content subtype as needed
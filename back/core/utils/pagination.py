@@ -0,0 +1,345 @@
+"""
+Paginacion compartida por las apps.
+
+CursorPageNumberPagination se comporta como PageNumberPagination (?p=3 o ?page=3 segun
+la app). Con ?cursor= (vacio para la primera pagina) pagina por llave sobre el orden del
+queryset mas el id como desempate, p. ej. (-created, id): sin COUNT(*) ni OFFSET, cada
+pagina cuesta lo mismo sin importar la profundidad. La respuesta conserva la forma
+{count, next, previous, results}; en modo cursor count es null y next/previous llevan
+el cursor.
+
+Con ?count=false no se cuenta: se lee una fila de mas para saber si hay pagina siguiente
+y la respuesta agrega has_next. Las vistas de tablas grandes pueden pedir el conteo
+cacheado (SmallSetPagination(cache_count=True)) sobre modelos registrados con
+track_cached_counts(): el total sale de un cache corto cuya llave es el SQL normalizado
+del queryset mas la version del modelo, que cambia en cada guardado o borrado. Las demas
+listas cuentan siempre contra la base de datos.
+
+Si el orden no es por columnas del modelo (rank de busqueda, anotaciones, relaciones) o
+lo paginado es una lista, el cursor se ignora y se pagina por numero de pagina.
+"""
+import base64
+import binascii
+import hashlib
+import json
+from datetime import datetime
+
+from django.core.cache import cache
+from django.core.exceptions import EmptyResultSet, FieldDoesNotExist, ValidationError
+from django.core.paginator import Paginator as DjangoPaginator
+from django.db.models import F, Q, QuerySet
+from django.db.models.signals import post_delete, post_save
+from django.utils.functional import cached_property
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+from core.utils.cache import bump_cache_version, get_cache_version
+
+COUNT_CACHE_PREFIX = "pagination-count"
+COUNT_CACHE_TIMEOUT = 30
+FALSE_VALUES = ("false", "0", "no")
+
+
+def _encode_cursor(values, reverse=False):
+    payload = json.dumps({"v": values, "r": int(reverse)}, separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def _decode_cursor(raw):
+    try:
+        padded = raw + "=" * (-len(raw) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")).decode("utf-8"))
+        return list(payload["v"]), bool(payload.get("r"))
+    except (binascii.Error, UnicodeError, ValueError, TypeError, KeyError):
+        return None
+
+
+def keyset_ordering(queryset):
+    """
+    [(campo, descendente)] del orden del queryset terminado en la llave primaria, o None
+    si el orden no se puede usar como llave.
+    """
+    model = queryset.model
+    ordering = list(queryset.query.order_by) or list(model._meta.ordering)
+    pk = model._meta.pk
+    keys = []
+    for item in ordering:
+        if not isinstance(item, str) or item == "?":
+            return None
+        descending = item.startswith("-")
+        name = item.lstrip("-+")
+        if name == "pk":
+            field = pk
+        else:
+            try:
+                field = model._meta.get_field(name)
+            except FieldDoesNotExist:
+                return None
+            if not getattr(field, "concrete", False) or field.is_relation:
+                return None
+        keys.append((field, descending))
+        if field == pk:
+            return keys
+    keys.append((pk, keys[-1][1] if keys else False))
+    return keys
+
+
+def _count_namespace(model):
+    return f"{COUNT_CACHE_PREFIX}:{model._meta.concrete_model._meta.label_lower}"
+
+
+# Modelos con conteo cacheado -> campos cuyos guardados parciales no lo invalidan.
+_tracked_count_models = {}
+
+
+def invalidate_cached_counts(model):
+    """
+    Descarta los conteos cacheados del modelo. Los guardados y borrados del ORM lo hacen
+    solos; las escrituras con SQL directo o update() deben llamarla.
+    """
+    bump_cache_version(_count_namespace(model))
+
+
+def _invalidate_on_save(sender, update_fields=None, **kwargs):
+    ignored = _tracked_count_models.get(sender._meta.concrete_model, frozenset())
+    if update_fields and ignored and set(update_fields) <= ignored:
+        return
+    invalidate_cached_counts(sender)
+
+
+def _invalidate_on_delete(sender, **kwargs):
+    invalidate_cached_counts(sender)
+
+
+def track_cached_counts(model, ignore_fields=()):
+    """
+    Habilita el conteo cacheado para el modelo y conecta sus señales de invalidacion
+    (solo para el, no para cada guardado del proyecto). ignore_fields: guardados con
+    update_fields limitados a esos campos (p. ej. last_login) no invalidan.
+    """
+    _tracked_count_models[model._meta.concrete_model] = frozenset(ignore_fields)
+    uid = _count_namespace(model)
+    post_save.connect(_invalidate_on_save, sender=model, weak=False, dispatch_uid=f"{uid}:save")
+    post_delete.connect(_invalidate_on_delete, sender=model, weak=False, dispatch_uid=f"{uid}:delete")
+
+
+def _count_cache_key(queryset):
+    sql, params = queryset.order_by().query.sql_with_params()
+    # Los filtros con "ahora" (vigencia de empleos) cambian en cada peticion: se agrupan
+    # en ventanas del tamaño del cache para que la llave se repita.
+    normalized = [
+        int(param.timestamp()) // COUNT_CACHE_TIMEOUT if isinstance(param, datetime) else param
+        for param in params
+    ]
+    version = get_cache_version(_count_namespace(queryset.model))
+    raw = json.dumps([queryset.db, version, sql, normalized], default=str)
+    return f"{COUNT_CACHE_PREFIX}:{hashlib.sha1(raw.encode('utf-8')).hexdigest()}"
+
+
+def cached_count(queryset, timeout=COUNT_CACHE_TIMEOUT):
+    """
+    COUNT(*) del queryset reutilizado por unos segundos entre peticiones con los mismos
+    filtros. Se invalida al escribir el modelo; cambios en tablas relacionadas que
+    entran en los filtros pueden tardar hasta timeout en reflejarse. Modelos sin
+    track_cached_counts() se cuentan siempre contra la base de datos.
+    """
+    if queryset.model._meta.concrete_model not in _tracked_count_models:
+        return queryset.count()
+    try:
+        cache_key = _count_cache_key(queryset)
+    except EmptyResultSet:
+        return 0
+    count = cache.get(cache_key)
+    if count is None:
+        count = queryset.count()
+        cache.set(cache_key, count, timeout=timeout)
+    return count
+
+
+class CachedCountPaginator(DjangoPaginator):
+    @cached_property
+    def count(self):
+        if isinstance(self.object_list, QuerySet):
+            return cached_count(self.object_list)
+        return super().count
+
+
+class CursorPageNumberPagination(PageNumberPagination):
+    page_query_param = 'p'
+    page_size_query_param = 'page_size'
+    cursor_query_param = 'cursor'
+    count_query_param = 'count'
+    invalid_cursor_message = 'Cursor invalido.'
+    cache_count = False
+
+    def __init__(self, cache_count=None):
+        if cache_count is not None:
+            self.cache_count = cache_count
+
+    @property
+    def django_paginator_class(self):
+        return CachedCountPaginator if self.cache_count else DjangoPaginator
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.cursor_mode = False
+        self.skip_count = False
+        if self.cursor_query_param not in request.query_params or not isinstance(queryset, QuerySet):
+            if request.query_params.get(self.count_query_param, '').lower() in FALSE_VALUES:
+                return self._paginate_without_count(queryset, request)
+            return super().paginate_queryset(queryset, request, view)
+        keys = keyset_ordering(queryset)
+        if keys is None:
+            return super().paginate_queryset(queryset, request, view)
+
+        self.cursor_mode = True
+        self.display_page_controls = False
+        self.request = request
+        self.keys = keys
+        page_size = self.get_page_size(request)
+        values, reverse = self._current_position(request)
+
+        if values is not None:
+            queryset = queryset.filter(self._after(values, reverse))
+        rows = list(queryset.order_by(*self._order_expressions(reverse))[: page_size + 1])
+        has_more = len(rows) > page_size
+        rows = rows[:page_size]
+        if reverse:
+            rows.reverse()
+
+        # Al retroceder siempre hay pagina siguiente; al avanzar, anterior si hubo cursor.
+        self.has_next = has_more if not reverse else values is not None
+        self.has_previous = values is not None if not reverse else has_more
+        self.first_row = rows[0] if rows else None
+        self.last_row = rows[-1] if rows else None
+        return rows
+
+    def _paginate_without_count(self, queryset, request):
+        page_size = self.get_page_size(request)
+        if not page_size:
+            return None
+        raw_number = request.query_params.get(self.page_query_param) or 1
+        try:
+            number = int(raw_number)
+        except (TypeError, ValueError):
+            number = 0
+        if number < 1:
+            # Sin conteo no se conoce la ultima pagina ("last" tampoco aplica).
+            raise NotFound(self.invalid_page_message)
+
+        offset = (number - 1) * page_size
+        rows = list(queryset[offset: offset + page_size + 1])
+        if not rows and number > 1:
+            raise NotFound(self.invalid_page_message)
+
+        self.skip_count = True
+        self.display_page_controls = False
+        self.request = request
+        self.page_number = number
+        self.has_next = len(rows) > page_size
+        return rows[:page_size]
+
+    def get_paginated_response(self, data):
+        if getattr(self, 'skip_count', False):
+            return Response({
+                'count': None,
+                'has_next': self.has_next,
+                'next': self._page_link(self.page_number + 1) if self.has_next else None,
+                'previous': self._page_link(self.page_number - 1) if self.page_number > 1 else None,
+                'results': data,
+            })
+        if not getattr(self, 'cursor_mode', False):
+            return super().get_paginated_response(data)
+        return Response({
+            'count': None,
+            'next': self.get_next_cursor_link(),
+            'previous': self.get_previous_cursor_link(),
+            'results': data,
+        })
+
+    def _page_link(self, number):
+        url = self.request.build_absolute_uri()
+        if number == 1:
+            return remove_query_param(url, self.page_query_param)
+        return replace_query_param(url, self.page_query_param, number)
+
+    # --- Cursor -------------------------------------------------------------------
+
+    def _current_position(self, request):
+        raw = request.query_params.get(self.cursor_query_param, '').strip()
+        if not raw:
+            return None, False
+        decoded = _decode_cursor(raw)
+        if decoded is None or len(decoded[0]) != len(self.keys):
+            raise NotFound(self.invalid_cursor_message)
+        raw_values, reverse = decoded
+        values = []
+        for (field, _), value in zip(self.keys, raw_values):
+            if value is None:
+                if not field.null:
+                    raise NotFound(self.invalid_cursor_message)
+                values.append(None)
+                continue
+            try:
+                values.append(field.to_python(value))
+            except ValidationError:
+                raise NotFound(self.invalid_cursor_message)
+        return values, reverse
+
+    def _order_expressions(self, reverse=False):
+        # Los nulos van al final al avanzar (y al inicio al retroceder) en cualquier motor.
+        expressions = []
+        for field, descending in self.keys:
+            column = F(field.attname)
+            order = column.desc if descending != reverse else column.asc
+            if field.null:
+                expressions.append(order(nulls_first=True) if reverse else order(nulls_last=True))
+            else:
+                expressions.append(order())
+        return expressions
+
+    def _after(self, values, reverse):
+        """
+        Filas estrictamente despues de la posicion (o antes, al retroceder) en el orden
+        de la llave: (a < x) OR (a = x AND b < y) OR ...
+        """
+        condition = Q(pk__in=[])
+        equal = Q()
+        for (field, descending), value in zip(self.keys, values):
+            name = field.attname
+            if value is None:
+                # Nulos al final: al avanzar no hay nada despues en este campo.
+                beyond = Q(**{f"{name}__isnull": False}) if reverse else Q(pk__in=[])
+                same = Q(**{f"{name}__isnull": True})
+            else:
+                lookup = "lt" if descending != reverse else "gt"
+                beyond = Q(**{f"{name}__{lookup}": value})
+                if field.null and not reverse:
+                    beyond |= Q(**{f"{name}__isnull": True})
+                same = Q(**{name: value})
+            condition |= equal & beyond
+            equal &= same
+        return condition
+
+    def _row_values(self, row):
+        values = []
+        for field, _ in self.keys:
+            value = getattr(row, field.attname)
+            values.append(None if value is None else field.value_to_string(row))
+        return values
+
+    def _cursor_link(self, row, reverse):
+        url = self.request.build_absolute_uri()
+        url = remove_query_param(url, self.page_query_param)
+        return replace_query_param(url, self.cursor_query_param, _encode_cursor(self._row_values(row), reverse))
+
+    def get_next_cursor_link(self):
+        if not self.has_next or self.last_row is None:
+            return None
+        return self._cursor_link(self.last_row, reverse=False)
+
+    def get_previous_cursor_link(self):
+        if not self.has_previous or self.first_row is None:
+            return None
+        return self._cursor_link(self.first_row, reverse=True)
@@ -0,0 +1,342 @@
+"""
+Motor de busqueda de texto completo compartido por las apps.
+
+Cada modelo indexado guarda un documento de busqueda normalizado (sin HTML, sin tildes,
+en minusculas y con un stemming ligero para español). Sobre ese documento:
+
+- Postgres (USE_POSTGRES): SearchVector('simple') con indice GIN de expresion, creado
+  en post_migrate.
+- SQLite: tabla virtual FTS5 "sombra" (pk, document) mantenida por señales, unida por
+  JOIN a la consulta y rank bm25.
+
+Las vistas solo llaman a SearchIndex.search(queryset, texto) y ordenan por search_rank.
+"""
+import re
+import unicodedata
+
+from django.conf import settings
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchQuery, SearchRank, SearchVector
+from django.db import OperationalError, connection
+from django.db.models import FloatField, Q
+from django.db.models.signals import post_delete, post_save
+from django.db.models.expressions import RawSQL
+from django.utils.html import strip_tags
+
+SEARCH_CONFIG = "simple"
+
+SPANISH_STOPWORDS = frozenset(
+    """
+    a al algo algunas algunos ante antes como con contra cual cuando de del desde donde durante
+    e el ella ellas ellos en entre era es esa esas ese eso esos esta estas este esto estos
+    fue ha hay la las le les lo los mas me mi mis muy no nos o os otra otro para pero
+    por porque que se sea ser si sin sobre son su sus tambien te tiene todo todos tu tus
+    un una uno unos y ya
+    """.split()
+)
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+_VOWELS = "aeiou"
+
+_registry = []
+
+
+def strip_accents(text):
+    text = unicodedata.normalize("NFKD", text)
+    return "".join(char for char in text if not unicodedata.combining(char))
+
+
+def spanish_stem(token):
+    """
+    Stemming ligero: plural y vocal final ("promociones" -> "promocion",
+    "restaurantes"/"restaurante" -> "restaurant"). Suficiente para buscar por raiz
+    sin diccionarios externos.
+    """
+    if len(token) <= 3 or token.isdigit():
+        return token
+    if token.endswith("mente") and len(token) > 7:
+        token = token[:-5]
+    if token.endswith("s") and len(token) > 3:
+        token = token[:-1]
+    if token[-1] in _VOWELS and len(token) > 3:
+        token = token[:-1]
+    return token
+
+
+def search_tokens(text):
+    text = strip_accents(strip_tags(str(text or "")).lower())
+    return [spanish_stem(token) for token in _TOKEN_RE.findall(text) if token not in SPANISH_STOPWORDS]
+
+
+def build_search_document(*values):
+    return " ".join(token for value in values for token in search_tokens(value))
+
+
+def uses_postgres_search():
+    return bool(getattr(settings, "USE_POSTGRES", False)) and connection.vendor == "postgresql"
+
+
+def search_vector(field="search_document"):
+    return SearchVector(field, config=SEARCH_CONFIG)
+
+
+class SearchIndex:
+    def __init__(
+        self, model, fts_table, build_document, document_field="search_document", related=(), gin_index_name=None
+    ):
+        self.model = model
+        self.fts_table = fts_table
+        self.build_document = build_document
+        self.document_field = document_field
+        # {relacion: campos del modelo relacionado que entran en el documento}.
+        self.related = dict(related) if isinstance(related, dict) else {name: () for name in related}
+        self.gin_index_name = gin_index_name
+        self._fts_ready = None
+
+    # --- Señales ------------------------------------------------------------------
+
+    def connect_signals(self):
+        uid = f"search-index:{self.fts_table}"
+        post_save.connect(self._on_save, sender=self.model, weak=False, dispatch_uid=f"{uid}:save")
+        post_delete.connect(self._on_delete, sender=self.model, weak=False, dispatch_uid=f"{uid}:delete")
+        for name, fields in self.related.items():
+            if fields:
+                # remote_field.model puede ser aun "app.Modelo": ModelSignal lo resuelve luego.
+                post_save.connect(
+                    self._related_saver(name, fields),
+                    sender=self.model._meta.get_field(name).remote_field.model,
+                    weak=False,
+                    dispatch_uid=f"{uid}:related:{name}",
+                )
+
+    def _on_save(self, sender, instance, raw=False, **kwargs):
+        if not raw:
+            self.index(instance.pk, getattr(instance, self.document_field))
+
+    def _on_delete(self, sender, instance, **kwargs):
+        self.remove(instance.pk)
+
+    def _related_saver(self, name, fields):
+        def refresh(sender, instance, created, raw=False, update_fields=None, **kwargs):
+            # Un cambio en el relacionado (p. ej. el nombre de la empresa) cambia el documento.
+            if created or raw or (update_fields and not set(fields) & set(update_fields)):
+                return
+            self.refresh_documents(self.model.objects.filter(**{name: instance}))
+
+        return refresh
+
+    # --- Mantenimiento del indice -------------------------------------------------
+
+    def ensure_backend(self):
+        if uses_postgres_search() or connection.vendor != "sqlite":
+            return False
+        if self._fts_ready is not None:
+            return self._fts_ready
+        try:
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    f"CREATE VIRTUAL TABLE IF NOT EXISTS {self.fts_table} "
+                    "USING fts5(pk UNINDEXED, document, tokenize='unicode61')"
+                )
+            ready = True
+        except OperationalError:
+            # SQLite compilado sin FTS5: se usa el filtro LIKE sobre el documento.
+            ready = False
+        # Dentro de una transaccion el CREATE puede revertirse: solo se memoriza fuera de ella.
+        if not connection.in_atomic_block:
+            self._fts_ready = ready
+        return ready
+
+    def ensure_postgres_index(self):
+        """
+        Crea el indice GIN de expresion si falta. Se crea aqui y no en Meta.indexes para
+        que las migraciones generadas no dependan de USE_POSTGRES.
+        """
+        if not self.gin_index_name or not uses_postgres_search():
+            return False
+        with connection.cursor() as cursor:
+            existing = connection.introspection.get_constraints(cursor, self.model._meta.db_table)
+        if self.gin_index_name in existing:
+            return False
+        with connection.schema_editor() as editor:
+            editor.add_index(self.model, GinIndex(search_vector(self.document_field), name=self.gin_index_name))
+        return True
+
+    def fts_table_exists(self):
+        if connection.vendor != "sqlite":
+            return False
+        return self.fts_table in connection.introspection.table_names()
+
+    def _db_pk(self, pk):
+        # En SQLite los UUID se guardan como hex de 32 caracteres.
+        return pk.hex if hasattr(pk, "hex") else str(pk)
+
+    def index(self, pk, document):
+        if not self.ensure_backend():
+            return
+        db_pk = self._db_pk(pk)
+        with connection.cursor() as cursor:
+            cursor.execute(f"DELETE FROM {self.fts_table} WHERE pk = %s", [db_pk])
+            cursor.execute(
+                f"INSERT INTO {self.fts_table} (pk, document) VALUES (%s, %s)",
+                [db_pk, document or ""],
+            )
+
+    def remove(self, pk):
+        if not self.ensure_backend():
+            return
+        with connection.cursor() as cursor:
+            cursor.execute(f"DELETE FROM {self.fts_table} WHERE pk = %s", [self._db_pk(pk)])
+
+    def refresh_documents(self, queryset=None, chunk_size=500, index_rows=True):
+        """
+        Recalcula search_document (y la tabla sombra) para el queryset dado o todo el modelo.
+        Retorna la cantidad de filas recalculadas.
+        """
+        queryset = self.model.objects.all() if queryset is None else queryset
+        queryset = queryset.select_related(*self.related).order_by("pk")
+        total = 0
+        last_pk = None
+        while True:
+            chunk_qs = queryset if last_pk is None else queryset.filter(pk__gt=last_pk)
+            chunk = list(chunk_qs[:chunk_size])
+            if not chunk:
+                break
+            last_pk = chunk[-1].pk
+            for instance in chunk:
+                setattr(instance, self.document_field, self.build_document(instance))
+            self.model.objects.bulk_update(chunk, [self.document_field], batch_size=chunk_size)
+            if index_rows:
+                for instance in chunk:
+                    self.index(instance.pk, getattr(instance, self.document_field))
+            total += len(chunk)
+        return total
+
+    def rebuild(self, chunk_size=1000):
+        """
+        Reconstruye la tabla sombra desde los documentos guardados. Retorna filas indexadas.
+        """
+        if not self.ensure_backend():
+            return 0
+        with connection.cursor() as cursor:
+            cursor.execute(f"DELETE FROM {self.fts_table}")
+        total = 0
+        rows = self.model.objects.values_list("pk", self.document_field).iterator(chunk_size=chunk_size)
+        batch = []
+        for pk, document in rows:
+            batch.append([self._db_pk(pk), document or ""])
+            if len(batch) >= chunk_size:
+                total += self._insert_batch(batch)
+                batch = []
+        if batch:
+            total += self._insert_batch(batch)
+        return total
+
+    def _insert_batch(self, batch):
+        with connection.cursor() as cursor:
+            cursor.executemany(f"INSERT INTO {self.fts_table} (pk, document) VALUES (%s, %s)", batch)
+        return len(batch)
+
+    # --- Consulta -----------------------------------------------------------------
+
+    def search(self, queryset, text):
+        """
+        Filtra el queryset por el texto y anota search_rank (mayor = mas relevante).
+        Cada termino funciona como prefijo para soportar busqueda mientras se escribe.
+        """
+        tokens = list(dict.fromkeys(search_tokens(text)))
+        if not tokens:
+            return queryset.annotate(search_rank=RawSQL("0", [], output_field=FloatField()))
+
+        if uses_postgres_search():
+            query = SearchQuery(
+                " & ".join(f"{token}:*" for token in tokens),
+                config=SEARCH_CONFIG,
+                search_type="raw",
+            )
+            vector = search_vector(self.document_field)
+            return queryset.annotate(search_match=vector).filter(search_match=query).annotate(
+                search_rank=SearchRank(vector, query)
+            )
+
+        if self.ensure_backend():
+            match = " ".join(f"{token}*" for token in tokens)
+            table = self.model._meta.db_table
+            pk_column = self.model._meta.pk.column
+            # Un solo JOIN con la tabla sombra: MATCH se evalua una vez y el rank sale de la
+            # misma fila. La columna oculta rank (bm25) sirve tambien con GROUP BY, a
+            # diferencia de bm25(); es menor cuanto mas relevante y se invierte como en Postgres.
+            return queryset.extra(
+                select={"search_rank": f"-{self.fts_table}.rank"},
+                tables=[self.fts_table],
+                where=[f"{self.fts_table} MATCH %s", f"{self.fts_table}.pk = {table}.{pk_column}"],
+                params=[match],
+            )
+
+        condition = Q()
+        for token in tokens:
+            condition &= Q(**{f"{self.document_field}__contains": token})
+        return queryset.filter(condition).annotate(
+            search_rank=RawSQL("0", [], output_field=FloatField())
+        )
+
+
+class SearchDocumentMixin:
+    """
+    Modelos con documento de busqueda: al guardar recalcula search_document con
+    build_search_document_for() y lo agrega a update_fields, para que la tabla sombra
+    (señal post_save) indexe siempre el texto actual.
+    """
+
+    def build_search_document_for(self):
+        raise NotImplementedError
+
+    def save(self, *args, **kwargs):
+        self.search_document = self.build_search_document_for()
+        update_fields = kwargs.get("update_fields")
+        if update_fields is not None:
+            kwargs["update_fields"] = {*update_fields, "search_document"}
+        super().save(*args, **kwargs)
+
+
+def register_search_index(
+    model, fts_table, build_document=None, document_field="search_document", related=(), gin_index_name=None
+):
+    """
+    Registra el indice y conecta sus señales: guardar/borrar mantiene la tabla sombra y
+    guardar un relacionado con campos declarados en related recalcula sus documentos.
+    Por defecto el documento sale de model.build_search_document_for (SearchDocumentMixin).
+    """
+    index = SearchIndex(
+        model,
+        fts_table,
+        build_document or model.build_search_document_for,
+        document_field=document_field,
+        related=related,
+        gin_index_name=gin_index_name,
+    )
+    index.connect_signals()
+    _registry.append(index)
+    return index
+
+
+def registered_search_indexes():
+    return list(_registry)
+
+
+def ranked(queryset, *fallback_ordering):
+    # Por nombre: en SQLite search_rank es un select extra del JOIN, no una anotacion.
+    return queryset.order_by("-search_rank", *fallback_ordering)
+
+
+def ensure_search_backends(**kwargs):
+    """
+    Receptor de post_migrate: crea los indices GIN (Postgres) o las tablas FTS5 (SQLite)
+    faltantes y llena estas desde los documentos guardados (los modelos no tienen
+    migraciones versionadas para esto).
+    """
+    for index in registered_search_indexes():
+        index.ensure_postgres_index()
+        existed = index.fts_table_exists()
+        if index.ensure_backend() and not existed:
+            index.rebuild()
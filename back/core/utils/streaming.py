@@ -0,0 +1,33 @@
+"""
+Respuestas NDJSON (un objeto JSON por linea) para listados largos.
+
+Con ?stream=ndjson las vistas de listado recorren el queryset con .iterator() y escriben
+cada fila apenas se serializa: la memoria del worker no crece con el historial y el
+cliente empieza a recibir datos antes de que termine la consulta.
+"""
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import StreamingHttpResponse
+
+STREAM_QUERY_PARAM = "stream"
+NDJSON_CONTENT_TYPE = "application/x-ndjson"
+STREAM_CHUNK_SIZE = 500
+
+
+def wants_ndjson(request):
+    return (request.query_params.get(STREAM_QUERY_PARAM) or "").strip().lower() == "ndjson"
+
+
+def ndjson_response(queryset, serializer_class, context=None, chunk_size=STREAM_CHUNK_SIZE):
+    # Una sola instancia del serializer para todas las filas.
+    serializer = serializer_class(context=context or {})
+    encoder = DjangoJSONEncoder(ensure_ascii=False)
+
+    def rows():
+        for instance in queryset.iterator(chunk_size=chunk_size):
+            yield encoder.encode(serializer.to_representation(instance)) + "\n"
+
+    response = StreamingHttpResponse(rows(), content_type=NDJSON_CONTENT_TYPE)
+    response["Cache-Control"] = "no-store"
+    # Evita que un proxy (nginx) acumule la respuesta completa antes de enviarla.
+    response["X-Accel-Buffering"] = "no"
+    return response
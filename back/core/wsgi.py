@@ -14,3 +14,8 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'core.settings')
 
 application = get_wsgi_application()
+
+# El indice en memoria de la busqueda global se arma en segundo plano al arrancar.
+from apps.search.utils.inverted_index import warm_global_search_index  # noqa: E402
+
+warm_global_search_index()
@@ -62,6 +62,17 @@ type AdminReport = {
   };
 };
 
+type AdminReportPage = {
+  count: number;
+  next: string | null;
+  previous: string | null;
+  results: AdminReport;
+};
+
+const PAGE_SIZE = 25;
+// Tope de filas que el backend entrega por pagina; se usa para el PDF
+const EXPORT_PAGE_SIZE = 500;
+
 export default function AdminBenefitsRedemptionsPage() {
   const [loading, setLoading] = useState(true);
   const [report, setReport] = useState<AdminReport | null>(null);
@@ -69,18 +80,24 @@ export default function AdminBenefitsRedemptionsPage() {
   const [selectedEnterprise, setSelectedEnterprise] = useState<string>('all');
   const [selectedMonth, setSelectedMonth] = useState<string>('all');
   const [openEnterprises, setOpenEnterprises] = useState<Set<string>>(new Set());
+  const [page, setPage] = useState(1);
+  const [totalCount, setTotalCount] = useState(0);
+
+  const fetchReport = (extra: Record<string, string>) => {
+    const params = new URLSearchParams(extra);
+    if (searchTerm.trim()) params.set('search', searchTerm.trim());
+    if (selectedEnterprise !== 'all') params.set('enterprise_id', selectedEnterprise);
+    if (selectedMonth !== 'all') params.set('month', selectedMonth);
+
+    return apiClient.get<AdminReportPage>(`/api/admin/benefits/redemptions/?${params.toString()}`);
+  };
 
   const loadReport = async () => {
     setLoading(true);
     try {
-      const params = new URLSearchParams();
-      if (searchTerm.trim()) params.set('search', searchTerm.trim());
-      if (selectedEnterprise !== 'all') params.set('enterprise_id', selectedEnterprise);
-      if (selectedMonth !== 'all') params.set('month', selectedMonth);
-      
-      const url = `/api/admin/benefits/redemptions/${params.toString() ? `?${params.toString()}` : ''}`;
-      const data = await apiClient.get<AdminReport>(url);
-      setReport(data);
+      const data = await fetchReport({ p: String(page) });
+      setReport(data?.results || null);
+      setTotalCount(data?.count || 0);
     } finally {
       setLoading(false);
     }
@@ -88,14 +105,18 @@ export default function AdminBenefitsRedemptionsPage() {
 
   useEffect(() => {
     loadReport();
-  }, [searchTerm, selectedEnterprise, selectedMonth]);
+  }, [searchTerm, selectedEnterprise, selectedMonth, page]);
 
   const handleClearFilters = () => {
     setSearchTerm('');
     setSelectedEnterprise('all');
     setSelectedMonth('all');
+    setPage(1);
   };
 
+  const totalPages = Math.max(1, Math.ceil(totalCount / PAGE_SIZE));
+  const safePage = Math.min(page, totalPages);
+
   const hasActiveFilters = searchTerm || selectedEnterprise !== 'all' || selectedMonth !== 'all';
   const canExportPdf = selectedEnterprise !== 'all';
 
@@ -139,7 +160,7 @@ export default function AdminBenefitsRedemptionsPage() {
     });
   };
 
-  const exportToPDF = () => {
+  const exportToPDF = async () => {
     if (!canExportPdf) {
       alert('Selecciona una empresa para generar el PDF');
       return;
@@ -157,6 +178,18 @@ export default function AdminBenefitsRedemptionsPage() {
       return;
     }
 
+    // La vista solo tiene la pagina actual; el PDF pide el detalle completo
+    let exportData: AdminReportPage;
+    try {
+      exportData = await fetchReport({ page_size: String(EXPORT_PAGE_SIZE) });
+    } catch {
+      printWindow.close();
+      alert('No se pudo generar el PDF');
+      return;
+    }
+    const exportRedemptions = exportData?.results?.redemptions || [];
+    const exportTotals = exportData?.results?.by_enterprise || [];
+
     const htmlContent = `
       <!DOCTYPE html>
       <html>
@@ -228,7 +261,7 @@ export default function AdminBenefitsRedemptionsPage() {
           <h1>📊 Reporte de Canjes de Beneficios</h1>
           <div class="meta">
             <div class="meta-item">
-              <span class="meta-label">Total de canjes:</span> ${report.meta?.total_redemptions || 0}
+              <span class="meta-label">Total de canjes:</span> ${exportData?.results?.meta?.total_redemptions || 0}
             </div>
             <div class="meta-item">
               <span class="meta-label">Fecha de generación:</span> ${new Date().toLocaleString('es-ES')}
@@ -245,7 +278,7 @@ export default function AdminBenefitsRedemptionsPage() {
               </tr>
             </thead>
             <tbody>
-              ${topEnterprises
+              ${exportTotals
                 .map(
                   (item) => `
                 <tr>
@@ -259,6 +292,11 @@ export default function AdminBenefitsRedemptionsPage() {
           </table>
 
           <h2 style="margin-top: 40px;">Detalle de Canjes</h2>
+          ${
+            exportData.count > exportRedemptions.length
+              ? `<p>Mostrando ${exportRedemptions.length} de ${exportData.count} canjes.</p>`
+              : ''
+          }
           <table>
             <thead>
               <tr>
@@ -270,7 +308,7 @@ export default function AdminBenefitsRedemptionsPage() {
               </tr>
             </thead>
             <tbody>
-              ${report.redemptions
+              ${exportRedemptions
                 .map(
                   (r) => `
                 <tr>
@@ -347,7 +385,10 @@ export default function AdminBenefitsRedemptionsPage() {
               <Input
                 placeholder="Buscar por nombre, correo, beneficio..."
                 value={searchTerm}
-                onChange={(e) => setSearchTerm(e.target.value)}
+                onChange={(e) => {
+                  setSearchTerm(e.target.value);
+                  setPage(1);
+                }}
               />
             </div>
 
@@ -357,7 +398,13 @@ export default function AdminBenefitsRedemptionsPage() {
                 <Building2 className="h-4 w-4" />
                 Empresa
               </label>
-              <Select value={selectedEnterprise} onValueChange={setSelectedEnterprise}>
+              <Select
+                value={selectedEnterprise}
+                onValueChange={(value) => {
+                  setSelectedEnterprise(value);
+                  setPage(1);
+                }}
+              >
                 <SelectTrigger>
                   <SelectValue placeholder="Todas las empresas" />
                 </SelectTrigger>
@@ -378,7 +425,13 @@ export default function AdminBenefitsRedemptionsPage() {
                 <Calendar className="h-4 w-4" />
                 Mes
               </label>
-              <Select value={selectedMonth} onValueChange={setSelectedMonth}>
+              <Select
+                value={selectedMonth}
+                onValueChange={(value) => {
+                  setSelectedMonth(value);
+                  setPage(1);
+                }}
+              >
                 <SelectTrigger>
                   <SelectValue placeholder="Todos los meses" />
                 </SelectTrigger>
@@ -503,7 +556,7 @@ export default function AdminBenefitsRedemptionsPage() {
             Detalle de Canjes por Empresa
           </CardTitle>
           <CardDescription>
-            Vista organizada de todos los canjes ({report?.redemptions?.length || 0} registros)
+            Vista organizada de todos los canjes ({totalCount} registros)
           </CardDescription>
         </CardHeader>
         <CardContent>
@@ -513,7 +566,9 @@ export default function AdminBenefitsRedemptionsPage() {
             <div className="text-center py-8 text-muted-foreground">No hay canjes registrados</div>
           ) : (
             <div className="space-y-4">
-              {topEnterprises.map((enterpriseItem) => {
+              {topEnterprises
+                .filter((enterpriseItem) => redemptionsByEnterprise.has(enterpriseItem.enterprise))
+                .map((enterpriseItem) => {
                 const redemptions = redemptionsByEnterprise.get(enterpriseItem.enterprise) || [];
                 const isOpen = openEnterprises.has(enterpriseItem.enterprise);
                 const enterpriseName =
@@ -601,6 +656,32 @@ export default function AdminBenefitsRedemptionsPage() {
               })}
             </div>
           )}
+
+          {totalCount > PAGE_SIZE ? (
+            <div className="flex items-center justify-center gap-4 pt-4">
+              <Button
+                variant="outline"
+                size="sm"
+                disabled={safePage <= 1}
+                onClick={() => setPage((prev) => Math.max(1, prev - 1))}
+                className="w-24"
+              >
+                Anterior
+              </Button>
+              <span className="text-sm font-medium text-muted-foreground">
+                Página {safePage} de {totalPages}
+              </span>
+              <Button
+                variant="outline"
+                size="sm"
+                disabled={safePage >= totalPages}
+                onClick={() => setPage((prev) => Math.min(totalPages, prev + 1))}
+                className="w-24"
+              >
+                Siguiente
+              </Button>
+            </div>
+          ) : null}
         </CardContent>
       </Card>
     </div>
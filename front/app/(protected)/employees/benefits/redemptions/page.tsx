@@ -1,7 +1,7 @@
 "use client";
 
 import Link from "next/link";
-import { useEffect, useMemo, useState } from "react";
+import { useEffect, useState } from "react";
 import {
   fetchEmployeeBenefitRedemptions,
   type EmployeeBenefitRedemption,
@@ -23,6 +23,7 @@ const PAGE_SIZE = 10;
 
 export default function EmployeeRedemptionsPage() {
   const [items, setItems] = useState<EmployeeBenefitRedemption[]>([]);
+  const [totalCount, setTotalCount] = useState(0);
   const [loading, setLoading] = useState(true);
   const [page, setPage] = useState(1);
   const [searchInput, setSearchInput] = useState("");
@@ -33,14 +34,15 @@ export default function EmployeeRedemptionsPage() {
     const load = async () => {
       setLoading(true);
       try {
-        const response = await fetchEmployeeBenefitRedemptions();
-        setItems(response || []);
+        const response = await fetchEmployeeBenefitRedemptions({ p: page, search });
+        setItems(response?.results || []);
+        setTotalCount(response?.count || 0);
       } finally {
         setLoading(false);
       }
     };
     load();
-  }, []);
+  }, [page, search]);
 
   const handleSearch = (e: React.FormEvent) => {
     e.preventDefault();
@@ -48,19 +50,8 @@ export default function EmployeeRedemptionsPage() {
     setSearch(searchInput.trim());
   };
 
-  const filteredItems = useMemo(() => {
-    const query = search.trim().toLowerCase();
-    if (!query) return items;
-    return items.filter((item) => {
-      const searchable = `${item.product_name || ""} ${item.enterprise_name || ""} ${item.enterprise || ""}`.toLowerCase();
-      return searchable.includes(query);
-    });
-  }, [items, search]);
-
-  const totalPages = Math.max(1, Math.ceil(filteredItems.length / PAGE_SIZE));
+  const totalPages = Math.max(1, Math.ceil(totalCount / PAGE_SIZE));
   const safePage = Math.min(page, totalPages);
-  const start = (safePage - 1) * PAGE_SIZE;
-  const paginatedItems = filteredItems.slice(start, start + PAGE_SIZE);
   const selectedDate = selectedRedemption ? new Date(selectedRedemption.redeemed_at) : null;
 
   return (
@@ -110,18 +101,18 @@ export default function EmployeeRedemptionsPage() {
       <Card>
         <CardHeader>
           <CardTitle>Historial de canjes</CardTitle>
-          <CardDescription>{loading ? "Cargando..." : `Total: ${filteredItems.length}`}</CardDescription>
+          <CardDescription>{loading ? "Cargando..." : `Total: ${totalCount}`}</CardDescription>
         </CardHeader>
         <CardContent className="space-y-4">
           {loading ? (
             <div className="text-sm text-muted-foreground">Cargando historial...</div>
-          ) : paginatedItems.length === 0 ? (
+          ) : items.length === 0 ? (
             <div className="rounded-lg border border-dashed p-4 text-sm text-muted-foreground">
               No hay productos canjeados para mostrar.
             </div>
           ) : (
             <div className="grid grid-cols-1 gap-4 sm:grid-cols-2 lg:grid-cols-3">
-              {paginatedItems.map((redemption) => (
+              {items.map((redemption) => (
                 <div key={redemption.id} className="rounded-xl border bg-card p-4 shadow-sm">
                   <div className="flex items-center justify-between gap-2">
                     <h3 className="line-clamp-1 font-semibold">
@@ -157,7 +148,7 @@ export default function EmployeeRedemptionsPage() {
             </div>
           )}
 
-          {filteredItems.length > PAGE_SIZE ? (
+          {totalCount > PAGE_SIZE ? (
             <div className="flex items-center justify-center gap-4 pt-2">
               <Button
                 variant="outline"
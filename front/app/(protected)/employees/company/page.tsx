@@ -1,8 +1,15 @@
 'use client';
 
 import Link from 'next/link';
+import { useRouter } from 'next/navigation';
 import { useEffect, useState } from 'react';
-import { fetchEmployeeCompanies, type EmployeeCompaniesResponse, type PaginatedResponse } from '@/lib/employee-portal';
+import {
+  fetchEmployeeCompanies,
+  fetchEnterpriseAutocomplete,
+  type EmployeeCompaniesResponse,
+  type EnterpriseAutocompleteSuggestion,
+  type PaginatedResponse,
+} from '@/lib/employee-portal';
 import { Button } from '@/components/ui/button';
 import { getImageUrl } from '@/lib/utils';
 import { Input } from '@/components/ui/input';
@@ -15,6 +22,8 @@ export default function EmployeesCompanyPage() {
   const [page, setPage] = useState(1);
   const [searchInput, setSearchInput] = useState('');
   const [search, setSearch] = useState('');
+  const [suggestions, setSuggestions] = useState<EnterpriseAutocompleteSuggestion[]>([]);
+  const router = useRouter();
 
   useEffect(() => {
     const load = async () => {
@@ -29,11 +38,44 @@ export default function EmployeesCompanyPage() {
     load();
   }, [page, search]);
 
+  useEffect(() => {
+    const value = searchInput.trim();
+    if (!value || value === search) {
+      setSuggestions([]);
+      return;
+    }
+    let cancelled = false;
+    const timer = setTimeout(async () => {
+      try {
+        const response = await fetchEnterpriseAutocomplete(value);
+        if (!cancelled) setSuggestions(response.results);
+      } catch {
+        if (!cancelled) setSuggestions([]);
+      }
+    }, 150);
+    return () => {
+      cancelled = true;
+      clearTimeout(timer);
+    };
+  }, [searchInput, search]);
+
   const handleSearch = (e: React.FormEvent) => {
     e.preventDefault();
+    setSuggestions([]);
     setPage(1);
     setSearch(searchInput);
   };
+
+  const handleSuggestion = (suggestion: EnterpriseAutocompleteSuggestion) => {
+    setSuggestions([]);
+    if (suggestion.type === 'enterprise') {
+      router.push(`/employees/company/${suggestion.id}`);
+      return;
+    }
+    setSearchInput(suggestion.value);
+    setPage(1);
+    setSearch(suggestion.value);
+  };
   const totalCompanies = portal?.count ?? 0;
 
   return (
@@ -71,7 +113,28 @@ export default function EmployeesCompanyPage() {
                 className="pl-9 bg-background"
                 value={searchInput}
                 onChange={(e) => setSearchInput(e.target.value)}
+                onBlur={() => setTimeout(() => setSuggestions([]), 150)}
+                autoComplete="off"
               />
+              {suggestions.length > 0 && (
+                <ul className="absolute left-0 right-0 top-full z-20 mt-1 overflow-hidden rounded-md border bg-popover shadow-md">
+                  {suggestions.map((suggestion) => (
+                    <li key={suggestion.type === 'enterprise' ? suggestion.id : `niche-${suggestion.value}`}>
+                      <button
+                        type="button"
+                        className="flex w-full items-center justify-between gap-2 px-3 py-2 text-left text-sm hover:bg-muted"
+                        onMouseDown={(e) => e.preventDefault()}
+                        onClick={() => handleSuggestion(suggestion)}
+                      >
+                        <span className="truncate">{suggestion.value}</span>
+                        <span className="shrink-0 text-xs text-muted-foreground">
+                          {suggestion.type === 'enterprise' ? suggestion.niche || 'Empresa' : `Nicho · ${suggestion.count}`}
+                        </span>
+                      </button>
+                    </li>
+                  ))}
+                </ul>
+              )}
             </div>
             <Button type="submit">Buscar</Button>
           </form>
@@ -22,6 +22,7 @@ import { Textarea } from "@/components/ui/textarea";
 import { toast } from "sonner";
 import { getJobPriorityLabel, getJobStatusLabel } from "@/lib/model-choice-labels";
 import { getImageUrl } from "@/lib/utils";
+import type { PaginatedResponse } from "@/lib/employee-portal";
 import {
   ArrowLeft,
   Building2,
@@ -143,8 +144,10 @@ export default function EmployeeJobDetailPage() {
         const response = await apiClient.get<JobDetailResponse>(`/job/${jobId}/`);
         setJob(response?.job || null);
 
-        const applications = await apiClient.get<EmployeeApplication[]>(`/employee/applications/?job=${jobId}`);
-        setMyApplications(applications || []);
+        const applications = await apiClient.get<PaginatedResponse<EmployeeApplication>>(
+          `/employee/applications/?job=${jobId}`
+        );
+        setMyApplications(applications?.results || []);
       } catch (err: any) {
         setError(err?.message || "No se pudo cargar el detalle del empleo.");
       } finally {
@@ -223,8 +226,10 @@ export default function EmployeeJobDetailPage() {
       toast.success("¡Tu postulación ha sido enviada con éxito!");
       setJob((prev) => (prev ? { ...prev, already_applied: true } : prev));
 
-      const applications = await apiClient.get<EmployeeApplication[]>(`/employee/applications/?job=${jobId}`);
-      setMyApplications(applications || []);
+      const applications = await apiClient.get<PaginatedResponse<EmployeeApplication>>(
+        `/employee/applications/?job=${jobId}`
+      );
+      setMyApplications(applications?.results || []);
 
       setApplyOpen(false);
       setApplicationForm({ fullname: "", email: "", phone: "", cv: null, coverLetter: "" });
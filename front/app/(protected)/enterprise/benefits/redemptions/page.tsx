@@ -42,6 +42,11 @@ type Redemption = {
 
 type EnterpriseReport = {
   redemptions: Redemption[];
+  by_product: Array<{
+    product_id_snapshot?: string | null;
+    product_name?: string | null;
+    total: number;
+  }>;
   by_enterprise: Array<{
     enterprise: string;
     enterprise__enterprise?: string;
@@ -59,23 +64,42 @@ type EnterpriseReport = {
   };
 };
 
+type EnterpriseReportPage = {
+  count: number;
+  next: string | null;
+  previous: string | null;
+  results: EnterpriseReport;
+};
+
+const PAGE_SIZE = 25;
+// Tope de filas que el backend entrega por pagina; se usa para el PDF
+const EXPORT_PAGE_SIZE = 500;
+
+const benefitName = (name?: string | null, productId?: string | null) => name || productId || 'Sin beneficio';
+
 export default function EnterpriseBenefitsRedemptionsPage() {
   const [loading, setLoading] = useState(true);
   const [report, setReport] = useState<EnterpriseReport | null>(null);
   const [searchTerm, setSearchTerm] = useState('');
   const [selectedMonth, setSelectedMonth] = useState<string>('all');
   const [openEnterprises, setOpenEnterprises] = useState<Set<string>>(new Set());
+  const [page, setPage] = useState(1);
+  const [totalCount, setTotalCount] = useState(0);
+
+  const fetchReport = (extra: Record<string, string>) => {
+    const params = new URLSearchParams(extra);
+    if (searchTerm.trim()) params.set('search', searchTerm.trim());
+    if (selectedMonth !== 'all') params.set('month', selectedMonth);
+
+    return apiClient.get<EnterpriseReportPage>(`/enterprise/benefits/redemptions/?${params.toString()}`);
+  };
 
   const loadReport = async () => {
     setLoading(true);
     try {
-      const params = new URLSearchParams();
-      if (searchTerm.trim()) params.set('search', searchTerm.trim());
-      if (selectedMonth !== 'all') params.set('month', selectedMonth);
-
-      const url = `/enterprise/benefits/redemptions/${params.toString() ? `?${params.toString()}` : ''}`;
-      const data = await apiClient.get<EnterpriseReport>(url);
-      setReport(data);
+      const data = await fetchReport({ p: String(page) });
+      setReport(data?.results || null);
+      setTotalCount(data?.count || 0);
     } finally {
       setLoading(false);
     }
@@ -83,13 +107,17 @@ export default function EnterpriseBenefitsRedemptionsPage() {
 
   useEffect(() => {
     loadReport();
-  }, [searchTerm, selectedMonth]);
+  }, [searchTerm, selectedMonth, page]);
 
   const handleClearFilters = () => {
     setSearchTerm('');
     setSelectedMonth('all');
+    setPage(1);
   };
 
+  const totalPages = Math.max(1, Math.ceil(totalCount / PAGE_SIZE));
+  const safePage = Math.min(page, totalPages);
+
   const hasActiveFilters = searchTerm || selectedMonth !== 'all';
 
   const monthOptions = useMemo(() => {
@@ -104,17 +132,25 @@ export default function EnterpriseBenefitsRedemptionsPage() {
     return options;
   }, []);
 
-  const benefitsGroups = useMemo(() => {
+  const groupRedemptions = (data: EnterpriseReport) => {
+    // Totales desde by_product (todos los canjes filtrados); las filas son solo las recibidas
+    const totals = new Map<string, number>();
+    (data.by_product || []).forEach((item) => {
+      const key = benefitName(item.product_name, item.product_id_snapshot);
+      totals.set(key, (totals.get(key) || 0) + item.total);
+    });
     const grouped = new Map<string, Redemption[]>();
-    (report?.redemptions || []).forEach((redemption) => {
-      const key = redemption.product_name || redemption.product_id_snapshot || 'Sin beneficio';
+    (data.redemptions || []).forEach((redemption) => {
+      const key = benefitName(redemption.product_name, redemption.product_id_snapshot);
       if (!grouped.has(key)) grouped.set(key, []);
       grouped.get(key)!.push(redemption);
     });
-    return Array.from(grouped.entries())
-      .map(([name, redemptions]) => ({ name, redemptions, total: redemptions.length }))
+    return Array.from(totals.entries())
+      .map(([name, total]) => ({ name, total, redemptions: grouped.get(name) || [] }))
       .sort((a, b) => b.total - a.total);
-  }, [report?.redemptions]);
+  };
+
+  const benefitsGroups = useMemo(() => (report ? groupRedemptions(report) : []), [report]);
 
   const toggleBenefit = (benefitName: string) => {
     setOpenEnterprises((prev) => {
@@ -127,7 +163,7 @@ export default function EnterpriseBenefitsRedemptionsPage() {
 
   const getEnterpriseLabel = (redemption: Redemption) => redemption.employee_enterprise_name?.trim() || '-';
 
-  const exportToPDF = () => {
+  const exportToPDF = async () => {
     if (!report?.redemptions || report.redemptions.length === 0) {
       alert('No hay datos para exportar');
       return;
@@ -139,6 +175,17 @@ export default function EnterpriseBenefitsRedemptionsPage() {
       return;
     }
 
+    // La vista solo tiene la pagina actual; el PDF pide el detalle completo
+    let exportData: EnterpriseReportPage;
+    try {
+      exportData = await fetchReport({ page_size: String(EXPORT_PAGE_SIZE) });
+    } catch {
+      printWindow.close();
+      alert('No se pudo generar el PDF');
+      return;
+    }
+    const exportGroups = groupRedemptions(exportData.results).filter((group) => group.redemptions.length > 0);
+
     const htmlContent = `
       <!DOCTYPE html>
       <html>
@@ -163,12 +210,17 @@ export default function EnterpriseBenefitsRedemptionsPage() {
         <body>
           <h1>📊 Reporte de Canjes de Beneficios</h1>
           <div class="meta">
-            <div class="meta-item"><span class="meta-label">Total de canjes:</span> ${report.meta?.total_redemptions || 0}</div>
+            <div class="meta-item"><span class="meta-label">Total de canjes:</span> ${exportData.results.meta?.total_redemptions || 0}</div>
             <div class="meta-item"><span class="meta-label">Fecha de generación:</span> ${new Date().toLocaleString('es-ES')}</div>
             ${hasActiveFilters ? '<div class="meta-item"><span class="meta-label">⚠️ Reporte filtrado</span></div>' : ''}
           </div>
           <h2>Canjes por Beneficio</h2>
-          ${(benefitsGroups || [])
+          ${
+            exportData.count > exportData.results.redemptions.length
+              ? `<p>Mostrando ${exportData.results.redemptions.length} de ${exportData.count} canjes.</p>`
+              : ''
+          }
+          ${exportGroups
             .map(
               (group) => `
             <h3 style="margin-top:22px;">${group.name} (${group.total} canjes)</h3>
@@ -248,7 +300,10 @@ export default function EnterpriseBenefitsRedemptionsPage() {
                 <Input
                   placeholder="Buscar por beneficio, nombre o correo..."
                   value={searchTerm}
-                  onChange={(e) => setSearchTerm(e.target.value)}
+                  onChange={(e) => {
+                    setSearchTerm(e.target.value);
+                    setPage(1);
+                  }}
                 />
               </div>
 
@@ -257,7 +312,13 @@ export default function EnterpriseBenefitsRedemptionsPage() {
                   <Calendar className="h-4 w-4" />
                   Mes
                 </label>
-                <Select value={selectedMonth} onValueChange={setSelectedMonth}>
+                <Select
+                  value={selectedMonth}
+                  onValueChange={(value) => {
+                    setSelectedMonth(value);
+                    setPage(1);
+                  }}
+                >
                   <SelectTrigger>
                     <SelectValue placeholder="Todos los meses" />
                   </SelectTrigger>
@@ -359,7 +420,7 @@ export default function EnterpriseBenefitsRedemptionsPage() {
               Detalle de Canjes
             </CardTitle>
             <CardDescription>
-              Vista detallada de todos los canjes ({report?.redemptions?.length || 0} registros)
+              Vista detallada de todos los canjes ({totalCount} registros)
             </CardDescription>
           </CardHeader>
           <CardContent>
@@ -369,7 +430,9 @@ export default function EnterpriseBenefitsRedemptionsPage() {
               <div className="text-center py-8 text-muted-foreground">No hay canjes registrados</div>
             ) : (
               <div className="space-y-4">
-                {benefitsGroups.map((benefitItem) => {
+                {benefitsGroups
+                  .filter((benefitItem) => benefitItem.redemptions.length > 0)
+                  .map((benefitItem) => {
                   const redemptions = benefitItem.redemptions;
                   const isOpen = openEnterprises.has(benefitItem.name);
                   return (
@@ -435,6 +498,32 @@ export default function EnterpriseBenefitsRedemptionsPage() {
                 })}
               </div>
             )}
+
+            {totalCount > PAGE_SIZE ? (
+              <div className="flex items-center justify-center gap-4 pt-4">
+                <Button
+                  variant="outline"
+                  size="sm"
+                  disabled={safePage <= 1}
+                  onClick={() => setPage((prev) => Math.max(1, prev - 1))}
+                  className="w-24"
+                >
+                  Anterior
+                </Button>
+                <span className="text-sm font-medium text-muted-foreground">
+                  Página {safePage} de {totalPages}
+                </span>
+                <Button
+                  variant="outline"
+                  size="sm"
+                  disabled={safePage >= totalPages}
+                  onClick={() => setPage((prev) => Math.min(totalPages, prev + 1))}
+                  className="w-24"
+                >
+                  Siguiente
+                </Button>
+              </div>
+            ) : null}
           </CardContent>
         </Card>
       </div>
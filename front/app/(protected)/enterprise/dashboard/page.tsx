@@ -100,7 +100,9 @@ export default function EnterpriseDashboardPage() {
           apiClient.get<JobsResponse>(`/job/list/?${buildPageQuery({ page: 1, pageParam: 'p', pageSize: 10 })}`),
           apiClient.get<ProductsResponse>(`/product/list/?${buildPageQuery({ page: 1, pageParam: 'p', pageSize: 10 })}`),
           apiClient.get<PaymentsResponse>('/billing/my-payments/'),
-          apiClient.get<EnterpriseBenefitsRedemptionsResponse>('/enterprise/benefits/redemptions/'),
+          apiClient.get<{ results?: EnterpriseBenefitsRedemptionsResponse }>(
+            `/enterprise/benefits/redemptions/?${buildPageQuery({ page: 1, pageParam: 'p', pageSize: 5 })}`
+          ),
         ]);
 
         const employeesParsed = parsePaginatedCollection<any>(employeesRes, (payload) => payload?.results?.employees || []);
@@ -119,8 +121,8 @@ export default function EnterpriseDashboardPage() {
 
         setPayments(paymentsRes?.summary || { total: 0, paid: 0, pending: 0, overdue: 0 });
         setPaymentsList(paymentsRes?.payments || []);
-        setRedemptionsCount(redemptionsRes?.meta?.total_redemptions || 0);
-        setRedemptions(redemptionsRes?.redemptions || []);
+        setRedemptionsCount(redemptionsRes?.results?.meta?.total_redemptions || 0);
+        setRedemptions(redemptionsRes?.results?.redemptions || []);
       } catch (err: any) {
         setError(err?.message || 'No se pudo cargar tu panel de empresa.');
       } finally {
@@ -1,7 +1,12 @@
 'use client';
 
-import { useEffect, useMemo, useRef, useState } from 'react';
-import { fetchEnterpriseMap, type EmployeeCompaniesResponse } from '@/lib/employee-portal';
+import { useEffect, useRef, useState } from 'react';
+import {
+  fetchEnterpriseMapClusters,
+  fetchEnterpriseMapDetail,
+  type EmployeeCompaniesResponse,
+  type EnterpriseMapClusters,
+} from '@/lib/employee-portal';
 import { getImageUrl } from '@/lib/utils';
 
 type LeafletMap = any;
@@ -12,11 +17,6 @@ const LEAFLET_STYLE_ID = 'leaflet-css-cdn';
 const CUCUTA_CENTER: [number, number] = [7.8891, -72.4967];
 const CUCUTA_DEFAULT_ZOOM = 12;
 
-const parseCoordinate = (value?: string | number | null) => {
-  const parsed = Number(value);
-  return Number.isFinite(parsed) ? parsed : null;
-};
-
 const escapeHtmlAttribute = (value: string) =>
   value
     .replace(/&/g, '&amp;')
@@ -60,115 +60,147 @@ const ensureLeafletLoaded = async () => {
   return (window as any).L || null;
 };
 
+const buildPopupHtml = (item: EmployeeCompaniesResponse) => `
+    <div style="min-width:220px;max-width:280px">
+      <p style="margin:0;font-weight:700;font-size:14px;">${escapeHtmlAttribute(item.name || 'Empresa')}</p>
+      <p style="margin:4px 0 0 0;font-size:12px;color:#475569;">${escapeHtmlAttribute(item.email || 'Sin correo')}</p>
+      <p style="margin:6px 0 0 0;font-size:12px;"><strong>Tel:</strong> ${escapeHtmlAttribute(item.phone || 'No registrado')}</p>
+      <p style="margin:4px 0 0 0;font-size:12px;"><strong>Sector:</strong> ${escapeHtmlAttribute(item.niche || 'No registrado')}</p>
+      <p style="margin:8px 0 0 0;font-size:12px;color:#0f172a;"><strong>Dirección:</strong> ${escapeHtmlAttribute(item.address || 'No disponible')}</p>
+    </div>
+  `;
+
+const buildAvatarIconHtml = (item: EmployeeCompaniesResponse) => {
+  const avatarSrc = getImageUrl(item.avatar || '');
+  const safeName = (item.name || 'E').trim();
+  const initials = safeName.charAt(0).toUpperCase();
+  return avatarSrc
+    ? `<div style="width:44px;height:44px;border-radius:9999px;border:2px solid #fff;box-shadow:0 8px 20px rgba(0,0,0,.25);overflow:hidden;background:#fff"><img src="${escapeHtmlAttribute(avatarSrc)}" alt="${escapeHtmlAttribute(safeName)}" style="width:100%;height:100%;object-fit:cover" /></div>`
+    : `<div style="width:44px;height:44px;border-radius:9999px;border:2px solid #fff;box-shadow:0 8px 20px rgba(0,0,0,.25);display:flex;align-items:center;justify-content:center;background:#0f172a;color:#fff;font-weight:700">${escapeHtmlAttribute(initials)}</div>`;
+};
+
+const PIN_ICON_HTML =
+  '<div style="width:20px;height:20px;border-radius:9999px;border:3px solid #fff;box-shadow:0 4px 12px rgba(0,0,0,.3);background:#0f172a"></div>';
+
+const clusterIconSize = (count: number) => (count < 10 ? 36 : count < 100 ? 44 : 52);
+
+const buildClusterIconHtml = (count: number) => {
+  const size = clusterIconSize(count);
+  return `<div style="width:${size}px;height:${size}px;border-radius:9999px;border:3px solid #fff;box-shadow:0 8px 20px rgba(0,0,0,.25);display:flex;align-items:center;justify-content:center;background:#2563eb;color:#fff;font-weight:700;font-size:13px">${count}</div>`;
+};
+
 export function EnterpriseMapExplorer() {
   const mapContainerRef = useRef<HTMLDivElement | null>(null);
   const mapRef = useRef<LeafletMap | null>(null);
   const markersLayerRef = useRef<LeafletLayerGroup | null>(null);
+  const requestIdRef = useRef(0);
 
-  const [items, setItems] = useState<EmployeeCompaniesResponse[]>([]);
   const [loading, setLoading] = useState(true);
   const [error, setError] = useState('');
 
   useEffect(() => {
-    const load = async () => {
+    let cancelled = false;
+
+    const renderClusters = (L: any, clusters: EnterpriseMapClusters) => {
+      const map = mapRef.current;
+      const markersLayer = markersLayerRef.current;
+      if (!map || !markersLayer) return;
+
+      markersLayer.clearLayers();
+      clusters.count.forEach((count, index) => {
+        const lat = clusters.lat[index];
+        const lng = clusters.lng[index];
+        const enterpriseId = clusters.id[index];
+
+        if (count > 1 || !enterpriseId) {
+          const size = clusterIconSize(count);
+          const marker = L.marker([lat, lng], {
+            icon: L.divIcon({
+              html: buildClusterIconHtml(count),
+              className: '',
+              iconSize: [size, size],
+              iconAnchor: [size / 2, size / 2],
+            }),
+          });
+          marker.bindTooltip(`${count} empresas`);
+          marker.on('click', () => map.setView([lat, lng], Math.min(map.getZoom() + 2, 19)));
+          marker.addTo(markersLayer);
+          return;
+        }
+
+        // Pin individual: el detalle (avatar, contacto) se carga solo al hacer clic.
+        const marker = L.marker([lat, lng], {
+          icon: L.divIcon({ html: PIN_ICON_HTML, className: '', iconSize: [20, 20], iconAnchor: [10, 10] }),
+        });
+        marker.on('click', async () => {
+          try {
+            const item = await fetchEnterpriseMapDetail(enterpriseId);
+            marker.setIcon(
+              L.divIcon({ html: buildAvatarIconHtml(item), className: '', iconSize: [44, 44], iconAnchor: [22, 22] }),
+            );
+            marker.bindTooltip(item.name || 'Empresa');
+            marker.bindPopup(buildPopupHtml(item)).openPopup();
+          } catch (err: any) {
+            marker.bindPopup(escapeHtmlAttribute(err?.message || 'No se pudo cargar la empresa.')).openPopup();
+          }
+        });
+        marker.addTo(markersLayer);
+      });
+    };
+
+    const loadClusters = async (L: any) => {
+      const map = mapRef.current;
+      if (!map) return;
+
+      const requestId = ++requestIdRef.current;
       setLoading(true);
       setError('');
       try {
-        const response = await fetchEnterpriseMap();
-        setItems(response?.enterprises || []);
+        const response = await fetchEnterpriseMapClusters({
+          bbox: map.getBounds().toBBoxString(),
+          zoom: map.getZoom(),
+        });
+        // Descarta respuestas de movimientos anteriores del mapa.
+        if (cancelled || requestId !== requestIdRef.current) return;
+        renderClusters(L, response.clusters);
       } catch (err: any) {
-        setError(err?.message || 'No se pudo cargar el mapa de empresas.');
+        if (!cancelled) setError(err?.message || 'No se pudo cargar el mapa de empresas.');
       } finally {
-        setLoading(false);
+        if (!cancelled && requestId === requestIdRef.current) setLoading(false);
       }
     };
-    load();
-  }, []);
-
-  const enterprisesWithCoordinates = useMemo(
-    () =>
-      items.filter((item) => {
-        const lat = parseCoordinate(item.latitude);
-        const lng = parseCoordinate(item.longitude);
-        return lat !== null && lng !== null;
-      }),
-    [items],
-  );
 
-  useEffect(() => {
-    let cancelled = false;
     const mountMap = async () => {
-      if (!mapContainerRef.current) return;
+      try {
+        const L = await ensureLeafletLoaded();
+        if (!L || cancelled || !mapContainerRef.current) return;
 
-      const L = await ensureLeafletLoaded();
-      if (!L || cancelled || !mapContainerRef.current) return;
+        if (!mapRef.current) {
+          mapRef.current = L.map(mapContainerRef.current, {
+            zoomControl: true,
+          }).setView(CUCUTA_CENTER, CUCUTA_DEFAULT_ZOOM);
 
-      if (!mapRef.current) {
-        mapRef.current = L.map(mapContainerRef.current, {
-          zoomControl: true,
-        }).setView(CUCUTA_CENTER, CUCUTA_DEFAULT_ZOOM);
+          L.tileLayer('https://{s}.tile.openstreetmap.org/{z}/{x}/{y}.png', {
+            attribution: '&copy; OpenStreetMap contributors',
+            maxZoom: 19,
+          }).addTo(mapRef.current);
 
-        L.tileLayer('https://{s}.tile.openstreetmap.org/{z}/{x}/{y}.png', {
-          attribution: '&copy; OpenStreetMap contributors',
-          maxZoom: 19,
-        }).addTo(mapRef.current);
+          markersLayerRef.current = L.layerGroup().addTo(mapRef.current);
+          mapRef.current.on('moveend', () => loadClusters(L));
+        }
 
-        markersLayerRef.current = L.layerGroup().addTo(mapRef.current);
+        await loadClusters(L);
+      } catch (err: any) {
+        if (!cancelled) {
+          setError(err?.message || 'No se pudo cargar el mapa de empresas.');
+          setLoading(false);
+        }
       }
-
-      const map = mapRef.current;
-      const markersLayer = markersLayerRef.current;
-      if (!map || !markersLayer) return;
-
-      markersLayer.clearLayers();
-
-      const buildPopupHtml = (item: EmployeeCompaniesResponse) => `
-          <div style="min-width:220px;max-width:280px">
-            <p style="margin:0;font-weight:700;font-size:14px;">${escapeHtmlAttribute(item.name || 'Empresa')}</p>
-            <p style="margin:4px 0 0 0;font-size:12px;color:#475569;">${escapeHtmlAttribute(item.email || 'Sin correo')}</p>
-            <p style="margin:6px 0 0 0;font-size:12px;"><strong>Tel:</strong> ${escapeHtmlAttribute(item.phone || 'No registrado')}</p>
-            <p style="margin:4px 0 0 0;font-size:12px;"><strong>Sector:</strong> ${escapeHtmlAttribute(item.niche || 'No registrado')}</p>
-            <p style="margin:8px 0 0 0;font-size:12px;color:#0f172a;"><strong>Dirección:</strong> ${escapeHtmlAttribute(item.address || 'No disponible')}</p>
-          </div>
-        `;
-
-      enterprisesWithCoordinates.forEach((item) => {
-        const lat = parseCoordinate(item.latitude);
-        const lng = parseCoordinate(item.longitude);
-        if (lat === null || lng === null) return;
-
-        const avatarSrc = getImageUrl(item.avatar || '');
-        const safeName = (item.name || 'E').trim();
-        const initials = safeName.charAt(0).toUpperCase();
-        const iconHtml = avatarSrc
-          ? `<div style="width:44px;height:44px;border-radius:9999px;border:2px solid #fff;box-shadow:0 8px 20px rgba(0,0,0,.25);overflow:hidden;background:#fff"><img src="${escapeHtmlAttribute(avatarSrc)}" alt="${escapeHtmlAttribute(safeName)}" style="width:100%;height:100%;object-fit:cover" /></div>`
-          : `<div style="width:44px;height:44px;border-radius:9999px;border:2px solid #fff;box-shadow:0 8px 20px rgba(0,0,0,.25);display:flex;align-items:center;justify-content:center;background:#0f172a;color:#fff;font-weight:700">${escapeHtmlAttribute(initials)}</div>`;
-
-        const icon = L.divIcon({
-          html: iconHtml,
-          className: '',
-          iconSize: [44, 44],
-          iconAnchor: [22, 22],
-        });
-
-        const marker = L.marker([lat, lng], { icon });
-        marker.bindTooltip(item.name || 'Empresa');
-        marker.bindPopup(buildPopupHtml(item));
-        marker.on('click', () => marker.openPopup());
-        marker.addTo(markersLayer);
-      });
-
-      map.setView(CUCUTA_CENTER, CUCUTA_DEFAULT_ZOOM);
     };
 
     mountMap();
     return () => {
       cancelled = true;
-    };
-  }, [enterprisesWithCoordinates]);
-
-  useEffect(() => {
-    return () => {
       if (mapRef.current) {
         mapRef.current.remove();
         mapRef.current = null;
@@ -179,13 +211,17 @@ export function EnterpriseMapExplorer() {
 
   return (
     <div className="enterprise-map-shell relative z-0 h-full w-full">
+      <div ref={mapContainerRef} className="h-full w-full overflow-hidden rounded-xl bg-muted" />
       {loading ? (
-        <div className="flex items-center justify-center h-full text-muted-foreground">Cargando mapa...</div>
-      ) : error ? (
-        <div className="flex items-center justify-center h-full text-red-600">{error}</div>
-      ) : (
-        <div ref={mapContainerRef} className="h-full w-full overflow-hidden rounded-xl bg-muted" />
-      )}
+        <div className="pointer-events-none absolute right-3 top-3 z-[1000] rounded-md bg-background/90 px-3 py-1 text-xs text-muted-foreground shadow">
+          Cargando mapa...
+        </div>
+      ) : null}
+      {error ? (
+        <div className="absolute inset-x-3 bottom-3 z-[1000] rounded-md bg-background/90 px-3 py-2 text-sm text-red-600 shadow">
+          {error}
+        </div>
+      ) : null}
     </div>
   );
 }
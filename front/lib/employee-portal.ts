@@ -145,6 +145,28 @@ export type EnterpriseMapResponse = {
   enterprises: EmployeeCompaniesResponse[];
 };
 
+export type EnterpriseMapClusters = {
+  lat: number[];
+  lng: number[];
+  count: number[];
+  id: Array<string | null>;
+};
+
+export type EnterpriseMapClustersResponse = {
+  zoom: number;
+  total: number;
+  clusters: EnterpriseMapClusters;
+};
+
+export type EnterpriseAutocompleteSuggestion =
+  | { type: 'enterprise'; id: string; value: string; niche: string }
+  | { type: 'niche'; value: string; count: number };
+
+export type EnterpriseAutocompleteResponse = {
+  query: string;
+  results: EnterpriseAutocompleteSuggestion[];
+};
+
 export async function fetchEmployeeEnterpriseDetail(enterpriseId: string) {
   return apiClient.get<EmployeeEnterpriseDetailResponse>(`/employee/portal/enterprises/${enterpriseId}/`);
 }
@@ -166,6 +188,11 @@ export async function fetchEmployeeCompanies(params: { p?: number; search?: stri
   return apiClient.get<PaginatedResponse<EmployeeCompaniesResponse>>(`/employee/companies/${buildQuery(params)}`);
 }
 
+export async function fetchEnterpriseAutocomplete(q: string) {
+  const query = new URLSearchParams({ q });
+  return apiClient.get<EnterpriseAutocompleteResponse>(`/employee/companies/autocomplete/?${query.toString()}`);
+}
+
 export async function fetchEmployeeJobs(params: { p?: number; search?: string } = {}) {
   return apiClient.get<PaginatedResponse<EmployeePortalJob>>(`/employee/jobs/${buildQuery(params)}`);
 }
@@ -174,10 +201,21 @@ export async function fetchEmployeeBenefits(params: { p?: number; search?: strin
   return apiClient.get<PaginatedResponse<EmployeePortalBenefit>>(`/employee/benefits/${buildQuery(params)}`);
 }
 
-export async function fetchEmployeeBenefitRedemptions() {
-  return apiClient.get<EmployeeBenefitRedemption[]>('/employee/benefits/redemptions/');
+export async function fetchEmployeeBenefitRedemptions(params: { p?: number; search?: string } = {}) {
+  return apiClient.get<PaginatedResponse<EmployeeBenefitRedemption>>(
+    `/employee/benefits/redemptions/${buildQuery(params)}`
+  );
 }
 
 export async function fetchEnterpriseMap() {
   return apiClient.get<EnterpriseMapResponse>('/enterprise/map/');
 }
+
+export async function fetchEnterpriseMapClusters(params: { bbox: string; zoom: number }) {
+  const query = new URLSearchParams({ bbox: params.bbox, zoom: String(params.zoom) });
+  return apiClient.get<EnterpriseMapClustersResponse>(`/enterprise/map/clusters/?${query.toString()}`);
+}
+
+export async function fetchEnterpriseMapDetail(enterpriseId: string) {
+  return apiClient.get<EmployeeCompaniesResponse>(`/enterprise/map/${enterpriseId}/`);
+}